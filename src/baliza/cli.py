@@ -3,23 +3,24 @@ Baliza CLI - PNCP Data Extraction to Parquet
 
 Simplified CLI focused solely on data extraction with smart defaults.
 Default behavior: Extract ALL historical PNCP data (backfill everything).
+
+Heavy modules (dlt, DuckDB, pydantic settings, the extraction package) are
+imported inside the commands that use them, so ``version``, ``info`` and
+``status`` start without loading them (guarded by tests/e2e/test_cli_imports.py);
+``status`` loads pyarrow only once there are footers to read.
 """
 
+import contextlib
 import typer
 from rich.console import Console
 from rich.table import Table
-from rich.progress import Progress, SpinnerColumn, TextColumn
+from rich.progress import BarColumn, MofNCompleteColumn, Progress, SpinnerColumn, TextColumn, TimeElapsedColumn
 from pathlib import Path
 from datetime import date, timedelta
-from typing import Optional
+from typing import Any, ContextManager, Dict, Optional
 
-from .extraction.pipeline import (
-    run_structured_extraction,
-    get_completed_extractions
-)
-from .settings import settings
 from .utils.cli_helpers import (
-    parse_date_options, parse_data_types, show_extraction_plan, 
+    ALL_DATA_TYPES, DATA_TYPES, parse_date_options, parse_data_types, show_extraction_plan, 
     show_extraction_results
 )
 
@@ -30,6 +31,34 @@ app = typer.Typer(
 )
 console = Console()
 
+# Commands with nothing to measure; they skip loading settings for metrics
+INSTANT_COMMANDS = {"version"}
+
+
+@app.callback()
+def main(
+    ctx: typer.Context,
+    metrics_file: Optional[Path] = typer.Option(
+        None,
+        "--metrics-file",
+        help="Maintain Prometheus metrics in this .prom file (node_exporter textfile collector)"
+    ),
+    metrics_port: Optional[int] = typer.Option(
+        None,
+        "--metrics-port",
+        help="Serve /metrics on this port while the command runs"
+    )
+):
+    if not ctx.invoked_subcommand or ctx.invoked_subcommand in INSTANT_COMMANDS:
+        return
+
+    from .settings import settings
+    textfile = metrics_file or settings.metrics_textfile
+    port = metrics_port or settings.metrics_port
+    if textfile or port:
+        from .metrics import metrics_run
+        ctx.with_resource(metrics_run(ctx.invoked_subcommand, str(textfile) if textfile else None, port))
+
 
 @app.command()
 def extract(
@@ -59,7 +88,7 @@ def extract(
     types: str = typer.Option(
         "all", 
         "--types", "-t", 
-        help="Data types: all,contracts,publications,agreements"
+        help="Data types: all,compras,contratos,atas,atualizacoes,propostas,instrumentos,pca"
     ),
     
     # Output options  
@@ -69,6 +98,18 @@ def extract(
         help="Output directory"
     ),
     
+    # API options
+    base_url: Optional[str] = typer.Option(
+        None,
+        "--base-url",
+        help="PNCP API base URL (e.g. a local mock: http://127.0.0.1:8000/api/consulta)"
+    ),
+    processes: int = typer.Option(
+        1,
+        "--processes", "-p",
+        help="Extract endpoint-months in N worker processes sharing one rate limit (0: one per CPU)"
+    ),
+    
     # Utility flags
     verbose: bool = typer.Option(
         False, 
@@ -79,6 +120,16 @@ def extract(
         False, 
         "--dry-run", 
         help="Show what would be extracted"
+    ),
+    profile: bool = typer.Option(
+        False,
+        "--profile",
+        help="Time each stage, trace peak memory and write a report to OUTPUT/.baliza/profiles"
+    ),
+    profiler: str = typer.Option(
+        "sample",
+        "--profiler",
+        help="With --profile: sample (flamegraph stacks), cprofile (.prof) or off"
     )
 ):
     """
@@ -90,17 +141,31 @@ def extract(
       baliza extract                    # Extract ALL historical data (default)
       baliza extract --days 30         # Last 30 days only  
       baliza extract --date 2025-01    # January 2025 only
-      baliza extract --types contracts # All historical contracts
+      baliza extract --types contratos # All historical contracts
       baliza extract --dry-run         # See what would be extracted
+      baliza extract --base-url http://127.0.0.1:8000/api/consulta --date 2024-01
+      baliza extract --date 2024-01 --profile   # Stage timings + flamegraph stacks
+      baliza extract --range 2021-01:2024-12 --processes 4
     """
     
-    # Determine date range based on options
+    if profile and processes != 1:
+        # Workers run in their own interpreters: neither stage timings nor samples reach this one
+        raise typer.BadParameter("--profile needs --processes 1", param_hint="--profile")
+
+    from .extraction.pipeline import run_structured_extraction
+    from .settings import settings
+
+    if base_url:
+        settings.pncp_api_base_url = base_url.rstrip("/")
+    
+    # Determine date range based on options (any of them overrides backfill)
+    backfill_all = backfill_all and not (days or date_input or date_range)
     start_date, end_date = parse_date_options(
         backfill_all, days, date_input, date_range
     )
     
     # Parse data types
-    endpoints_config = parse_data_types(types)
+    endpoints_config = parse_data_types([t.strip() for t in types.split(",") if t.strip()])
     endpoints = endpoints_config["endpoints"]
     
     # Show extraction plan
@@ -112,6 +177,10 @@ def extract(
     
     # Create output directory
     output.mkdir(parents=True, exist_ok=True)
+
+    if processes != 1:
+        _extract_parallel(start_date, end_date, endpoints, output, processes or None, verbose)
+        return
     
     # Run extraction
     with Progress(
@@ -122,15 +191,22 @@ def extract(
         
         task = progress.add_task("🔄 Extracting PNCP data...", total=None)
         
+        if profile:
+            from .profiling import profile_run
+            profiling_context: ContextManager[Any] = profile_run(str(output), sampler=profiler)
+        else:
+            profiling_context = contextlib.nullcontext()
+
         try:
             # Run structured extraction with completion tracking
-            result = run_structured_extraction(
-                start_date=start_date,
-                end_date=end_date,
-                endpoints=endpoints,
-                output_dir=str(output),
-                skip_completed=True
-            )
+            with profiling_context:
+                result = run_structured_extraction(
+                    start_date=start_date,
+                    end_date=end_date,
+                    endpoints=endpoints,
+                    output_dir=str(output),
+                    skip_completed=True
+                )
             
             progress.update(task, description="✅ Extraction completed!")
             
@@ -143,10 +219,56 @@ def extract(
             raise typer.Exit(1)
 
 
+def _extract_parallel(start_date, end_date, endpoints, output: Path, processes: Optional[int], verbose: bool):
+    """``extract --processes``: one progress step per endpoint-month finished by the workers."""
+    from .extraction.parallel import run_parallel_extraction
+
+    with Progress(
+        SpinnerColumn(),
+        TextColumn("[progress.description]{task.description}"),
+        BarColumn(),
+        MofNCompleteColumn(),
+        TimeElapsedColumn(),
+        console=console
+    ) as progress:
+        task = progress.add_task("🔄 Extracting PNCP data...", total=None)
+
+        def on_window(endpoint: str, month: str, succeeded: bool):
+            mark = "✅" if succeeded else "⚠️ "
+            progress.update(task, advance=1, description=f"{mark} {endpoint} {month}")
+
+        try:
+            result = run_parallel_extraction(
+                start_date=start_date,
+                end_date=end_date,
+                endpoints=endpoints,
+                output_dir=str(output),
+                processes=processes,
+                skip_completed=True,
+                quiet=not verbose,
+                on_plan=lambda windows: progress.update(task, total=windows),
+                on_window=on_window
+            )
+        except Exception as e:
+            progress.update(task, description="❌ Extraction failed!")
+            console.print(f"[red]Error: {e}[/red]")
+            raise typer.Exit(1)
+
+        progress.update(task, description="✅ Extraction completed!" if not result.failed else "⚠️  Extraction finished with failures")
+
+    console.print(f"📦 {result.loads} loads into {len(result.touched)} partitions")
+    if result.failed:
+        console.print(f"[red]{len(result.failed)} endpoint-months failed (rerun to retry them):[/red]")
+        for window in result.failed:
+            console.print(f"  {window}")
+        raise typer.Exit(1)
+
+
 @app.command()
 def info():
     """Show information about available data types and configuration."""
-    
+    from .settings import settings
+
     console.print("📊 [bold]PNCP Data Extraction Information[/bold]")
     console.print()
     
@@ -156,15 +278,10 @@ def info():
     table.add_column("Description", style="white")
     table.add_column("PNCP Endpoint", style="dim")
     
-    table.add_row("contracts", "Contract data", "contratos")
-    table.add_row("publications", "Contract publications", "contratacoes_publicacao") 
-    table.add_row("agreements", "Agreement records", "atas")
-    table.add_row("updates", "Update sync endpoints", "*_atualizacao")
-    table.add_row("proposals", "Proposal data", "contratacoes_proposta")
-    table.add_row("charges", "Collection instruments", "instrumentoscobranca_inclusao")
-    table.add_row("pca", "Annual contracting plans", "pca*")
-    table.add_row("details", "Specific contract details", "contratacao_especifica")
-    table.add_row("all", "ALL 12 data types (default)", "All PNCP endpoints")
+    for type_name, (description, type_endpoints) in DATA_TYPES.items():
+        table.add_row(type_name, description, ", ".join(type_endpoints))
+    table.add_row("all", f"{', '.join(ALL_DATA_TYPES)} (default)",
+                  ", ".join(parse_data_types(["all"])["endpoints"]))
     
     console.print(table)
     console.print()
@@ -179,7 +296,7 @@ def info():
     console.print("💡 [bold]Quick Start Examples[/bold]")
     console.print("  baliza extract                    # Extract ALL historical data")
     console.print("  baliza extract --days 7           # Last week only")  
-    console.print("  baliza extract --types contracts  # All historical contracts")
+    console.print("  baliza extract --types contratos  # All historical contracts")
     console.print("  baliza extract --dry-run          # Preview what would be extracted")
 
 
@@ -203,57 +320,773 @@ def status(
         "data/", 
         "--output", "-o", 
         help="Output directory to check"
+    ),
+    workers: Optional[int] = typer.Option(
+        None,
+        "--workers",
+        help="Threads reading Parquet footers (default: 4 per CPU, up to 32)"
+    ),
+    no_cache: bool = typer.Option(
+        False,
+        "--no-cache",
+        help="Re-read every footer instead of reusing .baliza/inventory.json"
     )
 ):
-    """Show status of completed extractions."""
+    """Show archived rows, sizes and date coverage per endpoint."""
     
     console.print("📊 [bold]Extraction Status[/bold]")
     console.print()
     
+    from .storage.layout import list_tables
+    from .utils.completion_tracking import get_completed_extractions
+
     completed = get_completed_extractions(str(output))
+    tables = [name for name in list_tables(str(output)) if "__" not in name]  # Child tables follow their endpoint
     
-    if not completed:
+    if not completed and not tables:
         console.print("❌ No completed extractions found")
         console.print(f"   Check output directory: {output}")
         return
     
-    # Note: Enhanced status reporting could show data quality metrics, file sizes, etc.
-    #       For each completed endpoint, consider displaying:
-    #       - The full date range covered (min_date to max_date).
-    #       - The total number of records extracted (if available from metadata).
-    #       - The total size of the extracted data.
-    #       This would provide a more comprehensive overview of the extracted data.
-    
-    # Create status table
-    table = Table(title="Completed Extractions")
+    # Footers only: rows and date ranges without reading any data page
+    from .storage.inventory import build_inventory
+
+    inventory = build_inventory(str(output), tables, workers=workers, use_cache=not no_cache)
+
+    table = Table(title="Archived Data")
     table.add_column("Endpoint", style="cyan", no_wrap=True)
-    table.add_column("Months Completed", style="green")
-    table.add_column("Total", style="white", justify="center")
-    
-    total_months = 0
-    for endpoint, months in completed.items():
-        months_str = ", ".join(sorted(months)[:3])  # Show first 3 months
-        if len(months) > 3:
-            months_str += f" +{len(months) - 3} more"
-        
-        table.add_row(endpoint, months_str, str(len(months)))
-        total_months += len(months)
+    table.add_column("Rows", style="white", justify="right")
+    table.add_column("Size", style="white", justify="right")
+    table.add_column("Files", style="white", justify="right")
+    table.add_column("First date", style="green")
+    table.add_column("Last date", style="green")
+    table.add_column("Months", style="white", justify="center")
+    table.add_column("Holes", style="yellow")
+    table.add_column("Completed", style="green", justify="center")
+    
+    total_rows = total_bytes = 0
+    for name in sorted(set(inventory) | set(completed)):
+        stats = inventory.get(name)
+        if stats is None:
+            table.add_row(name, "-", "-", "-", "-", "-", "-", "-", str(len(completed[name])))
+            continue
+
+        holes = ", ".join(stats.holes[:3])
+        if len(stats.holes) > 3:
+            holes += f" +{len(stats.holes) - 3} more"
+        table.add_row(
+            name,
+            f"{stats.rows:,}",
+            f"{stats.bytes / 1024**2:,.1f} MB",
+            str(stats.files),
+            stats.min_date or "-",
+            stats.max_date or "-",
+            str(len(stats.months)),
+            holes or "none",
+            str(len(completed.get(name, [])))
+        )
+        total_rows += stats.rows
+        total_bytes += stats.bytes
     
     console.print(table)
     console.print()
-    console.print(f"✅ [bold green]{len(completed)} endpoints[/bold green] with [bold green]{total_months} months[/bold green] completed")
+    console.print(f"✅ [bold green]{total_rows:,} rows[/bold green] in [bold green]{len(inventory)} tables[/bold green] "
+                  f"({total_bytes / 1024**2:,.1f} MB)")
     console.print(f"📁 Output directory: {output}")
 
 
-    #       This can be done using `importlib.metadata` or by reading the file.
-    console.print("🚀 [bold]Baliza PNCP Data Extractor[/bold]")
+@app.command()
+def query(
+    sql: str = typer.Argument(
+        ...,
+        help="SQL query; each archived endpoint is available as a view"
+    ),
+    output: Path = typer.Option(
+        "data/",
+        "--output", "-o",
+        help="Output directory holding the Parquet archive"
+    ),
+    export: Optional[Path] = typer.Option(
+        None,
+        "--export", "-e",
+        help="Write results to a .csv or .parquet file instead of printing"
+    ),
+    limit: int = typer.Option(
+        50,
+        "--limit", "-n",
+        help="Maximum rows to print"
+    ),
+    database: str = typer.Option(
+        ":memory:",
+        "--database",
+        help="DuckDB catalog file to keep views in, e.g. data/baliza.duckdb (default: in memory; a file is locked to one run)"
+    )
+):
+    """
+    Run SQL over the Parquet archive with embedded DuckDB.
+
+    Filters on [bold]year[/bold]/[bold]month[/bold] prune whole partitions.
+
+    Examples:
+      baliza query "SELECT count(*) FROM contratos WHERE year = 2024"
+      baliza query "SELECT * FROM atas WHERE month = 1" --export atas_jan.parquet
+    """
+    from .storage.query import ArchiveQuery
+
+    with ArchiveQuery(str(output), database) as archive:
+        if not archive.tables:
+            console.print(f"❌ No Parquet partitions found in {output}")
+            raise typer.Exit(1)
+
+        try:
+            if export:
+                archive.export(sql, str(export))
+                console.print(f"✅ Results written to {export}")
+                return
+
+            batch = next(archive.fetch_batches(sql, batch_size=limit), None)
+        except Exception as e:
+            console.print(f"[red]Query failed: {e}[/red]")
+            raise typer.Exit(1)
+
+    if batch is None or batch.num_rows == 0:
+        console.print("No rows returned")
+        return
+
+    table = Table()
+    for name in batch.schema.names:
+        table.add_column(name, overflow="fold")
+    for row in batch.to_pylist():
+        table.add_row(*("" if value is None else str(value) for value in row.values()))
+
+    console.print(table)
+    console.print(f"[dim]Showing up to {limit} rows - use --export for full results[/dim]")
+
+
+@app.command()
+def lookup(
+    key: str = typer.Argument(
+        ...,
+        help="CNPJ/CPF (formatted or not) or numeroControlePNCP"
+    ),
+    output: Path = typer.Option(
+        "data/",
+        "--output", "-o",
+        help="Output directory holding the Parquet archive"
+    ),
+    limit: int = typer.Option(
+        20,
+        "--limit", "-n",
+        help="Maximum rows to print per endpoint"
+    )
+):
+    """
+    Find everything about a supplier, órgão or procurement across endpoints.
+
+    Uses the lookup index built during extraction and reads only the
+    matching row groups.
+
+    Examples:
+      baliza lookup 12.345.678/0001-00
+      baliza lookup 12345678000100-1-000123/2024
+    """
+    from .storage.lookup_index import read_matches
+
+    display_columns = [
+        "numero_controle_pncp", "numero_controle_pncp_ata", "ni_fornecedor",
+        "orgao_entidade__cnpj", "cnpj_orgao", "objeto_contrato", "objeto_compra",
+        "objeto_contratacao", "valor_global", "valor_total_estimado",
+    ]
+
+    totals: Dict[str, int] = {}
+    for endpoint, rows in read_matches(str(output), key):
+        shown = totals.get(endpoint, 0)
+        totals[endpoint] = shown + rows.num_rows
+        if shown >= limit:
+            continue
+
+        columns = [c for c in display_columns if c in rows.column_names] + ["year", "month"]
+        table = Table(title=endpoint)
+        for column in columns:
+            table.add_column(column, overflow="fold")
+
+        for row in rows.slice(0, limit - shown).to_pylist():
+            table.add_row(*("" if row.get(c) is None else str(row.get(c)) for c in columns))
+        console.print(table)
+
+    if not totals:
+        console.print(f"❌ No records found for {key}")
+        return
+
+    summary = ", ".join(f"{endpoint}: {count}" for endpoint, count in totals.items())
+    console.print(f"✅ [bold green]{sum(totals.values())} records[/bold green] ({summary})")
+
+
+@app.command()
+def search(
+    text: str = typer.Argument(
+        ...,
+        help="Free text, e.g. \"aquisição de ambulâncias\""
+    ),
+    output: Path = typer.Option(
+        "data/",
+        "--output", "-o",
+        help="Output directory holding the Parquet archive"
+    ),
+    limit: int = typer.Option(
+        20,
+        "--limit", "-n",
+        help="Maximum number of results"
+    ),
+    reindex: bool = typer.Option(
+        False,
+        "--reindex",
+        help="Rebuild the search index from the whole archive first"
+    )
+):
+    """
+    Full-text search over objetoCompra / objetoContrato / objetoContratacao.
+
+    Accents, plurals and stopwords are ignored. The index is maintained
+    during extraction when BALIZA's enable_search_index setting is on;
+    use --reindex to build it for an existing archive.
+
+    Examples:
+      baliza search "aquisição de ambulâncias"
+      baliza search "merenda escolar" --reindex
+    """
+    from .storage.search_index import refresh_search_index, search as search_archive
+
+    if reindex:
+        with console.status("🔄 Indexing archive..."):
+            indexed = refresh_search_index(str(output))
+        console.print(f"✅ Indexed {indexed} documents")
+
+    hits = search_archive(str(output), text, limit=limit)
+    if not hits:
+        console.print(f"❌ No results for \"{text}\"")
+        return
+
+    table = Table(title=f"Results for \"{text}\"")
+    table.add_column("Endpoint", style="cyan", no_wrap=True)
+    table.add_column("Month", style="dim", no_wrap=True)
+    table.add_column("Record", style="green")
+    table.add_column("Object", style="white", overflow="fold")
+    table.add_column("Location", style="dim", overflow="fold")
+
+    for hit in hits:
+        table.add_row(
+            hit.table,
+            f"{hit.year:04d}-{hit.month:02d}",
+            hit.record_id or "",
+            hit.text,
+            f"{hit.file} (row group {hit.row_group})"
+        )
+
+    console.print(table)
+
+
+@app.command()
+def cdc(
+    types: str = typer.Option(
+        "all",
+        "--types", "-t",
+        help="Update endpoints (or their base tables), comma-separated; 'all' for every *_atualizacao endpoint"
+    ),
+    output: Path = typer.Option(
+        "data/",
+        "--output", "-o",
+        help="Output directory holding the Parquet archive"
+    )
+):
+    """
+    Apply recent changes from the *_atualizacao endpoints to the archive.
+
+    Each update endpoint is polled from its last watermark (minus a small
+    overlap); changed records replace their previous version in the base
+    table partition they belong to. Only those partitions are rewritten.
+
+    Examples:
+      baliza cdc
+      baliza cdc --types contratos,atas
+    """
+    from .extraction.cdc import run_cdc_sync
+
+    endpoints = None if types.strip() == "all" else [t.strip() for t in types.split(",") if t.strip()]
+    results = run_cdc_sync(endpoints, str(output))
+    if not results:
+        console.print(f"❌ No CDC endpoint matches '{types}'")
+        raise typer.Exit(1)
+
+    table = Table(title="🔄 Change Data Capture")
+    table.add_column("Endpoint", style="cyan", no_wrap=True)
+    table.add_column("Window", style="dim", no_wrap=True)
+    table.add_column("Partitions rewritten", style="green", justify="right")
+
+    for result in results:
+        table.add_row(
+            result.endpoint,
+            f"{result.window_start} → {result.window_end}",
+            str(result.partitions_rewritten)
+        )
+
+    console.print(table)
+
+
+@app.command()
+def drilldown(
+    output: Path = typer.Option(
+        "data/",
+        "--output", "-o",
+        help="Output directory holding the Parquet archive"
+    ),
+    start_month: Optional[str] = typer.Option(
+        None,
+        "--from",
+        help="First publication month to drill into (YYYY-MM)"
+    ),
+    end_month: Optional[str] = typer.Option(
+        None,
+        "--to",
+        help="Last publication month to drill into (YYYY-MM)"
+    ),
+    limit: Optional[int] = typer.Option(
+        None,
+        "--limit", "-n",
+        help="Maximum number of records to request"
+    ),
+    concurrency: Optional[int] = typer.Option(
+        None,
+        "--concurrency", "-c",
+        help="Requests in flight (default: BALIZA drilldown_concurrency setting)"
+    )
+):
+    """
+    Fetch contratacao_especifica for procurements already in the archive.
+
+    Keys come from the extracted contratacoes_publicacao partitions; records
+    already fetched are skipped, so the command can be re-run to resume.
+
+    Examples:
+      baliza drilldown
+      baliza drilldown --from 2024-01 --to 2024-03 --concurrency 64
+    """
+    from .extraction.drilldown import run_drilldown
+
+    result = run_drilldown(str(output), start_month, end_month, limit, concurrency)
+
+    table = Table(title="🔎 contratacao_especifica")
+    table.add_column("Requested", justify="right")
+    table.add_column("Fetched", style="green", justify="right")
+    table.add_column("Without detail", style="yellow", justify="right")
+    table.add_column("Failed", style="red", justify="right")
+    table.add_column("Partitions", style="cyan", justify="right")
+    table.add_row(
+        str(result.requested), str(result.fetched), str(result.missing),
+        str(result.failed), str(len(result.touched))
+    )
+    console.print(table)
+
+    if result.failed:
+        raise typer.Exit(1)
+
+
+@app.command()
+def pca(
+    years: Optional[str] = typer.Option(
+        None,
+        "--years", "-y",
+        help="Comma-separated anoPca values (default: every year with plans)"
+    ),
+    types: str = typer.Option(
+        "pca,pca_usuario",
+        "--types", "-t",
+        help="PCA endpoints to extract"
+    ),
+    output: Path = typer.Option(
+        "data/",
+        "--output", "-o",
+        help="Output directory holding the Parquet archive"
+    ),
+    concurrency: Optional[int] = typer.Option(
+        None,
+        "--concurrency", "-c",
+        help="Shards paged at the same time"
+    )
+):
+    """
+    Extract annual procurement plans (PCA), with their items.
+
+    Shards are year × codigoClassificacaoSuperior (pca) or year × idUsuario
+    (pca_usuario). Classification codes are discovered from recently updated
+    plans; shards of closed years are fetched once and cached.
+
+    Examples:
+      baliza pca
+      baliza pca --years 2024,2025 --types pca
+    """
+    from .extraction.pca import run_pca_extraction
+
     try:
-        from importlib.metadata import version
-        baliza_version = version("baliza")
-    except ImportError:
-        baliza_version = "2.0.0-dev"
-    console.print(f"   Version: {baliza_version}")
-    console.print("   DLT-powered extraction pipeline")
+        year_list = [int(y) for y in years.split(",")] if years else None
+    except ValueError:
+        console.print(f"❌ Invalid years: {years}")
+        raise typer.Exit(1)
+
+    endpoints = [t.strip() for t in types.split(",") if t.strip()]
+    result = run_pca_extraction(endpoints, year_list, str(output), concurrency)
+
+    table = Table(title="📋 PCA")
+    table.add_column("Shards", justify="right")
+    table.add_column("Cached", style="dim", justify="right")
+    table.add_column("Failed", style="red", justify="right")
+    table.add_column("Plans", style="green", justify="right")
+    table.add_column("Partitions", style="cyan", justify="right")
+    table.add_row(
+        str(result.shards), str(result.cached), str(result.failed),
+        str(result.records), str(len(result.touched))
+    )
+    console.print(table)
+
+    if result.failed:
+        raise typer.Exit(1)
+
+
+@app.command()
+def snapshot(
+    output: Path = typer.Option(
+        "data/",
+        "--output", "-o",
+        help="Output directory holding the Parquet archive"
+    ),
+    reference_date: Optional[str] = typer.Option(
+        None,
+        "--date", "-d",
+        help="Snapshot date, dataFinal (YYYY-MM-DD, default: today)"
+    )
+):
+    """
+    Snapshot the procurements open for proposals and store only the changes.
+
+    New and changed records are appended to contratacoes_proposta, records
+    no longer open go to contratacoes_proposta_closed, and a manifest with
+    the counts is written under .baliza/snapshots/.
+
+    Examples:
+      baliza snapshot
+      baliza snapshot --date 2024-03-01
+    """
+    from datetime import datetime
+    from .extraction.snapshot import run_snapshot_diff
+
+    try:
+        reference = datetime.strptime(reference_date, "%Y-%m-%d").date() if reference_date else None
+    except ValueError:
+        console.print(f"❌ Invalid date: {reference_date}")
+        raise typer.Exit(1)
+
+    manifest = run_snapshot_diff("contratacoes_proposta", str(output), reference)
+
+    table = Table(title=f"📸 contratacoes_proposta as of {manifest.reference_date}")
+    table.add_column("Open", justify="right")
+    table.add_column("Inserted", style="green", justify="right")
+    table.add_column("Changed", style="yellow", justify="right")
+    table.add_column("Closed", style="red", justify="right")
+    table.add_column("Unchanged", style="dim", justify="right")
+    table.add_row(
+        str(manifest.total), str(manifest.inserted), str(manifest.changed),
+        str(manifest.closed), str(manifest.unchanged)
+    )
+    console.print(table)
+
+
+@app.command()
+def replay(
+    archive: Path = typer.Option(
+        "data/",
+        "--archive", "-a",
+        help="Output directory whose .baliza/raw holds the archived responses"
+    ),
+    output: Path = typer.Option(
+        "data/replay/",
+        "--output", "-o",
+        help="Directory for the rebuilt Parquet archive"
+    ),
+    types: Optional[str] = typer.Option(
+        None,
+        "--types", "-t",
+        help="Comma-separated endpoints to replay (default: all)"
+    ),
+    start_bucket: Optional[str] = typer.Option(
+        None,
+        "--from",
+        help="First month to replay (YYYY-MM)"
+    ),
+    end_bucket: Optional[str] = typer.Option(
+        None,
+        "--to",
+        help="Last month to replay (YYYY-MM)"
+    ),
+    processes: Optional[int] = typer.Option(
+        None,
+        "--processes", "-p",
+        help="Worker processes (default: one per CPU)"
+    )
+):
+    """
+    Rebuild Parquet outputs from the raw response archive, offline.
+
+    Use after changing a transform (hashing, flattening, schema): every
+    archived response is re-processed locally, no PNCP requests are made.
+
+    Examples:
+      baliza replay --output data/rebuilt/
+      baliza replay --types contratos --from 2024-01 --to 2024-12 -p 8
+    """
+    from .extraction.replay import run_replay
+
+    if output.resolve() == archive.resolve():
+        console.print("❌ Replay into a different directory than the archive it reads")
+        raise typer.Exit(1)
+
+    endpoints = [t.strip() for t in types.split(",") if t.strip()] if types else None
+    result = run_replay(str(archive), str(output), endpoints, start_bucket, end_bucket, processes)
+
+    console.print(
+        f"✅ [bold green]{result.records} records[/bold green] from {result.segments} segments "
+        f"into {len(result.touched)} partitions of {output}"
+    )
+    if result.failed:
+        console.print(f"❌ {len(result.failed)} segments failed")
+        raise typer.Exit(1)
+
+
+@app.command()
+def verify(
+    output: Path = typer.Option(
+        "data/",
+        "--output", "-o",
+        help="Output directory holding the Parquet archive"
+    ),
+    types: Optional[str] = typer.Option(
+        None,
+        "--types", "-t",
+        help="Comma-separated endpoints to verify (default: all with recorded totals)"
+    ),
+    workers: Optional[int] = typer.Option(
+        None,
+        "--workers",
+        help="Threads counting partitions and hashing files (default: 4 per CPU, up to 32)"
+    ),
+    no_checksums: bool = typer.Option(
+        False,
+        "--no-checksums",
+        help="Skip hashing Parquet files"
+    ),
+    refetch: bool = typer.Option(
+        False,
+        "--refetch",
+        help="Re-fetch the queued endpoint-months after verifying"
+    )
+):
+    """
+    Check archived rows against the totalRegistros the API reported.
+
+    Endpoint-months with fewer distinct records than reported (or with a
+    file whose checksum changed) are queued for a targeted re-fetch.
+
+    Examples:
+      baliza verify
+      baliza verify --types contratos --refetch
+    """
+    from .extraction.verify import run_refetch_queue, verify_archive
+
+    endpoints = [t.strip() for t in types.split(",") if t.strip()] if types else None
+    result = verify_archive(str(output), endpoints, workers=workers, checksums=not no_checksums)
+
+    problems = [check for check in result.checks if check.status != "ok"]
+    if problems:
+        table = Table(title="Completeness Mismatches")
+        table.add_column("Endpoint", style="cyan", no_wrap=True)
+        table.add_column("Month")
+        table.add_column("Modalidade", justify="center")
+        table.add_column("Reported", justify="right")
+        table.add_column("Archived", justify="right")
+        table.add_column("Status")
+        for check in problems:
+            style = "red" if check.status == "missing" else "yellow"
+            table.add_row(check.endpoint, check.month, check.modalidade or "-", str(check.reported),
+                          str(check.archived), f"[{style}]{check.status}[/{style}]")
+        console.print(table)
+
+    console.print(
+        f"🔎 {len(result.checks)} shards checked: {len(result.checks) - len(problems)} complete, "
+        f"[bold red]{len(result.missing)} short[/bold red], {len(problems) - len(result.missing)} with extra records; "
+        f"{result.files} files" + ("" if no_checksums else f", {len(result.corrupt)} with changed checksums")
+    )
+    for path in result.corrupt:
+        console.print(f"   ❌ {path}")
+    if result.unverified_months:
+        console.print(f"   ℹ️  {result.unverified_months} partitions have no recorded totals (extracted before tracking)")
+
+    if refetch:
+        fetched, remaining = run_refetch_queue(str(output))
+        console.print(f"🔁 Re-fetched {fetched} endpoint-months, {remaining} still queued")
+    elif result.missing or result.corrupt:
+        console.print("💡 Run [bold]baliza verify --refetch[/bold] to re-fetch the queued endpoint-months")
+        raise typer.Exit(1)
+
+
+@app.command()
+def queue(
+    days: Optional[int] = typer.Option(
+        None,
+        "--days", "-d",
+        help="Queue the last N days (default: the whole backfill)"
+    ),
+    date_input: Optional[str] = typer.Option(
+        None,
+        "--date",
+        help="Queue one date or month (YYYY-MM-DD, YYYY-MM)"
+    ),
+    date_range: Optional[str] = typer.Option(
+        None,
+        "--range", "-r",
+        help="Queue a date range (YYYY-MM:YYYY-MM)"
+    ),
+    types: str = typer.Option(
+        "all",
+        "--types", "-t",
+        help="Data types: all,compras,contratos,atas,atualizacoes,propostas,instrumentos,pca"
+    ),
+    output: Path = typer.Option(
+        "data/",
+        "--output", "-o",
+        help="Shared output root holding the queue and the archive"
+    ),
+    status_only: bool = typer.Option(
+        False,
+        "--status",
+        help="Only show the queue"
+    )
+):
+    """
+    Queue the endpoint-months of a backfill for baliza work.
+
+    Every machine mounting the same output root can then run
+    [bold]baliza work[/bold]; queueing the same range twice adds nothing.
+
+    Examples:
+      baliza queue --range 2021-01:2024-12 -o /mnt/pncp
+      baliza queue --status -o /mnt/pncp
+    """
+    from .extraction.work_queue import WorkQueue, enqueue_backfill
+
+    if not status_only:
+        backfill_all = not (days or date_input or date_range)
+        start_date, end_date = parse_date_options(backfill_all, days, date_input, date_range)
+        endpoints = parse_data_types([t.strip() for t in types.split(",") if t.strip()])["endpoints"]
+        added = enqueue_backfill(str(output), start_date, end_date, endpoints)
+        console.print(f"📥 {added} endpoint-months queued")
+
+    counts = WorkQueue(str(output)).counts()
+    table = Table(title="Work Queue")
+    for column in counts:
+        table.add_column(column.capitalize(), justify="right")
+    table.add_row(*(str(count) for count in counts.values()))
+    console.print(table)
+
+
+@app.command()
+def work(
+    output: Path = typer.Option(
+        "data/",
+        "--output", "-o",
+        help="Shared output root holding the queue and the archive"
+    ),
+    processes: int = typer.Option(
+        1,
+        "--processes", "-p",
+        help="Workers on this machine (they share one rate limit)"
+    ),
+    lease_seconds: float = typer.Option(
+        600,
+        "--lease",
+        help="Seconds a claim stays valid without a heartbeat"
+    ),
+    poll_seconds: float = typer.Option(
+        30,
+        "--poll",
+        help="Seconds between claims while only leased tasks remain"
+    )
+):
+    """
+    Work through the queue filled by baliza queue until it is drained.
+
+    Run it on as many machines as wanted: tasks of crashed workers return
+    to the queue once their lease expires.
+
+    Examples:
+      baliza work -o /mnt/pncp
+      baliza work -o /mnt/pncp --processes 4
+    """
+    from .extraction.work_queue import run_worker, run_workers
+
+    if processes > 1:
+        completed, failed = run_workers(str(output), processes, lease_seconds, poll_seconds)
+    else:
+        completed, failed = run_worker(str(output), lease_seconds=lease_seconds, poll_seconds=poll_seconds)
+
+    console.print(f"✅ {completed} endpoint-months done" + (f", [red]{failed} failed[/red]" if failed else ""))
+    if failed:
+        raise typer.Exit(1)
+
+
+@app.command()
+def sync(
+    types: Optional[str] = typer.Option(
+        None,
+        "--types", "-t",
+        help="Comma-separated endpoints to keep fresh (default: contratacoes_publicacao,contratos,atas)"
+    ),
+    tiers: Optional[str] = typer.Option(
+        None,
+        "--tiers",
+        help="Comma-separated tiers to run: today,recent,year,archive (default: all)"
+    ),
+    output: Path = typer.Option(
+        "data/",
+        "--output", "-o",
+        help="Output directory holding the Parquet archive"
+    ),
+    once: bool = typer.Option(
+        False,
+        "--once",
+        help="Run the passes that are due now and exit (for cron)"
+    )
+):
+    """
+    Keep the archive fresh, refreshing recent data most often.
+
+    Runs until stopped. The current day is refreshed every few minutes,
+    the last 30 days hourly, the last year weekly and older months every
+    few months; each tier's cadence adapts to how often its totals change.
+
+    Examples:
+      baliza sync
+      baliza sync --tiers today,recent --types contratos
+      baliza sync --once
+    """
+    from .extraction.sync import TIERS, run_sync
+
+    tier_names = [t.strip() for t in tiers.split(",") if t.strip()] if tiers else None
+    unknown = set(tier_names or []) - {tier.name for tier in TIERS}
+    if unknown:
+        raise typer.BadParameter(f"Unknown tiers: {', '.join(sorted(unknown))}")
+
+    output.mkdir(parents=True, exist_ok=True)
+    endpoints = [t.strip() for t in types.split(",") if t.strip()] if types else None
+    run_sync(str(output), endpoints, tier_names, once=once)
 
 
 def _parse_date_options(
@@ -319,6 +1152,7 @@ def _parse_date_options(
 def _parse_data_types(types: str) -> list[str]:
     """Parse data types string into endpoint list."""
     if types == "all":
+        from .settings import settings
         # Return ALL 12 endpoints - no phase restrictions!
         return settings.all_pncp_endpoints
     
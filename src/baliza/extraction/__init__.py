@@ -8,10 +8,25 @@ Key components:
 - config.py: API configuration and REST client setup
 - pipeline.py: Main extraction pipelines and sources
 - gap_detector.py: Smart incremental loading with gap detection
+- state_manager.py: Persistent extraction state (watermarks, caches)
+- cdc.py: Change-data-capture sync from the *_atualizacao endpoints
+- http_client.py: Shared rate limiter and async client for direct API calls
+- streaming.py: Byte-bounded, disk-spilling queues between fetchers and writers
+- verify.py: totalRegistros completeness checks, file checksums and re-fetch queue
+- leases.py: Cross-process shard leases on the output directory
+- workspace.py: Per-shard dlt working directories published atomically into the archive
+- parallel.py: Multi-process extraction of endpoint-months under one shared rate limit
+- work_queue.py: Coordinator-free work queue splitting a backfill across machines
+- sync.py: Long-running refresh by recency tier with cadences tuned to observed changes
+- drilldown.py: Concurrent contratacao_especifica fetcher
+- pca.py: Annual plan (PCA) extraction sharded by year × classification code
+- snapshot.py: Snapshot-diff mode for contratacoes_proposta
+- replay.py: Offline rebuild of the archive from raw responses
 """
 
 from .pipeline import (
     pncp_source,
+    run_structured_extraction,
     run_priority_extraction,
     run_modalidade_extraction,
     create_default_pipeline
@@ -22,14 +37,22 @@ from .gap_detector import (
     DataGap
 )
 
+from .cdc import run_cdc_sync
+from .state_manager import StateManager
+
 __all__ = [
     # Main pipeline functions
     "pncp_source",
+    "run_structured_extraction",
     "run_priority_extraction", 
     "run_modalidade_extraction",
     "create_default_pipeline",
     
     # Gap detection
     "find_extraction_gaps",
-    "DataGap"
+    "DataGap",
+    
+    # State and change-data-capture
+    "StateManager",
+    "run_cdc_sync"
 ]
\ No newline at end of file
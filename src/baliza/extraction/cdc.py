@@ -0,0 +1,135 @@
+"""
+Change-data-capture sync from the ``*_atualizacao`` endpoints.
+
+Instead of re-extracting old months to pick up amendments, CDC polls each
+update endpoint over a sliding window starting at its persisted watermark,
+routes every changed record to the base table partitions it belongs to
+(by publication date; atas by every month of their vigência), and lets the latest-wins upsert replace the old
+version in place. Only the partitions that received changes are rewritten,
+so a daily refresh costs time proportional to the number of changes, not
+to the size of the archive.
+"""
+
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from baliza.settings import settings
+from baliza.storage.raw_archive import response_hook
+from .pipeline import load_records_by_partition, refresh_derived_tables, window_source
+from .leases import try_lease
+from .pca import classified_plans
+from .state_manager import StateManager
+
+# Update endpoint -> (base table, record field deciding the base partition).
+# /v1/atas windows are by período de vigência: a base load holds an ata in
+# every month its vigência overlaps, so changes go to each of those months
+CDC_ENDPOINTS: Dict[str, Tuple[str, str]] = {
+    "contratacoes_atualizacao": ("contratacoes_publicacao", "dataPublicacaoPncp"),
+    "contratos_atualizacao": ("contratos", "dataPublicacaoPncp"),
+    "atas_atualizacao": ("atas", "vigenciaInicio..vigenciaFim"),
+    "pca_atualizacao": ("pca", "dataPublicacaoPNCP"),
+}
+
+# Update endpoints whose records are reshaped into base table rows: full
+# plans are split per classification like the /v1/pca responses
+RECORD_TRANSFORMS: Dict[str, Callable[[Iterable[Dict[str, Any]]], Iterable[Dict[str, Any]]]] = {
+    "pca_atualizacao": classified_plans,
+}
+
+
+@dataclass
+class CDCResult:
+    """Outcome of one CDC sync of an update endpoint."""
+    endpoint: str
+    window_start: str
+    window_end: str
+    touched: Set[Tuple[str, int, int]] = field(default_factory=set)
+
+    @property
+    def partitions_rewritten(self) -> int:
+        return len(self.touched)
+
+
+def cdc_window(watermark: Optional[str], today: Optional[date] = None) -> Tuple[str, str]:
+    """
+    Sliding window to poll for changes.
+
+    Starts ``cdc_overlap_days`` before the watermark so changes published
+    late for already-synced days are still caught; without a watermark it
+    starts ``cdc_initial_days`` ago.
+
+    Returns:
+        (start_date, end_date) in YYYYMMDD format
+    """
+    today = today or date.today()
+    if watermark:
+        start = datetime.strptime(watermark, "%Y%m%d").date() - timedelta(days=settings.cdc_overlap_days)
+    else:
+        start = today - timedelta(days=settings.cdc_initial_days)
+    return min(start, today).strftime("%Y%m%d"), today.strftime("%Y%m%d")
+
+
+def sync_endpoint(
+    update_endpoint: str,
+    output_dir: str = "data",
+    state: Optional[StateManager] = None,
+    today: Optional[date] = None
+) -> CDCResult:
+    """
+    Apply the changes reported by one update endpoint to its base table.
+
+    The watermark only advances after the changed partitions have been
+    loaded and compacted, so a failed sync is retried from the same point.
+    """
+    base_table, partition_field = CDC_ENDPOINTS[update_endpoint]
+    state = state or StateManager(output_dir)
+
+    window_start, window_end = cdc_window(state.get_watermark(update_endpoint), today)
+    print(f"🔄 CDC {update_endpoint} -> {base_table}: {window_start} to {window_end}")
+
+    hook = response_hook(output_dir, update_endpoint, f"{window_start[:4]}-{window_start[4:6]}",
+                         table=base_table, partition_field=partition_field)
+    changes = window_source(update_endpoint, window_start, window_end, response_hook=hook)
+    if update_endpoint in RECORD_TRANSFORMS:
+        changes = RECORD_TRANSFORMS[update_endpoint](changes)
+    touched = load_records_by_partition(changes, base_table, output_dir, partition_field)
+
+    if touched:
+        refresh_derived_tables(output_dir, sorted(touched))
+
+    state.set_watermark(update_endpoint, window_end)
+    print(f"   ✅ {len(touched)} {base_table} partitions updated")
+
+    return CDCResult(update_endpoint, window_start, window_end, touched)
+
+
+def run_cdc_sync(
+    endpoints: Optional[List[str]] = None,
+    output_dir: str = "data",
+    today: Optional[date] = None
+) -> List[CDCResult]:
+    """
+    Run CDC for the given update endpoints (default: all of them).
+
+    Base endpoints are accepted too and mapped to their update endpoint,
+    e.g. ``contratos`` -> ``contratos_atualizacao``.
+    """
+    base_to_update = {base: update for update, (base, _) in CDC_ENDPOINTS.items()}
+
+    selected = []
+    for endpoint in endpoints or list(CDC_ENDPOINTS):
+        update_endpoint = base_to_update.get(endpoint, endpoint)
+        if update_endpoint in CDC_ENDPOINTS and update_endpoint not in selected:
+            selected.append(update_endpoint)
+
+    state = StateManager(output_dir)
+    results = []
+    for endpoint in selected:
+        # An overlapping run syncing the same watermark would only repeat its work
+        with try_lease(output_dir, f"cdc|{endpoint}") as lease:
+            if lease is None:
+                print(f"⏭️  CDC {endpoint}: being synced by another run")
+                continue
+            results.append(sync_endpoint(endpoint, output_dir, state, today))
+    return results
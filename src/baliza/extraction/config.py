@@ -4,9 +4,11 @@ Converts legacy ENDPOINT_CONFIG to dlt REST API format
 """
 
 from datetime import date, timedelta
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Callable
+from baliza import profiling
 from baliza.settings import ENDPOINT_CONFIG, settings
 from baliza.schemas import ModalidadeContratacao
+from baliza.storage.layout import NATURAL_KEY_COLUMN, VERSION_COLUMN
 from baliza.utils import hash_sha256
 
 
@@ -35,22 +37,18 @@ def create_pncp_rest_config(
         end_date = end_dt.strftime("%Y%m%d")
     
     # Client configuration
-    # Dynamic User-Agent with version info
-    try:
-        from importlib.metadata import version
-        baliza_version = version("baliza")
-    except ImportError:
-        baliza_version = "2.0.0-dev"
-    
     client_config = {
         "base_url": settings.pncp_api_base_url,
-        "headers": {
-            "User-Agent": f"Baliza/{baliza_version} DLT Pipeline",
-            "Accept": "application/json"
-        }
+        "headers": default_headers(),
         # Note: timeout would need to be configured through session if needed
         # Note: DLT doesn't provide request-level caching, so we implement deduplication at data level
     }
+
+    # Runs split over processes share one rate limit, dlt's requests included
+    from .http_client import rest_session
+    session = rest_session()
+    if session is not None:
+        client_config["session"] = session
     
     # Build resources from ENDPOINT_CONFIG
     resources = []
@@ -75,16 +73,11 @@ def create_pncp_rest_config(
             },
             "primary_key": "_dlt_id",  # Will be added by processing step
             "write_disposition": "merge",  # Deduplication based on hash
-            "processing_steps": [
-                {
-                    "map": _add_hash_id  # Map function for deduplication
-                },
-                {
-                    "map": _add_metadata  # Map function for metadata
-                }
-            ]
+            "processing_steps": [{"map": step} for step in record_processing_steps(endpoint_config)]
             # Note: Incremental loading handled by gap detection instead of DLT incremental
         }
+        # No primary key on _baliza_key: dlt would make it non-nullable, and the
+        # filesystem destination only appends anyway (latest-wins is storage/upsert.py)
         
         resources.append(resource)
     
@@ -94,13 +87,42 @@ def create_pncp_rest_config(
     }
 
 
+def default_headers() -> Dict[str, str]:
+    """HTTP headers sent with every PNCP request (dynamic User-Agent with version info)."""
+    try:
+        from importlib.metadata import version
+        baliza_version = version("baliza")
+    except ImportError:
+        baliza_version = "2.0.0-dev"
+
+    return {
+        "User-Agent": f"Baliza/{baliza_version} DLT Pipeline",
+        "Accept": "application/json"
+    }
+
+
+def record_processing_steps(endpoint_config) -> List[Callable[[Dict[str, Any]], Dict[str, Any]]]:
+    """
+    Map functions applied to every record of an endpoint, in order.
+
+    Shared by the REST API resources and the stages that fetch records
+    themselves (drill-downs), so every table gets the same hash, metadata
+    and natural key columns. Steps are timed as profiling stages when a
+    profiler is active while they are built.
+    """
+    steps = [profiling.wrap(_add_hash_id, "hash"), profiling.wrap(_add_metadata, "process")]
+    if endpoint_config.natural_key:
+        steps.append(profiling.wrap(natural_key_step(endpoint_config), "process"))
+    return steps
+
+
 def _build_endpoint_params(endpoint_config, start_date: str, end_date: str, modalidades: List[int], page_size: int = None) -> Dict[str, Any]:
     """Build parameters for an endpoint based on its configuration."""
     
     # Use provided page_size or fallback to endpoint default
     effective_page_size = page_size if page_size is not None else endpoint_config.default_page_size
     
-    params = {
+    params: Dict[str, Any] = {
         "tamanhoPagina": effective_page_size,
         "pagina": 1,  # Will be handled by paginator
     }
@@ -110,6 +132,10 @@ def _build_endpoint_params(endpoint_config, start_date: str, end_date: str, moda
         params["dataInicial"] = start_date
     if "dataFinal" in endpoint_config.required_params:
         params["dataFinal"] = end_date
+    if "dataInicio" in endpoint_config.required_params:
+        params["dataInicio"] = start_date
+    if "dataFim" in endpoint_config.required_params:
+        params["dataFim"] = end_date
         
     # Add modalidade if required and provided
     if endpoint_config.requires_modalidade and modalidades:
@@ -148,6 +174,30 @@ def _add_hash_id(record: Dict[str, Any]) -> Dict[str, Any]:
     return record_copy
 
 
+def natural_key_step(endpoint_config) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Build the processing step adding the natural key and version columns.
+
+    ``_baliza_key`` joins the endpoint's natural key fields (e.g.
+    ``numeroControlePNCP``) so every version of a record shares it;
+    ``_baliza_version`` copies the field ordering those versions
+    (``dataAtualizacao`` by default).
+    """
+    key_fields = list(endpoint_config.natural_key)
+    version_field = endpoint_config.version_field
+
+    def _add_natural_key(record: Dict[str, Any]) -> Dict[str, Any]:
+        record_copy = record.copy()
+        values = [record.get(field) for field in key_fields]
+        record_copy[NATURAL_KEY_COLUMN] = (
+            "|".join(str(value) for value in values) if all(v is not None for v in values) else None
+        )
+        record_copy[VERSION_COLUMN] = record.get(version_field) if version_field else None
+        return record_copy
+
+    return _add_natural_key
+
+
 # Note: Additional processing functions could be added here if needed for future DLT enhancements
 
 def _add_metadata(record: Dict[str, Any]) -> Dict[str, Any]:
@@ -0,0 +1,197 @@
+"""
+Drill-down fetcher for ``contratacao_especifica``.
+
+The detail endpoint (``/v1/orgaos/{cnpj}/compras/{ano}/{sequencial}``)
+returns one record per call and has no date parameters, so it cannot be
+driven by the REST source. Instead its keys are read from the
+``contratacoes_publicacao`` partitions already in the archive, minus the
+records already fetched, and requested concurrently over pooled
+connections, each request waiting for a token from the shared rate
+limiter. Fetched records stream into their own table in chunks, so an
+interrupted run resumes where it stopped.
+"""
+
+import asyncio
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from baliza.settings import ENDPOINT_CONFIG, settings
+from baliza.storage.layout import month_of
+from baliza.storage.query import ArchiveQuery
+from baliza.storage.raw_archive import response_hook
+from .config import record_processing_steps
+from .http_client import async_client, get_json, shared_rate_limiter
+from .pipeline import load_records_by_partition, refresh_derived_tables
+
+SOURCE_TABLE = "contratacoes_publicacao"
+DRILLDOWN_TABLE = "contratacao_especifica"
+PARTITION_FIELD = "dataPublicacaoPncp"
+KEY_COLUMNS = ["numero_controle_pncp", "orgao_entidade__cnpj", "ano_compra", "sequencial_compra"]
+DEFAULT_CHUNK_SIZE = 2_000
+
+
+@dataclass
+class DrilldownResult:
+    """Outcome of one drill-down run."""
+    requested: int = 0
+    fetched: int = 0
+    missing: int = 0  # 204/404: listed in the publication feed but no detail
+    failed: int = 0   # Retries exhausted; picked up again by the next run
+    touched: Set[Tuple[str, int, int]] = field(default_factory=set)
+
+
+def pending_keys_sql(tables: List[str], start_month: Optional[str] = None, end_month: Optional[str] = None) -> str:
+    """
+    Keys of published procurements whose detail is not in the archive yet.
+
+    Args:
+        tables: Views registered in the archive
+        start_month: First "YYYY-MM" publication month (inclusive)
+        end_month: Last "YYYY-MM" publication month (inclusive)
+    """
+    conditions = [f"{column} IS NOT NULL" for column in KEY_COLUMNS]
+    if start_month:
+        conditions.append(f"(year * 100 + month) >= {int(start_month.replace('-', ''))}")
+    if end_month:
+        conditions.append(f"(year * 100 + month) <= {int(end_month.replace('-', ''))}")
+    if DRILLDOWN_TABLE in tables:
+        # NOT EXISTS rather than NOT IN: a single NULL key would make NOT IN match nothing
+        conditions.append(f"NOT EXISTS (SELECT 1 FROM {DRILLDOWN_TABLE} AS detail "
+                          f"WHERE detail.numero_controle_pncp = published.numero_controle_pncp)")
+
+    return (
+        f"SELECT DISTINCT ON (numero_controle_pncp) {', '.join(KEY_COLUMNS)}, data_publicacao_pncp "
+        f"FROM {SOURCE_TABLE} AS published WHERE {' AND '.join(conditions)} "
+        f"ORDER BY numero_controle_pncp"
+    )
+
+
+def iter_pending_keys(
+    output_dir: str,
+    start_month: Optional[str] = None,
+    end_month: Optional[str] = None,
+    limit: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Yield chunks of pending keys.
+
+    The key set is materialized in DuckDB before the first chunk, so
+    records written while fetching do not change what is being iterated.
+    """
+    with ArchiveQuery(output_dir, database=":memory:") as archive:
+        if SOURCE_TABLE not in archive.tables:
+            return
+
+        query = pending_keys_sql(archive.tables, start_month, end_month)
+        if limit:
+            query += f" LIMIT {int(limit)}"
+        archive.con.execute(f"CREATE TEMP TABLE pending_keys AS {query}")
+
+        for batch in archive.fetch_batches("SELECT * FROM pending_keys", batch_size=chunk_size):
+            yield batch.to_pylist()
+
+
+def detail_path(key: Dict[str, Any]) -> str:
+    return ENDPOINT_CONFIG[DRILLDOWN_TABLE].path.format(
+        cnpj=key["orgao_entidade__cnpj"], ano=key["ano_compra"], sequencial=key["sequencial_compra"]
+    )
+
+
+async def _fetch_chunk(
+    client,
+    keys: List[Dict[str, Any]],
+    semaphore: asyncio.Semaphore,
+    result: DrilldownResult,
+    output_dir: str
+):
+    """Fetch the details of one chunk of keys concurrently."""
+    steps = record_processing_steps(ENDPOINT_CONFIG[DRILLDOWN_TABLE])
+
+    async def fetch(key: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        partition = month_of(key.get("data_publicacao_pncp"))
+        month_key = f"{partition[0]:04d}-{partition[1]:02d}" if partition else "unknown"
+        hook = response_hook(output_dir, DRILLDOWN_TABLE, month_key, table=DRILLDOWN_TABLE,
+                             partition=month_key if partition else None, partition_field=PARTITION_FIELD)
+
+        async with semaphore:
+            try:
+                record = await get_json(client, detail_path(key), limiter=shared_rate_limiter(), on_response=hook,
+                                         endpoint=DRILLDOWN_TABLE)
+            except Exception as e:
+                result.failed += 1
+                print(f"⚠️  {key['numero_controle_pncp']}: {e}")
+                return None
+
+        if not isinstance(record, dict):
+            result.missing += 1
+            return None
+
+        # Route by the publication month of the listing if the detail omits it
+        record.setdefault(PARTITION_FIELD, key.get("data_publicacao_pncp"))
+        for step in steps:
+            record = step(record)
+        return record
+
+    records = await asyncio.gather(*(fetch(key) for key in keys))
+    return [record for record in records if record is not None]
+
+
+async def _run(chunks: Iterator[List[Dict[str, Any]]], output_dir: str, concurrency: int) -> DrilldownResult:
+    result = DrilldownResult()
+    semaphore = asyncio.Semaphore(concurrency)
+    loading: Optional[asyncio.Future] = None
+
+    async with async_client(concurrency) as client:
+        for keys in chunks:
+            result.requested += len(keys)
+            records = await _fetch_chunk(client, keys, semaphore, result, output_dir)
+            result.fetched += len(records)
+
+            # Write the previous chunk while this one's requests were in flight
+            if loading is not None:
+                result.touched |= await loading
+            loading = asyncio.ensure_future(asyncio.to_thread(
+                load_records_by_partition, records, DRILLDOWN_TABLE, output_dir, PARTITION_FIELD
+            ))
+            print(f"   📥 {result.fetched}/{result.requested} details fetched")
+
+        if loading is not None:
+            result.touched |= await loading
+
+    return result
+
+
+def run_drilldown(
+    output_dir: str = "data",
+    start_month: Optional[str] = None,
+    end_month: Optional[str] = None,
+    limit: Optional[int] = None,
+    concurrency: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> DrilldownResult:
+    """
+    Fetch ``contratacao_especifica`` for every archived procurement not fetched yet.
+
+    Args:
+        output_dir: Base output directory
+        start_month: First "YYYY-MM" publication month to drill into
+        end_month: Last "YYYY-MM" publication month to drill into
+        limit: Maximum number of records to request
+        concurrency: Requests in flight (default: settings.drilldown_concurrency)
+        chunk_size: Records per written chunk
+
+    Returns:
+        Request counts and the partitions written
+    """
+    concurrency = concurrency or settings.drilldown_concurrency
+    print(f"🔎 Drilling into {SOURCE_TABLE} -> {DRILLDOWN_TABLE} ({concurrency} concurrent requests)")
+
+    chunks = iter_pending_keys(output_dir, start_month, end_month, limit, chunk_size)
+    result = asyncio.run(_run(chunks, output_dir, concurrency))
+
+    if result.touched:
+        refresh_derived_tables(output_dir, sorted(result.touched))
+
+    print(f"✅ {result.fetched} fetched, {result.missing} without detail, {result.failed} failed")
+    return result
@@ -0,0 +1,258 @@
+"""
+HTTP access to the PNCP API outside the dlt REST source.
+
+Stages that issue their own requests (drill-downs of single records) share
+one token-bucket rate limiter per process, sized from ``requests_per_minute``
+and ``requests_per_hour``, so any number of concurrent requests still stays
+under the API quota. Requests are retried with exponential backoff on
+transport errors, 429 and 5xx responses.
+
+A run split over worker processes (see parallel.py) installs a
+``SharedRateLimiter`` in every worker instead: one bucket in shared memory,
+so the quota holds for the whole run. Once a limiter is installed, the dlt
+REST source takes its tokens from it too, through one pooled session kept
+for the life of the process (``rest_session``).
+
+Identical requests in flight at the same time (same event loop, base URL,
+path and parameters) are coalesced: the first caller issues the HTTP call
+and later ones await its result, each getting its own copy of the JSON.
+"""
+
+import asyncio
+import copy
+import multiprocessing
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import httpx
+from tenacity import AsyncRetrying, retry_if_exception, stop_after_attempt, wait_exponential
+
+from baliza import metrics, profiling
+from baliza.settings import settings
+from .config import default_headers
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+EMPTY_STATUS = {204, 404}
+
+
+class RateLimiter:
+    """
+    Token bucket shared by threads and coroutines of one process.
+
+    ``acquire`` blocks the calling thread; ``acquire_async`` only suspends
+    the calling coroutine, so one event loop can keep many requests in
+    flight while each still waits for its token.
+    """
+
+    def __init__(self, rate_per_second: float, burst: Optional[float] = None):
+        self.rate = rate_per_second
+        self.capacity = burst if burst is not None else max(1.0, rate_per_second)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Take a token; returns how long the caller must wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def acquire(self):
+        delay = self._reserve()
+        if delay:
+            metrics.RATE_LIMIT_WAIT.inc(delay)
+            time.sleep(delay)
+
+    async def acquire_async(self):
+        delay = self._reserve()
+        if delay:
+            metrics.RATE_LIMIT_WAIT.inc(delay)
+            await asyncio.sleep(delay)
+
+
+class SharedRateLimiter(RateLimiter):
+    """
+    Token bucket shared by every process of a run.
+
+    The bucket (tokens, last refill) lives in shared memory guarded by a
+    process lock; it is handed to worker processes when they are created
+    (``ProcessPoolExecutor`` initargs), not through task arguments.
+    """
+
+    def __init__(self, rate_per_second: float, burst: Optional[float] = None, context=None):
+        context = context or multiprocessing.get_context()
+        self.rate = rate_per_second
+        self.capacity = burst if burst is not None else max(1.0, rate_per_second)
+        self._bucket = context.RawArray("d", [self.capacity, time.monotonic()])
+        self._lock = context.Lock()
+
+    def _reserve(self) -> float:
+        with self._lock:
+            # CLOCK_MONOTONIC is system-wide, so timestamps compare across processes
+            now = time.monotonic()
+            tokens = min(self.capacity, self._bucket[0] + (now - self._bucket[1]) * self.rate) - 1
+            self._bucket[0], self._bucket[1] = tokens, now
+            return 0.0 if tokens >= 0 else -tokens / self.rate
+
+
+_shared_limiter: Optional[RateLimiter] = None
+_shared_lock = threading.Lock()
+_installed = False    # Set by install_rate_limiter: the dlt REST source is throttled too
+_rest_session = None  # Pooled session handed to every dlt REST source of the process
+
+
+def quota_rate() -> float:
+    """Requests per second allowed by both the per-minute and per-hour quotas."""
+    return min(settings.requests_per_minute / 60, settings.requests_per_hour / 3600)
+
+
+def shared_rate_limiter() -> RateLimiter:
+    """The process-wide limiter honouring both the per-minute and per-hour quotas."""
+    global _shared_limiter
+    with _shared_lock:
+        if _shared_limiter is None:
+            _shared_limiter = RateLimiter(quota_rate())
+        return _shared_limiter
+
+
+def install_rate_limiter(limiter: RateLimiter):
+    """Make ``limiter`` the process-wide one, for direct calls and the dlt REST source alike."""
+    global _shared_limiter, _installed, _rest_session
+    with _shared_lock:
+        _shared_limiter = limiter
+        _installed = True
+        _rest_session = None
+
+
+def rest_session():
+    """
+    requests session for the dlt REST source, or None for dlt's default.
+
+    Only processes that installed a limiter (worker processes, the sync
+    daemon) get one: it takes a token before every attempt, retries
+    included, and is reused by every load so connections stay alive.
+    """
+    global _rest_session
+    with _shared_lock:
+        if not _installed:
+            return None
+        if _rest_session is not None:
+            return _rest_session
+        limiter = _shared_limiter
+
+    from dlt.sources.helpers.requests import Client
+
+    # dlt's retrying session (the REST client's default), throttled at send()
+    session = Client(raise_for_status=False).session
+    send = session.send
+
+    def throttled_send(request, **kwargs):
+        limiter.acquire()
+        return send(request, **kwargs)
+
+    session.send = throttled_send
+    with _shared_lock:
+        _rest_session = session
+    return session
+
+
+def async_client(max_connections: Optional[int] = None) -> httpx.AsyncClient:
+    """Pooled async client for the PNCP API (keep-alive connections reused across requests)."""
+    connections = max_connections or settings.drilldown_concurrency
+    return httpx.AsyncClient(
+        base_url=settings.pncp_api_base_url,
+        headers=default_headers(),
+        timeout=settings.request_timeout,
+        limits=httpx.Limits(max_connections=connections, max_keepalive_connections=connections),
+    )
+
+
+def _is_retryable(error: BaseException) -> bool:
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code in RETRY_STATUS
+    return isinstance(error, httpx.TransportError)
+
+
+_inflight: Dict[Tuple, list] = {}  # Request key -> [task, callers joined after the first]
+
+
+async def get_json(
+    client: httpx.AsyncClient,
+    path: str,
+    params: Optional[Dict[str, Any]] = None,
+    limiter: Optional[RateLimiter] = None,
+    on_response: Optional[Callable[[httpx.Response], Any]] = None,
+    endpoint: str = ""
+) -> Optional[Any]:
+    """
+    GET a JSON document, waiting for a rate limit token before every attempt.
+
+    Args:
+        client: Client from ``async_client``
+        path: Path relative to the API base URL
+        params: Query parameters
+        limiter: Rate limiter (default: the shared one)
+        on_response: Called with the successful response (raw archive capture)
+        endpoint: Endpoint name labelling the request metrics
+
+    Returns:
+        Decoded JSON, or None when the API has no content for the path (204/404)
+
+    Raises:
+        httpx.HTTPError: When retries are exhausted or the status is not retryable
+    """
+    key = (id(asyncio.get_running_loop()), str(client.base_url), path,
+           tuple(sorted((k, str(v)) for k, v in (params or {}).items())))
+    entry = _inflight.get(key)
+    if entry is None:
+        task = asyncio.ensure_future(_get_json(client, path, params, limiter, on_response, endpoint))
+        entry = _inflight[key] = [task, 0]
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+    else:
+        entry[1] += 1
+        metrics.COALESCED.inc(endpoint=endpoint)
+
+    # Shielded: a cancelled caller must not cancel the request others await
+    result = await asyncio.shield(entry[0])
+    # Callers sharing a response each get their own copy, since records are processed in place
+    return copy.deepcopy(result) if entry[1] else result
+
+
+async def _get_json(
+    client: httpx.AsyncClient,
+    path: str,
+    params: Optional[Dict[str, Any]],
+    limiter: Optional[RateLimiter],
+    on_response: Optional[Callable[[httpx.Response], Any]],
+    endpoint: str
+) -> Optional[Any]:
+    limiter = limiter or shared_rate_limiter()
+
+    async for attempt in AsyncRetrying(
+        stop=stop_after_attempt(settings.max_retry_attempts),
+        wait=wait_exponential(exp_base=settings.retry_backoff_factor, max=settings.retry_backoff_max),
+        retry=retry_if_exception(_is_retryable),
+        reraise=True,
+    ):
+        with attempt:
+            if attempt.retry_state.attempt_number > 1:
+                metrics.RETRIES.inc(endpoint=endpoint)
+            await limiter.acquire_async()
+            started = time.perf_counter()
+            response = await client.get(path, params=params)
+            # Timed here: httpx raises on .elapsed until the response is closed
+            seconds = time.perf_counter() - started
+            metrics.observe_response(endpoint, response, seconds=seconds)
+            if response.status_code in EMPTY_STATUS:
+                return None
+            response.raise_for_status()
+            profiling.record("fetch", seconds, len(response.content))
+            if on_response is not None:
+                on_response(response)
+            with profiling.stage("decode"):
+                return response.json()
+    return None  # Unreachable: the last failed attempt re-raises
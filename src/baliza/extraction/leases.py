@@ -0,0 +1,102 @@
+"""
+Cross-process shard leases on an output directory.
+
+Overlapping runs (cron plus a manual backfill) would otherwise fetch the
+same pages and race on the same completion markers. Each shard
+(``contratos|2024-01``, ``cdc|contratos_atualizacao``...) is leased
+through an OS file lock on ``{output_dir}/.baliza/leases/{digest}.lock``
+before it is extracted:
+
+- locks are advisory ``flock``/``LockFileEx`` locks, so a crashed process
+  releases its leases with its file descriptors: nothing goes stale;
+- ``try_lease`` never blocks, so a run skips shards another run holds,
+  works on the rest, and only then waits for the deferred ones (which are
+  usually done by then, see ``run_structured_extraction``).
+
+Usage:
+    with try_lease(output_dir, "contratos|2024-01") as lease:
+        if lease:
+            extract()
+"""
+
+import hashlib
+import os
+from pathlib import Path
+from typing import Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None  # type: ignore[assignment]
+    import msvcrt
+
+
+def leases_dir(output_dir: str) -> Path:
+    return Path(output_dir) / ".baliza" / "leases"
+
+
+class ShardLease:
+    """Exclusive, crash-safe lock on one shard of an output directory."""
+
+    def __init__(self, output_dir: str, key: str):
+        self.key = key
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+        self.path = leases_dir(output_dir) / f"{digest}.lock"
+        self._fd: Optional[int] = None
+
+    @property
+    def held(self) -> bool:
+        return self._fd is not None
+
+    def acquire(self, blocking: bool = False) -> bool:
+        """Take the lease; without ``blocking``, return False at once if another process holds it."""
+        if self._fd is not None:
+            return True
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+            else:
+                msvcrt.locking(fd, msvcrt.LK_LOCK if blocking else msvcrt.LK_NBLCK, 1)
+        except OSError:
+            os.close(fd)
+            return False
+
+        # Owner and shard for humans inspecting .baliza/leases
+        os.ftruncate(fd, 0)
+        os.write(fd, f"{os.getpid()} {self.key}\n".encode("utf-8"))
+        self._fd = fd
+        return True
+
+    def release(self):
+        if self._fd is None:
+            return
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+            else:
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self) -> Optional["ShardLease"]:
+        return self if self.held else None
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+def try_lease(output_dir: str, key: str, blocking: bool = False) -> ShardLease:
+    """
+    Lease ``key`` if no other process holds it.
+
+    Returns:
+        The lease; used as a context manager it yields itself when
+        acquired and None when another process holds the shard
+    """
+    lease = ShardLease(output_dir, key)
+    lease.acquire(blocking)
+    return lease
@@ -0,0 +1,164 @@
+"""
+Multi-process extraction: endpoint-months spread over worker processes.
+
+A single process spends most of a backfill waiting on responses and
+normalizing pages. ``run_parallel_extraction`` plans the same month
+windows as ``run_structured_extraction`` and hands them to a pool of
+worker processes, each running the sequential extraction on its window:
+
+- one ``SharedRateLimiter`` is created here and installed in every worker,
+  so all processes together stay within ``requests_per_minute`` and
+  ``requests_per_hour``; the dlt REST source draws from it too;
+- windows are leased (leases.py) and loaded through per-shard dlt
+  workspaces (workspace.py), so workers never share a pipeline directory;
+- derived tables are refreshed once here for every partition the workers
+  wrote, instead of by concurrent writers.
+
+The parent reports one progress step per finished window. Workers return
+the counters and histograms of each window with its result and the parent
+adds them to its own metrics; process CPU/RSS stay per process.
+"""
+
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from baliza import metrics
+from baliza.settings import ENDPOINT_CONFIG, settings
+from baliza.utils.completion_tracking import is_extraction_completed
+from .http_client import SharedRateLimiter, install_rate_limiter, quota_rate
+from .pipeline import plan_month_windows, refresh_derived_tables, run_structured_extraction
+
+# Refreshed by the parent once all windows are in
+DERIVED_SETTINGS = ("enable_upsert", "enable_rollups", "enable_lookup_index", "enable_search_index")
+
+
+@dataclass
+class ParallelResult:
+    """Outcome of a multi-process extraction."""
+    windows: int = 0
+    loads: int = 0
+    failed: List[str] = field(default_factory=list)
+    touched: Set[Tuple[str, int, int]] = field(default_factory=set)
+
+
+def _init_worker(limiter: SharedRateLimiter, overrides: Dict[str, Any], quiet: bool):
+    """Worker setup: the parent's settings, the run's rate limiter and (optionally) no output."""
+    for name, value in overrides.items():
+        setattr(settings, name, value)
+    for name in DERIVED_SETTINGS:
+        setattr(settings, name, False)
+    install_rate_limiter(limiter)
+    if quiet:
+        sys.stdout = open(os.devnull, "w")
+
+
+def _run_window(
+    endpoint: str,
+    window_start: str,
+    window_end: str,
+    output_dir: str,
+    modalidades: Optional[List[int]],
+    skip_completed: bool
+) -> Tuple[int, Dict[str, Any]]:
+    """Run the sequential extraction on one window; returns the number of loads and the metrics counted."""
+    results = run_structured_extraction(window_start, window_end, [endpoint], output_dir, skip_completed, modalidades)
+    return len(results or []), metrics.take_counts()
+
+
+def run_parallel_extraction(
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    endpoints: Optional[List[str]] = None,
+    output_dir: str = "data",
+    processes: Optional[int] = None,
+    skip_completed: bool = True,
+    modalidades: Optional[List[int]] = None,
+    quiet: bool = True,
+    on_plan: Optional[Callable[[int], Any]] = None,
+    on_window: Optional[Callable[[str, str, bool], Any]] = None
+) -> ParallelResult:
+    """
+    Extract endpoint-months with several worker processes under one rate limit.
+
+    Args:
+        start_date: Start date in YYYYMMDD format (None for full backfill)
+        end_date: End date in YYYYMMDD format (None for full backfill)
+        endpoints: Endpoints to extract
+        output_dir: Base output directory
+        processes: Worker processes (default: settings.extract_processes, or one per CPU)
+        skip_completed: Skip months that already have a completion marker
+        modalidades: Modalidade IDs for endpoints that require one (default: all)
+        quiet: Silence the workers' per-window output (progress comes from callbacks)
+        on_plan: Called with the number of windows to extract
+        on_window: Called with (endpoint, YYYY-MM, succeeded) as each window finishes
+
+    Returns:
+        Window and load counts, failed windows and the partitions written
+    """
+    result = ParallelResult()
+    if not endpoints:
+        print("⚠️  No endpoints selected - nothing to extract")
+        return result
+
+    # Snapshot endpoints are one request set each, not worth a worker
+    snapshot_endpoints = [e for e in endpoints if ENDPOINT_CONFIG[e].sync_type == "snapshot"]
+    if snapshot_endpoints:
+        run_structured_extraction(start_date, end_date, snapshot_endpoints, output_dir, skip_completed, modalidades)
+        endpoints = [e for e in endpoints if e not in snapshot_endpoints]
+
+    windows = plan_month_windows(start_date, end_date, endpoints) if endpoints else []
+    if skip_completed:
+        windows = [
+            (endpoint, window_start, window_end) for endpoint, window_start, window_end in windows
+            if not is_extraction_completed(output_dir, endpoint, f"{window_start[:4]}-{window_start[4:6]}")
+        ]
+    result.windows = len(windows)
+    if on_plan is not None:
+        on_plan(len(windows))
+    if not windows:
+        print("✅ No missing data found - skipping extraction")
+        return result
+
+    workers = min(len(windows), processes or settings.extract_processes or os.cpu_count() or 1)
+    print(f"📋 {len(windows)} endpoint-months to extract with {workers} processes")
+
+    # spawn: workers must not inherit dlt/duckdb state from this process
+    context = multiprocessing.get_context("spawn")
+    limiter = SharedRateLimiter(quota_rate(), context=context)
+    overrides = settings.model_dump()
+    with ProcessPoolExecutor(
+        max_workers=workers, mp_context=context,
+        initializer=_init_worker, initargs=(limiter, overrides, quiet)
+    ) as pool:
+        futures = {
+            pool.submit(_run_window, endpoint, window_start, window_end, output_dir, modalidades, skip_completed):
+                (endpoint, window_start)
+            for endpoint, window_start, window_end in windows
+        }
+        for future in as_completed(futures):
+            endpoint, window_start = futures[future]
+            month_key = f"{window_start[:4]}-{window_start[4:6]}"
+            try:
+                loads, counts = future.result()
+            except Exception as e:
+                succeeded = False
+                result.failed.append(f"{endpoint} {month_key}")
+                print(f"⚠️  {endpoint} {month_key}: {e}")
+            else:
+                succeeded = True
+                metrics.merge_counts(counts)
+                result.loads += loads
+                if loads:
+                    result.touched.add((endpoint, int(window_start[:4]), int(window_start[4:6])))
+            if on_window is not None:
+                on_window(endpoint, month_key, succeeded)
+
+    if result.touched:
+        refresh_derived_tables(output_dir, sorted(result.touched))
+
+    print(f"✅ {len(windows) - len(result.failed)}/{len(windows)} endpoint-months extracted")
+    return result
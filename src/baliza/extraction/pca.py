@@ -0,0 +1,380 @@
+"""
+PCA (Plano de Contratações Anual) extraction engine.
+
+The ``pca`` and ``pca_usuario`` endpoints are not date-windowed: ``pca``
+needs ``anoPca`` and ``codigoClassificacaoSuperior``, ``pca_usuario``
+needs ``anoPca`` and ``idUsuario``. This planner enumerates years ×
+classification codes (or user ids) into shards and pages through them
+concurrently under the shared rate limit.
+
+The API has no listing of classification codes: they are discovered from
+the items of plans updated recently (``/v1/pca/atualizacao``), remembered
+in the pipeline state, and combined with configured and archived codes.
+
+``/v1/pca`` returns a plan with only the items of the requested
+classification, so the same ``idPcaPncp`` comes back from several shards.
+Plans are therefore split into one row per (``idPcaPncp``,
+``codigoClassificacaoSuperior``) — the ``pca`` natural key — and CDC
+splits the full plans of ``/v1/pca/atualizacao`` the same way
+(``split_by_classification``), so both sources replace the same rows.
+
+Pages stream through a byte-bounded ``SpillingQueue`` (see streaming.py)
+into ``load_records_by_partition``
+(by ``dataPublicacaoPNCP``); dlt normalizes the nested ``itens`` list
+(``PlanoContratacaoItemDTO``) into the ``pca__itens`` child table, linked
+to its plan by ``_dlt_parent_id``.
+
+A PCA year no longer changes once it is over, so shards of closed years
+are recorded in the pipeline state after a successful load and never
+requested again.
+"""
+
+import asyncio
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from baliza.settings import ENDPOINT_CONFIG, settings
+from baliza.storage.query import ArchiveQuery
+from baliza.storage.raw_archive import response_hook
+from .config import record_processing_steps
+from .http_client import async_client, get_json
+from .pipeline import load_records_by_partition, refresh_derived_tables
+from .state_manager import StateManager
+from .streaming import QueueClosed, SpillingQueue, estimate_bytes, spill_dir, stream_async
+
+# Endpoint -> parameter fanned out besides anoPca
+PCA_ENDPOINTS = {"pca": "codigoClassificacaoSuperior", "pca_usuario": "idUsuario"}
+PARTITION_FIELD = "dataPublicacaoPNCP"
+MISSING_VALUES_HINT = {
+    "pca": "none configured or discovered yet (see pca_discovery_days)",
+    "pca_usuario": "configure pca_user_ids (plans do not carry idUsuario, so they cannot be discovered)",
+}
+STATE_SECTION = "pca_closed_shards"
+CODES_SECTION = "pca_classification_codes"  # Discovered code -> date first seen
+CLASSIFICATION_FIELD = "codigoClassificacaoSuperior"
+ITEM_CLASSIFICATION_FIELD = "classificacaoSuperiorCodigo"
+DISCOVERY_ENDPOINT = "pca_atualizacao"
+CLASSIFIED_ENDPOINTS = {"pca", "pca_atualizacao"}  # Loaded as pca rows split per classification
+ITEMS_TABLE = "pca__itens"
+LOAD_BATCH_SIZE = 1_000  # Plans carry their items, so flush more often than flat tables
+
+
+@dataclass(frozen=True)
+class PCAShard:
+    """One (endpoint, year, code) combination paged independently."""
+    endpoint: str
+    year: int
+    param: str
+    value: str
+
+    @property
+    def key(self) -> str:
+        return f"{self.endpoint}|{self.year}|{self.value}"
+
+    def params(self, page: int) -> Dict[str, Any]:
+        return {
+            "anoPca": self.year,
+            self.param: self.value,
+            "pagina": page,
+            "tamanhoPagina": ENDPOINT_CONFIG[self.endpoint].page_size_limits.max,
+        }
+
+
+@dataclass
+class PCAResult:
+    """Outcome of one PCA extraction run."""
+    shards: int = 0
+    cached: int = 0    # Closed-year shards skipped
+    failed: int = 0
+    records: int = 0
+    touched: Set[Tuple[str, int, int]] = field(default_factory=set)
+
+
+def pca_years(today: Optional[date] = None) -> List[int]:
+    """Years with plans: from ``pca_first_year`` to next year (plans are published a year ahead)."""
+    today = today or date.today()
+    return list(range(settings.pca_first_year, today.year + 2))
+
+
+def is_closed_year(year: int, today: Optional[date] = None) -> bool:
+    return year < (today or date.today()).year
+
+
+def classification_codes(output_dir: str) -> List[str]:
+    """
+    ``codigoClassificacaoSuperior`` values to fan out over.
+
+    The API has no listing of codes, so the configured ones are combined
+    with the discovered ones (see ``discover_classification_codes``) and
+    every code already seen in archived plan items.
+    """
+    codes = {str(code) for code in settings.pca_classification_codes}
+    codes.update(StateManager(output_dir).get_section(CODES_SECTION))
+    try:
+        with ArchiveQuery(output_dir, database=":memory:") as archive:
+            if ITEMS_TABLE in archive.tables:
+                rows = archive.sql(
+                    f"SELECT DISTINCT classificacao_superior_codigo FROM {ITEMS_TABLE} "
+                    f"WHERE classificacao_superior_codigo IS NOT NULL"
+                ).fetchall()
+                codes.update(str(row[0]) for row in rows)
+    except Exception as e:
+        print(f"⚠️  Could not read classification codes from {ITEMS_TABLE}: {e}")
+    return sorted(codes)
+
+
+async def _discover_codes(client, start: str, end: str) -> Set[str]:
+    """Classification codes of the items of every plan updated between start and end (YYYYMMDD)."""
+    config = ENDPOINT_CONFIG[DISCOVERY_ENDPOINT]
+    codes: Set[str] = set()
+    page, total_pages = 1, 1
+    while page <= total_pages:
+        params = {"dataInicio": start, "dataFim": end, "pagina": page,
+                  "tamanhoPagina": config.page_size_limits.max}
+        body = await get_json(client, config.path, params=params, endpoint=DISCOVERY_ENDPOINT)
+        if not body or not body.get("data"):
+            break
+        total_pages = body.get("totalPaginas") or page
+        for plan in body["data"]:
+            for item in plan.get("itens") or []:
+                if item.get(ITEM_CLASSIFICATION_FIELD) is not None:
+                    codes.add(str(item[ITEM_CLASSIFICATION_FIELD]))
+        page += 1
+    return codes
+
+
+def discover_classification_codes(state: StateManager, today: Optional[date] = None) -> Set[str]:
+    """
+    Discover classification codes from plans updated since the last discovery.
+
+    The first run looks back ``pca_discovery_days``; later runs resume from
+    the discovery watermark. Codes are remembered in the pipeline state, so
+    a code seen once keeps being fanned out over.
+
+    Returns:
+        Codes not known before
+    """
+    if settings.pca_discovery_days <= 0:
+        return set()
+    today = today or date.today()
+    watermark = state.get_watermark(DISCOVERY_ENDPOINT + "_codes")
+    start = (datetime.strptime(watermark, "%Y%m%d").date() if watermark
+             else today - timedelta(days=settings.pca_discovery_days))
+    start_str, end_str = min(start, today).strftime("%Y%m%d"), today.strftime("%Y%m%d")
+
+    async def discover() -> Set[str]:
+        async with async_client(1) as client:
+            return await _discover_codes(client, start_str, end_str)
+
+    try:
+        codes = asyncio.run(discover())
+    except Exception as e:
+        print(f"⚠️  PCA classification code discovery failed: {e}")
+        return set()
+
+    known = state.get_section(CODES_SECTION)
+    new_codes = {code: today.isoformat() for code in codes if code not in known}
+    if new_codes:
+        state.update(CODES_SECTION, new_codes)
+    state.set_watermark(DISCOVERY_ENDPOINT + "_codes", end_str)
+    print(f"🔎 PCA: {len(codes)} classification codes in plans updated {start_str}-{end_str}, {len(new_codes)} new")
+    return set(new_codes)
+
+
+def split_by_classification(record: Dict[str, Any], default: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Split a plan into one record per classification of its items.
+
+    Each record carries the plan fields, the items of one
+    ``classificacaoSuperiorCodigo`` and that code as
+    ``codigoClassificacaoSuperior`` (the second half of the ``pca`` natural
+    key). Items without a code fall under ``default``; a plan without items
+    yields one record with an empty code.
+    """
+    groups: Dict[str, List[Dict[str, Any]]] = {}
+    for item in record.get("itens") or []:
+        code = item.get(ITEM_CLASSIFICATION_FIELD)
+        groups.setdefault(str(code) if code is not None else (default or ""), []).append(item)
+    for code, items in (groups or {default or "": []}).items():
+        yield {**record, "itens": items, CLASSIFICATION_FIELD: code}
+
+
+def classified_plans(records: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """
+    Reshape processed full plans (``/v1/pca/atualizacao``) into ``pca`` rows.
+
+    The processing columns are recomputed per split record, so every
+    classification gets its own ``_dlt_id`` and ``pca`` natural key.
+    """
+    steps = record_processing_steps(ENDPOINT_CONFIG["pca"])
+    for record in records:
+        plan = {key: value for key, value in record.items() if not key.startswith("_")}
+        for split in split_by_classification(plan):
+            for step in steps:
+                split = step(split)
+            yield split
+
+
+def plan_pca_shards(
+    endpoints: List[str],
+    years: List[int],
+    output_dir: str,
+    state: StateManager,
+    today: Optional[date] = None
+) -> Tuple[List[PCAShard], int]:
+    """
+    Enumerate the shards to fetch.
+
+    Returns:
+        (shards, number of closed-year shards skipped because already cached)
+    """
+    fan_out = {
+        "pca": classification_codes(output_dir) if "pca" in endpoints else [],
+        "pca_usuario": [str(user_id) for user_id in settings.pca_user_ids],
+    }
+    closed = state.get_section(STATE_SECTION)
+
+    shards, cached = [], 0
+    for endpoint in endpoints:
+        if not fan_out[endpoint]:
+            print(f"⚠️  No {PCA_ENDPOINTS[endpoint]} values for {endpoint}; {MISSING_VALUES_HINT[endpoint]}")
+        for year in years:
+            for value in fan_out[endpoint]:
+                shard = PCAShard(endpoint, year, PCA_ENDPOINTS[endpoint], value)
+                if shard.key in closed:
+                    cached += 1
+                else:
+                    shards.append(shard)
+    return shards, cached
+
+
+async def _fetch_shard(
+    client,
+    shard: PCAShard,
+    semaphore: asyncio.Semaphore,
+    pages: SpillingQueue,
+    output_dir: str
+):
+    """Page through one shard, handing each page to the loader as it arrives (waits while the queue is full)."""
+    path = ENDPOINT_CONFIG[shard.endpoint].path
+    hook = response_hook(output_dir, shard.endpoint, str(shard.year),
+                         table=shard.endpoint, partition_field=PARTITION_FIELD)
+    page, total_pages = 1, 1
+    while page <= total_pages:
+        async with semaphore:
+            body = await get_json(client, path, params=shard.params(page), on_response=hook, endpoint=shard.endpoint)
+        if not body or not body.get("data"):
+            break
+        total_pages = body.get("totalPaginas") or page
+        await pages.put_async((shard, body["data"]), estimate_bytes(body["data"]))
+        page += 1
+
+
+async def _produce(
+    shards: List[PCAShard],
+    concurrency: int,
+    pages: SpillingQueue,
+    failed: Set[PCAShard],
+    output_dir: str
+):
+    semaphore = asyncio.Semaphore(concurrency)
+    async with async_client(concurrency) as client:
+        async def run(shard: PCAShard):
+            try:
+                await _fetch_shard(client, shard, semaphore, pages, output_dir)
+            except QueueClosed:
+                raise
+            except Exception as e:
+                failed.add(shard)
+                print(f"⚠️  {shard.key}: {e}")
+
+        await asyncio.gather(*(run(shard) for shard in shards))
+
+
+def _stream_records(
+    shards: List[PCAShard],
+    concurrency: int,
+    failed: Set[PCAShard],
+    result: PCAResult,
+    output_dir: str
+) -> Iterator[Dict[str, Any]]:
+    """Run the fetchers on a background event loop and yield processed records as pages arrive."""
+    pages = SpillingQueue("pca_pages", spill_dir=spill_dir(output_dir))
+
+    async def produce(queue: SpillingQueue):
+        await _produce(shards, concurrency, queue, failed, output_dir)
+
+    steps = {endpoint: record_processing_steps(ENDPOINT_CONFIG[endpoint]) for endpoint in PCA_ENDPOINTS}
+    split: Dict[str, Callable[[Dict[str, Any], str], Iterable[Dict[str, Any]]]] = {
+        "pca": split_by_classification,
+        "pca_usuario": lambda record, value: [record],  # Whole plans: no classification filter
+    }
+    for shard, records in stream_async(produce, pages):
+        for plan in records:
+            result.records += 1
+            for record in split[shard.endpoint](plan, shard.value):
+                for step in steps[shard.endpoint]:
+                    record = step(record)
+                yield record
+
+    if pages.spilled_items:
+        print(f"💾 PCA: {pages.spilled_items} pages ({pages.spilled_bytes / 1024**2:.1f} MB) spilled to disk")
+
+
+def run_pca_extraction(
+    endpoints: Optional[List[str]] = None,
+    years: Optional[List[int]] = None,
+    output_dir: str = "data",
+    concurrency: Optional[int] = None,
+    today: Optional[date] = None
+) -> PCAResult:
+    """
+    Extract annual plans for the given years (default: every year with plans).
+
+    Args:
+        endpoints: ``pca`` and/or ``pca_usuario`` (default: both)
+        years: anoPca values
+        output_dir: Base output directory
+        concurrency: Shards paged at the same time (default: settings.concurrent_endpoints)
+        today: Reference date deciding which years are closed
+
+    Returns:
+        Shard and record counts and the partitions written
+    """
+    endpoints = [endpoint for endpoint in (endpoints or list(PCA_ENDPOINTS)) if endpoint in PCA_ENDPOINTS]
+    years = years or pca_years(today)
+    concurrency = concurrency or settings.concurrent_endpoints
+    state = StateManager(output_dir)
+    if "pca" in endpoints:
+        discover_classification_codes(state, today)
+
+    shards, cached = plan_pca_shards(endpoints, years, output_dir, state, today)
+    result = PCAResult(shards=len(shards), cached=cached)
+    print(f"📋 PCA: {len(shards)} shards to fetch, {cached} closed shards cached")
+    if not shards:
+        return result
+
+    failed: Set[PCAShard] = set()
+    for endpoint in endpoints:
+        endpoint_shards = [shard for shard in shards if shard.endpoint == endpoint]
+        if endpoint_shards:
+            records = _stream_records(endpoint_shards, concurrency, failed, result, output_dir)
+            result.touched |= load_records_by_partition(
+                records, endpoint, output_dir, PARTITION_FIELD, batch_size=LOAD_BATCH_SIZE
+            )
+
+    if result.touched:
+        refresh_derived_tables(output_dir, sorted(result.touched))
+
+    # Only after the load committed: closed years are never requested again
+    finished_at = datetime.now(timezone.utc).isoformat()
+    state.update(STATE_SECTION, {
+        shard.key: finished_at
+        for shard in shards
+        if shard not in failed and is_closed_year(shard.year, today)
+    })
+
+    result.failed = len(failed)
+    print(f"✅ PCA: {result.records} plans from {len(shards) - len(failed)} shards, {len(failed)} failed")
+    return result
@@ -13,12 +13,31 @@ import json
 from dlt.sources.rest_api import rest_api_source
 from dlt.destinations import filesystem
 from pathlib import Path
-from datetime import datetime, date
-from typing import List, Optional, Any, Dict
+from datetime import datetime, date, timedelta
+from typing import List, Optional, Any, Callable, Dict, Iterable, Set, Tuple
+from calendar import monthrange
+from copy import deepcopy
 from .config import create_pncp_rest_config
-from .gap_detector import find_extraction_gaps, DataGap
+from .gap_detector import find_extraction_gaps, DataGap, PNCPGapDetector
+from .leases import try_lease
+from .state_manager import EMPTY_SHARDS, StateManager
+from .streaming import SIZE_SAMPLE_EVERY, estimate_bytes
+from .verify import check_window, normalized_rows, shard_key, totals_hook
+from .workspace import collect_garbage, shard_pipeline
+from baliza import metrics, profiling
 from baliza.schemas import ModalidadeContratacao
-from baliza.utils.completion_tracking import mark_extraction_completed, get_completed_extractions, _get_months_in_range
+from baliza.settings import ENDPOINT_CONFIG, settings
+from baliza.storage.layout import DATASET_NAME, PARTITION_LAYOUT, month_of, partition_placeholders
+from baliza.storage.lookup_index import refresh_lookup_index
+from baliza.storage.raw_archive import response_hook
+from baliza.storage.rollups import refresh_rollups
+from baliza.storage.search_index import refresh_search_index
+from baliza.storage.upsert import upsert_partitions
+from baliza.utils.completion_tracking import (
+    mark_extraction_completed, get_completed_extractions, is_extraction_completed, _get_months_in_range
+)
+
+SPAN_SEPARATOR = ".."  # partition_field "start..end": the record belongs to every month of the span
 
 
 def pncp_source(
@@ -138,19 +157,42 @@ def pncp_all_modalidades_source(start_date: str, end_date: str):
 
 
 # Convenience functions for common use cases
-def create_default_pipeline(destination: str = "parquet", output_dir: str = "data"):
-    """Create structured pipeline with Parquet export by endpoint and month."""
+def create_default_pipeline(
+    destination: str = "parquet",
+    output_dir: str = "data",
+    partition: Optional[Tuple[int, int]] = None,
+    pipeline_name: str = "baliza_pncp"
+):
+    """
+    Create structured pipeline with Parquet export by endpoint and month.
+
+    Args:
+        destination: "parquet" for the filesystem archive, or any dlt destination name
+        output_dir: Base output directory for the Parquet archive
+        partition: (year, month) the load belongs to; files are written to the
+            hive-style ``{table}/year=YYYY/month=MM`` partition of that month
+        pipeline_name: dlt pipeline name; processes loading at the same time
+            need different names so their working state does not collide
+            (extraction stages use workspace.shard_pipeline, isolated per load)
+    """
     if destination == "parquet":
         # Use filesystem destination for structured Parquet export
-        dest = filesystem(bucket_url=output_dir, layout="{table_name}/{load_id}")
+        if partition:
+            dest = filesystem(
+                bucket_url=output_dir,
+                layout=PARTITION_LAYOUT,
+                extra_placeholders=partition_placeholders(*partition)
+            )
+        else:
+            dest = filesystem(bucket_url=output_dir, layout="{table_name}/{load_id}")
         return dlt.pipeline(
-            pipeline_name="baliza_pncp",
+            pipeline_name=pipeline_name,
             destination=dest,
-            dataset_name="pncp_raw"
+            dataset_name=DATASET_NAME
         )
     else:
         return dlt.pipeline(
-            pipeline_name="baliza_pncp", 
+            pipeline_name=pipeline_name, 
             destination=destination,
             dataset_name="pncp_data"
         )
@@ -184,6 +226,411 @@ def run_priority_extraction(
     return result
 
 
+def run_structured_extraction(
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    endpoints: Optional[List[str]] = None,
+    output_dir: str = "data",
+    skip_completed: bool = True,
+    modalidades: Optional[List[int]] = None
+) -> Optional[List[Any]]:
+    """
+    Run extraction with one dlt load per endpoint and month.
+
+    Each month is written to its own hive-style partition and marked
+    ``.completed`` as soon as its load succeeds with at least the
+    ``totalRegistros`` the API reported (see verify.py), so an interrupted
+    backfill resumes at the first month that is still missing. Each month
+    is extracted under a shard lease (see leases.py), so overlapping runs
+    split the months between them instead of fetching them twice.
+
+    Shards (modalidades) a closed window returned empty are remembered in
+    the state's negative cache and skipped until they are due for
+    revalidation (``negative_cache_*`` settings).
+
+    Args:
+        start_date: Start date in YYYYMMDD format (None for full backfill)
+        end_date: End date in YYYYMMDD format (None for full backfill)
+        endpoints: Endpoints to extract
+        output_dir: Base output directory
+        skip_completed: Skip months that already have a completion marker
+        modalidades: Modalidade IDs for endpoints that require one (default: all)
+
+    Returns:
+        List of dlt load infos (and snapshot manifests for ``snapshot``
+        endpoints), or None when nothing had to be extracted
+    """
+    if not endpoints:
+        print("⚠️  No endpoints selected - nothing to extract")
+        return None
+
+    results: List[Any] = []
+    snapshot_endpoints = [e for e in endpoints if ENDPOINT_CONFIG[e].sync_type == "snapshot"]
+    if snapshot_endpoints:
+        # The open set as of today, diffed against the previous run
+        from .snapshot import run_snapshot_diff
+        results.extend(run_snapshot_diff(endpoint, output_dir) for endpoint in snapshot_endpoints)
+        endpoints = [e for e in endpoints if e not in snapshot_endpoints]
+
+    windows = plan_month_windows(start_date, end_date, endpoints) if endpoints else []
+
+    if skip_completed:
+        windows = [
+            (endpoint, window_start, window_end) for endpoint, window_start, window_end in windows
+            if not is_extraction_completed(output_dir, endpoint, f"{window_start[:4]}-{window_start[4:6]}")
+        ]
+
+    if not windows:
+        print("✅ No missing data found - skipping extraction")
+        return results or None
+
+    print(f"📋 {len(windows)} endpoint-months to extract")
+    state = StateManager(output_dir)
+    collect_garbage(output_dir)
+
+    empty = state.empty_shards(settings.negative_cache_revalidate_days) if settings.enable_negative_cache else set()
+
+    # Windows leased by an overlapping run are deferred, then revisited once it lets go
+    deferred = []
+    for endpoint, window_start, window_end in windows:
+        lease = try_lease(output_dir, window_lease_key(endpoint, window_start))
+        if not lease.held:
+            done_before = is_extraction_completed(output_dir, endpoint, f"{window_start[:4]}-{window_start[4:6]}")
+            deferred.append((endpoint, window_start, window_end, done_before))
+            continue
+        with lease:
+            results.extend(_extract_window(endpoint, window_start, window_end, output_dir, modalidades, state, empty))
+
+    if deferred:
+        print(f"⏳ {len(deferred)} endpoint-months leased by another run, waiting for them")
+    for endpoint, window_start, window_end, done_before in deferred:
+        with try_lease(output_dir, window_lease_key(endpoint, window_start), blocking=True):
+            if not done_before and is_extraction_completed(output_dir, endpoint, f"{window_start[:4]}-{window_start[4:6]}"):
+                print(f"⏭️  {endpoint} {window_start[:6]}: completed by another run")
+                continue
+            results.extend(_extract_window(endpoint, window_start, window_end, output_dir, modalidades, state, empty))
+
+    return results
+
+
+def window_lease_key(endpoint: str, window_start: str) -> str:
+    return f"{endpoint}|{window_start[:4]}-{window_start[4:6]}"
+
+
+def _extract_window(
+    endpoint: str,
+    window_start: str,
+    window_end: str,
+    output_dir: str,
+    modalidades: Optional[List[int]],
+    state: StateManager,
+    empty: Set[str]
+) -> List[Any]:
+    """Load one endpoint-month (under its lease); returns its dlt load info, if any."""
+    partition = (int(window_start[:4]), int(window_start[4:6]))
+    month_key = f"{partition[0]:04d}-{partition[1]:02d}"
+
+    # Negative cache: skip shards a closed window already returned empty
+    shards = window_shards(endpoint, modalidades)
+    to_fetch = [m for m in shards if shard_key(endpoint, month_key, m) not in empty]
+    if not to_fetch:
+        print(f"⏭️  {endpoint} {month_key}: every shard cached as empty")
+        mark_extraction_completed(output_dir, window_start, window_end, [endpoint])
+        return []
+    if len(to_fetch) < len(shards):
+        print(f"⏭️  {endpoint} {month_key}: {len(shards) - len(to_fetch)} modalidades cached as empty")
+    window_modalidades = [int(m) for m in to_fetch] if ENDPOINT_CONFIG[endpoint].requires_modalidade else modalidades
+
+    print(f"🔄 Extracting {endpoint}: {window_start} to {window_end}")
+    hook = response_hook(output_dir, endpoint, month_key, table=endpoint, partition=month_key)
+    totals: Dict[str, int] = {}
+    source = window_source(endpoint, window_start, window_end, window_modalidades, hook, totals)
+    with shard_pipeline(output_dir, partition, f"{endpoint}_{month_key}") as pipeline:
+        result = run_pipeline(pipeline, source)
+        metrics.observe_load(pipeline, partition)
+        loaded_rows = normalized_rows(pipeline, endpoint)
+
+    # Published. Short of the API's totalRegistros: leave unmarked and queue for re-fetch
+    if check_window(state, endpoint, month_key, totals, loaded_rows):
+        mark_extraction_completed(output_dir, window_start, window_end, [endpoint])
+    if settings.enable_negative_cache:
+        remember_empty_shards(state, endpoint, window_start, window_end, totals)
+    refresh_derived_tables(output_dir, [(endpoint, *partition)])
+    return [result]
+
+
+def load_records_by_partition(
+    records: Iterable[Dict[str, Any]],
+    table: str,
+    output_dir: str,
+    partition_field: str,
+    batch_size: int = 10_000,
+    pipeline_name: str = "baliza_pncp",
+    max_buffer_bytes: Optional[int] = None
+) -> Set[Tuple[str, int, int]]:
+    """
+    Load already-processed records into the month partitions they belong to.
+
+    Used by stages that fetch records outside the month-window loop (CDC,
+    drill-downs, PCA). Records are buffered per partition and flushed every
+    ``batch_size`` rows. Buffers are also bounded in estimated bytes across
+    partitions: past ``max_buffer_bytes`` the largest buffer is flushed early,
+    so records spread over many months cannot add up to open partitions ×
+    batch size.
+
+    Args:
+        records: Records with the hash/metadata/natural key columns already added
+        table: Destination table
+        output_dir: Base output directory
+        partition_field: Record field whose date decides the month partition, or a
+            "start..end" pair of fields for records loaded into every month of a span
+            (see record_partitions)
+        batch_size: Rows per dlt load
+        pipeline_name: Prefix of the per-flush pipeline names (see workspace.shard_pipeline)
+        max_buffer_bytes: Bound of all buffers together (default: settings.stream_buffer_bytes)
+
+    Returns:
+        (table, year, month) partitions written
+    """
+    max_buffer_bytes = max_buffer_bytes or settings.stream_buffer_bytes
+    buffers: Dict[Tuple[int, int], List[Dict[str, Any]]] = {}
+    touched: Set[Tuple[str, int, int]] = set()
+    skipped = 0
+    buffered = 0
+    record_bytes = 0.0  # Running estimate from every SIZE_SAMPLE_EVERY-th record
+
+    def flush(partition: Tuple[int, int]):
+        nonlocal buffered
+        rows = buffers.pop(partition, [])
+        buffered -= len(rows)
+        if rows:
+            with shard_pipeline(output_dir, partition, f"{table}_{partition[0]}_{partition[1]:02d}",
+                                prefix=pipeline_name) as pipeline:
+                run_pipeline(pipeline, rows, table_name=table, write_disposition="append")
+                metrics.observe_load(pipeline, partition)
+            touched.add((table, *partition))
+
+    for index, record in enumerate(records):
+        partitions = record_partitions(record, partition_field)
+        if not partitions:
+            skipped += 1
+            continue
+
+        if index % SIZE_SAMPLE_EVERY == 0:
+            sample = estimate_bytes(record)
+            record_bytes = 0.8 * record_bytes + 0.2 * sample if record_bytes else sample
+
+        for copy_index, partition in enumerate(partitions):
+            buffers.setdefault(partition, []).append(record if copy_index == 0 else dict(record))
+            buffered += 1
+            if len(buffers[partition]) >= batch_size:
+                flush(partition)
+            elif buffered * record_bytes > max_buffer_bytes:
+                flush(max(buffers, key=lambda p: len(buffers[p])))
+
+    for partition in list(buffers):
+        flush(partition)
+
+    if skipped:
+        print(f"⚠️  {skipped} {table} records without {partition_field} were not loaded")
+
+    return touched
+
+
+def record_partitions(
+    record: Dict[str, Any],
+    partition_field: str,
+    today: Optional[date] = None
+) -> List[Tuple[int, int]]:
+    """
+    Month partitions a record is loaded into.
+
+    A single field routes the record to the month of its date. A
+    ``"start..end"`` pair (e.g. ``"vigenciaInicio..vigenciaFim"``) routes it
+    to every month of the span up to the current one, matching endpoints
+    whose windows return a record in each month its period overlaps
+    (``/v1/atas``).
+    """
+    if SPAN_SEPARATOR not in partition_field:
+        partition = month_of(record.get(partition_field))
+        return [partition] if partition else []
+
+    start_field, end_field = partition_field.split(SPAN_SEPARATOR)
+    first = month_of(record.get(start_field))
+    if first is None:
+        return []
+    today = today or date.today()
+    last = max(first, min(month_of(record.get(end_field)) or first, (today.year, today.month)))
+
+    partitions = []
+    year, month = first
+    while (year, month) <= last:
+        partitions.append((year, month))
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return partitions
+
+
+def run_pipeline(pipeline, data: Any, loader_file_format: str = "parquet", **kwargs) -> Any:
+    """
+    ``pipeline.run`` split into extract, normalize and load when profiling.
+
+    Without an active profiler this is exactly ``pipeline.run``; with one,
+    each dlt step runs as its own profiling stage (extract / normalize /
+    write).
+
+    Returns:
+        dlt load info
+    """
+    if profiling.active() is None:
+        return pipeline.run(data, loader_file_format=loader_file_format, **kwargs)
+
+    with profiling.stage("extract"):
+        pipeline.extract(data, **kwargs)
+    with profiling.stage("normalize"):
+        pipeline.normalize(loader_file_format=loader_file_format)
+    with profiling.stage("write"):
+        return pipeline.load()
+
+
+def refresh_derived_tables(output_dir: str, touched: List[Tuple[str, int, int]]):
+    """
+    Bring tables derived from the archive up to date after a load commits.
+
+    Args:
+        output_dir: Base output directory
+        touched: (table, year, month) partitions written by the load
+    """
+    with profiling.stage("refresh"):
+        if settings.enable_upsert:
+            # Runs first: compaction rewrites the files the other tables point to
+            upsert_partitions(output_dir, touched)
+        if settings.enable_rollups:
+            refresh_rollups(output_dir, touched)
+        if settings.enable_lookup_index:
+            refresh_lookup_index(output_dir, touched)
+        if settings.enable_search_index:
+            refresh_search_index(output_dir, touched)
+
+
+def plan_month_windows(
+    start_date: Optional[str],
+    end_date: Optional[str],
+    endpoints: List[str]
+) -> List[Tuple[str, str, str]]:
+    """
+    Split the requested range into (endpoint, window_start, window_end) month windows.
+
+    Only date-windowed endpoints are planned here; annual (PCA) and
+    on-demand (drill-down) endpoints need their own planners.
+    """
+    if start_date is None or end_date is None:
+        ranges = [(gap.endpoint, gap.start_date, gap.end_date)
+                  for gap in PNCPGapDetector().get_backfill_gaps(endpoints)]
+    else:
+        ranges = [(endpoint, start_date, end_date) for endpoint in endpoints]
+
+    windows = []
+    for endpoint, range_start, range_end in ranges:
+        if ENDPOINT_CONFIG[endpoint].sync_type != "incremental":
+            print(f"⏭️  Skipping {endpoint}: {ENDPOINT_CONFIG[endpoint].sync_type} endpoints are not date-windowed (see baliza pca / drilldown / snapshot)")
+            continue
+
+        for month in _get_months_in_range(range_start, range_end):
+            year, month_num = month.split("-")
+            last_day = monthrange(int(year), int(month_num))[1]
+            window_start = max(range_start, f"{year}{month_num}01")
+            window_end = min(range_end, f"{year}{month_num}{last_day:02d}")
+            windows.append((endpoint, window_start, window_end))
+
+    return windows
+
+
+def window_shards(endpoint: str, modalidades: Optional[List[int]] = None) -> List[str]:
+    """Modalidades an endpoint-month fans out to ("" for endpoints without modalidade)."""
+    if not ENDPOINT_CONFIG[endpoint].requires_modalidade:
+        return [""]
+    return [str(m) for m in modalidades or [m.value for m in ModalidadeContratacao]]
+
+
+def is_closed_window(window_end: str, today: Optional[date] = None) -> bool:
+    """True once a window is old enough that late publications are no longer expected."""
+    end = datetime.strptime(window_end, "%Y%m%d").date()
+    return (today or date.today()) - end >= timedelta(days=settings.negative_cache_min_age_days)
+
+
+def is_full_month(window_start: str, window_end: str) -> bool:
+    """True if a window spans its whole month (not clipped by --date-range/--days or a sync tier)."""
+    year, month = int(window_start[:4]), int(window_start[4:6])
+    last_day = monthrange(year, month)[1]
+    return window_start == f"{year}{month:02d}01" and window_end == f"{year}{month:02d}{last_day:02d}"
+
+
+def remember_empty_shards(
+    state: StateManager,
+    endpoint: str,
+    window_start: str,
+    window_end: str,
+    totals: Dict[str, int],
+    today: Optional[date] = None
+):
+    """
+    Update the negative cache with the totals a window load reported.
+
+    Shards with zero ``totalRegistros`` are cached only for closed windows
+    covering their whole month (the cache key is the month); a cached shard
+    that has records again (revalidation) is dropped.
+    """
+    month_key = f"{window_start[:4]}-{window_start[4:6]}"
+    keys = {modalidade: shard_key(endpoint, month_key, modalidade) for modalidade in totals}
+    if is_closed_window(window_end, today) and is_full_month(window_start, window_end):
+        empty = [key for modalidade, key in keys.items() if totals[modalidade] == 0]
+        if empty:
+            state.mark_empty_shards(empty)
+    cached = state.get_section(EMPTY_SHARDS)
+    revived = [key for modalidade, key in keys.items() if totals[modalidade] and key in cached]
+    if revived:
+        state.clear_empty_shards(revived)
+
+
+def window_source(
+    endpoint: str,
+    start_date: str,
+    end_date: str,
+    modalidades: Optional[List[int]] = None,
+    response_hook: Optional[Callable] = None,
+    totals: Optional[Dict[str, int]] = None
+):
+    """
+    Build a dlt source for one endpoint and date window.
+
+    Endpoints that require ``codigoModalidadeContratacao`` get one resource
+    per modalidade, all loading into the endpoint's table.
+
+    Args:
+        response_hook: Called with every HTTP response (raw archive capture)
+        totals: Filled with the ``totalRegistros`` reported per modalidade
+    """
+    config = create_pncp_rest_config(start_date, end_date)
+    resource = next(r for r in config["resources"] if r["name"] == endpoint)
+    hooks = [response_hook, profiling.response_hook(), metrics.response_hook(endpoint),
+             totals_hook(totals) if totals is not None else None]
+    resource["endpoint"]["response_actions"] = [hook for hook in hooks if hook is not None]
+
+    if ENDPOINT_CONFIG[endpoint].requires_modalidade:
+        resources = []
+        for modalidade in modalidades or [m.value for m in ModalidadeContratacao]:
+            modalidade_resource = deepcopy(resource)
+            modalidade_resource["name"] = f"{endpoint}_modalidade_{modalidade}"
+            modalidade_resource["table_name"] = endpoint
+            modalidade_resource["endpoint"]["params"]["codigoModalidadeContratacao"] = modalidade
+            resources.append(modalidade_resource)
+        config["resources"] = resources
+    else:
+        config["resources"] = [resource]
+
+    return rest_api_source(config, name=f"pncp_{endpoint}_{start_date}")
+
+
 def run_modalidade_extraction(
     start_date: str,
     end_date: str, 
@@ -0,0 +1,156 @@
+"""
+Offline replay: rebuild Parquet outputs from the raw response archive.
+
+Each segment of the raw archive (see storage/raw_archive.py) is replayed
+by a worker process: frames are decompressed, their records go through
+the current processing steps of their endpoint, and are loaded with the
+route recorded at capture time (destination table plus fixed partition or
+partition field). Nothing touches the network, so rebuilding after a
+transform change costs local CPU instead of months of API quota.
+
+Snapshot endpoints are replayed as full snapshots (no diff); the
+natural-key upsert collapses the repeated versions. Plans are split per
+classification like at capture time (see pca.py), taking the code of a
+``/v1/pca`` response from its request URL.
+"""
+
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from itertools import groupby
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from baliza.settings import ENDPOINT_CONFIG, settings
+from baliza.storage.raw_archive import Segment, list_segments, read_segment
+from .config import record_processing_steps
+from .pca import CLASSIFICATION_FIELD, CLASSIFIED_ENDPOINTS, split_by_classification
+from .pipeline import load_records_by_partition, refresh_derived_tables
+from .workspace import shard_pipeline
+
+ROUTE_FIELDS = ("table", "partition", "partition_field")
+
+
+@dataclass
+class ReplayResult:
+    """Outcome of a replay run."""
+    segments: int = 0
+    records: int = 0
+    failed: List[str] = field(default_factory=list)
+    touched: Set[Tuple[str, int, int]] = field(default_factory=set)
+
+
+def frame_records(body: Any) -> List[Dict[str, Any]]:
+    """Records of a response body: paged (``data``), a single record, or a plain list."""
+    if isinstance(body, dict):
+        if "data" in body:
+            return body["data"] or []
+        return [body] if body else []
+    if isinstance(body, list):
+        return body
+    return []
+
+
+def _route(entry: Dict[str, Any]) -> Tuple[Any, ...]:
+    return tuple(entry.get(name) for name in ROUTE_FIELDS)
+
+
+def _frame_plans(records: List[Dict[str, Any]], url: str) -> Iterator[Dict[str, Any]]:
+    code = parse_qs(urlparse(url).query).get(CLASSIFICATION_FIELD, [None])[0]
+    for record in records:
+        yield from split_by_classification(record, code)
+
+
+def _records(frames, endpoint: str, counter: List[int]) -> Iterator[Dict[str, Any]]:
+    classified = endpoint in CLASSIFIED_ENDPOINTS
+    steps = record_processing_steps(ENDPOINT_CONFIG["pca" if classified else endpoint])
+    for entry, frame in frames:
+        records = frame_records(json.loads(frame["body"]))
+        for record in _frame_plans(records, frame.get("url", "")) if classified else records:
+            for step in steps:
+                record = step(record)
+            # Keep the extraction date of the original fetch, not of the replay
+            record["_baliza_extracted_at"] = frame["fetched_at"][:10]
+            counter[0] += 1
+            yield record
+
+
+def replay_segment(segment: Segment, output_dir: str) -> Tuple[int, Set[Tuple[str, int, int]]]:
+    """
+    Replay one segment into ``output_dir`` (runs in a worker process).
+
+    Returns:
+        (records loaded, partitions written)
+    """
+    pipeline_name = "baliza_replay"
+    counter = [0]
+    touched: Set[Tuple[str, int, int]] = set()
+
+    for (table, partition, partition_field), frames in groupby(read_segment(segment.path), key=lambda f: _route(f[0])):
+        table = table or segment.endpoint
+        records = _records(frames, segment.endpoint, counter)
+
+        if partition:
+            year, month = int(partition[:4]), int(partition[5:7])
+            with shard_pipeline(output_dir, (year, month), f"{table}_{partition}", prefix=pipeline_name) as pipeline:
+                pipeline.run(records, table_name=table, write_disposition="append", loader_file_format="parquet")
+            touched.add((table, year, month))
+        elif partition_field:
+            touched |= load_records_by_partition(records, table, output_dir, partition_field, pipeline_name=pipeline_name)
+
+    return counter[0], touched
+
+
+def run_replay(
+    archive_dir: str = "data",
+    output_dir: str = "data/replay",
+    endpoints: Optional[List[str]] = None,
+    start_bucket: Optional[str] = None,
+    end_bucket: Optional[str] = None,
+    processes: Optional[int] = None
+) -> ReplayResult:
+    """
+    Rebuild outputs from the raw archive of ``archive_dir`` into ``output_dir``.
+
+    Args:
+        archive_dir: Output directory whose ``.baliza/raw`` holds the responses
+        output_dir: Where to write the rebuilt archive (use a fresh directory)
+        endpoints: Only replay these endpoints
+        start_bucket: First bucket, e.g. "2024-01"
+        end_bucket: Last bucket, e.g. "2024-12"
+        processes: Worker processes (default: settings.replay_processes, or one per CPU)
+
+    Returns:
+        Segment and record counts and the partitions written
+    """
+    segments = list_segments(archive_dir, endpoints, start_bucket, end_bucket)
+    result = ReplayResult(segments=len(segments))
+    if not segments:
+        print(f"⚠️  No raw segments found in {archive_dir}")
+        return result
+
+    workers = processes or settings.replay_processes or os.cpu_count() or 1
+    print(f"⏪ Replaying {len(segments)} segments with {workers} processes")
+
+    # spawn: workers must not inherit dlt/duckdb state from this process
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        futures = {pool.submit(replay_segment, segment, output_dir): segment for segment in segments}
+        for future in as_completed(futures):
+            segment = futures[future]
+            try:
+                records, touched = future.result()
+            except Exception as e:
+                result.failed.append(str(segment.path))
+                print(f"⚠️  {segment.endpoint}/{segment.bucket}/{segment.path.name}: {e}")
+                continue
+            result.records += records
+            result.touched |= touched
+
+    if result.touched:
+        refresh_derived_tables(output_dir, sorted(result.touched))
+
+    print(f"✅ {result.records} records replayed into {len(result.touched)} partitions")
+    return result
@@ -0,0 +1,203 @@
+"""
+Snapshot-diff mode for ``snapshot`` endpoints (``contratacoes_proposta``).
+
+The endpoint only answers "which procurements are open for proposals as of
+``dataFinal``", so every run returns the whole open set again. Rather than
+appending it in full, each run is diffed by natural key against the
+previous snapshot:
+
+- inserted and changed records (new key, or new record hash) are appended
+  to the base table, tagged with ``_baliza_change``;
+- keys missing from the new snapshot are written as tombstones to
+  ``{table}_closed``;
+- unchanged records are not written at all.
+
+The previous snapshot is a ``key -> (hash, publication date)`` table in
+``.baliza/snapshots/{table}.sqlite``, so the diff streams record by record
+with indexed lookups and memory stays bounded however large the open set
+is. Every run also writes a JSON manifest with its counts.
+"""
+
+import json
+import os
+import sqlite3
+from dataclasses import asdict, dataclass, field
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from baliza.settings import ENDPOINT_CONFIG
+from baliza.storage.layout import NATURAL_KEY_COLUMN
+from baliza.storage.raw_archive import response_hook
+from .pipeline import load_records_by_partition, refresh_derived_tables, window_source
+
+PARTITION_FIELD = "dataPublicacaoPncp"
+CHANGE_COLUMN = "_baliza_change"
+CLOSED_SUFFIX = "_closed"
+
+
+@dataclass
+class SnapshotManifest:
+    """Counts of one snapshot run, written next to the snapshot state."""
+    table: str
+    snapshot_id: str
+    reference_date: str
+    taken_at: str
+    total: int = 0
+    inserted: int = 0
+    changed: int = 0
+    unchanged: int = 0
+    closed: int = 0
+    without_key: int = 0
+    partitions: List[str] = field(default_factory=list)
+
+
+def snapshot_dir(output_dir: str) -> Path:
+    return Path(output_dir) / ".baliza" / "snapshots"
+
+
+def _connect(output_dir: str, table: str) -> sqlite3.Connection:
+    path = snapshot_dir(output_dir) / f"{table}.sqlite"
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    con = sqlite3.connect(path)
+    con.execute("PRAGMA journal_mode = WAL")
+    con.executescript("""
+        CREATE TABLE IF NOT EXISTS snapshot (
+            key TEXT PRIMARY KEY,
+            hash TEXT NOT NULL,
+            published TEXT
+        ) WITHOUT ROWID;
+        CREATE TEMP TABLE seen (key TEXT PRIMARY KEY) WITHOUT ROWID;
+    """)
+    return con
+
+
+def diff_records(
+    con: sqlite3.Connection,
+    records: Iterable[Dict[str, Any]],
+    manifest: SnapshotManifest
+) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the inserted and changed records of a new snapshot.
+
+    The snapshot table is updated as records stream through (inside the
+    caller's transaction); keys seen are collected in a temp table for
+    ``closed_keys``.
+    """
+    for record in records:
+        manifest.total += 1
+        key = record.get(NATURAL_KEY_COLUMN)
+        if key is None:
+            manifest.without_key += 1
+            continue
+
+        con.execute("INSERT OR IGNORE INTO seen (key) VALUES (?)", (key,))
+        previous = con.execute("SELECT hash FROM snapshot WHERE key = ?", (key,)).fetchone()
+        record_hash = record["_dlt_id"]
+
+        if previous is not None and previous[0] == record_hash:
+            manifest.unchanged += 1
+            continue
+
+        if previous is None:
+            manifest.inserted += 1
+            record[CHANGE_COLUMN] = "insert"
+        else:
+            manifest.changed += 1
+            record[CHANGE_COLUMN] = "update"
+
+        con.execute(
+            "INSERT OR REPLACE INTO snapshot (key, hash, published) VALUES (?, ?, ?)",
+            (key, record_hash, record.get(PARTITION_FIELD))
+        )
+        yield record
+
+
+def closed_keys(con: sqlite3.Connection, snapshot_id: str, closed_at: str) -> Iterator[Dict[str, Any]]:
+    """Yield tombstones for keys of the previous snapshot missing from the new one."""
+    rows = con.execute(
+        "SELECT key, hash, published FROM snapshot WHERE key NOT IN (SELECT key FROM seen)"
+    ).fetchall()
+    for key, record_hash, published in rows:
+        yield {
+            NATURAL_KEY_COLUMN: key,
+            "_dlt_id": f"{record_hash}:{snapshot_id}",
+            "_baliza_closed_hash": record_hash,
+            "_baliza_closed_at": closed_at,
+            "_baliza_snapshot_id": snapshot_id,
+            PARTITION_FIELD: published,
+        }
+
+
+def write_manifest(output_dir: str, manifest: SnapshotManifest) -> Path:
+    manifests = snapshot_dir(output_dir) / manifest.table
+    manifests.mkdir(parents=True, exist_ok=True)
+
+    path = manifests / f"{manifest.snapshot_id}.json"
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    tmp_path.write_text(json.dumps(asdict(manifest), indent=2, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp_path, path)
+    return path
+
+
+def run_snapshot_diff(
+    endpoint: str = "contratacoes_proposta",
+    output_dir: str = "data",
+    reference_date: Optional[date] = None
+) -> SnapshotManifest:
+    """
+    Fetch the current snapshot of an endpoint and write only what changed.
+
+    The snapshot state is committed only after the changed rows and
+    tombstones are loaded, so a failed run is diffed again from the same
+    previous snapshot.
+
+    Args:
+        endpoint: A ``sync_type="snapshot"`` endpoint
+        output_dir: Base output directory
+        reference_date: ``dataFinal`` of the snapshot (default: today)
+
+    Returns:
+        The run's manifest
+    """
+    if ENDPOINT_CONFIG[endpoint].sync_type != "snapshot":
+        raise ValueError(f"{endpoint} is not a snapshot endpoint")
+
+    reference = (reference_date or date.today()).strftime("%Y%m%d")
+    taken_at = datetime.now(timezone.utc)
+    manifest = SnapshotManifest(
+        table=endpoint,
+        snapshot_id=taken_at.strftime("%Y%m%dT%H%M%SZ"),
+        reference_date=reference,
+        taken_at=taken_at.isoformat(),
+    )
+    print(f"📸 Snapshot {endpoint} as of {reference}")
+
+    con = _connect(output_dir, endpoint)
+    try:
+        with con:
+            hook = response_hook(output_dir, endpoint, f"{reference[:4]}-{reference[4:6]}",
+                                 table=endpoint, partition_field=PARTITION_FIELD)
+            changes = diff_records(con, window_source(endpoint, reference, reference, response_hook=hook), manifest)
+            touched: Set[Tuple[str, int, int]] = load_records_by_partition(
+                changes, endpoint, output_dir, PARTITION_FIELD
+            )
+
+            tombstones = list(closed_keys(con, manifest.snapshot_id, manifest.taken_at))
+            if tombstones:
+                touched |= load_records_by_partition(tombstones, f"{endpoint}{CLOSED_SUFFIX}", output_dir, PARTITION_FIELD)
+                con.execute("DELETE FROM snapshot WHERE key NOT IN (SELECT key FROM seen)")
+            manifest.closed = len(tombstones)
+    finally:
+        con.close()
+
+    if touched:
+        refresh_derived_tables(output_dir, sorted(touched))
+
+    manifest.partitions = [f"{table}/{year:04d}-{month:02d}" for table, year, month in sorted(touched)]
+    write_manifest(output_dir, manifest)
+
+    print(f"   ✅ {manifest.inserted} inserted, {manifest.changed} changed, "
+          f"{manifest.closed} closed, {manifest.unchanged} unchanged")
+    return manifest
@@ -0,0 +1,99 @@
+"""
+Persistent extraction state.
+
+Implements the State Manager from docs/extraction_resumability_plan.md: a
+single JSON document with one section per concern (``incremental_watermarks``
+and any other section added by later stages), stored next to the archive in
+``{output_dir}/.baliza/pipeline_state.json``.
+
+Writes go through a temporary file and ``os.replace`` so the state is never
+left half-written. Every update re-reads the file under a lock held across
+threads and processes (a lease on the output directory, see leases.py), so
+concurrent writers never drop each other's keys.
+"""
+
+import json
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Set
+
+from .leases import try_lease
+
+STATE_VERSION = "1.0"
+STATE_LEASE = "pipeline_state"
+EMPTY_SHARDS = "empty_shards"
+
+_lock = threading.Lock()
+
+
+class StateManager:
+    """Read/write access to the pipeline state file of an output directory."""
+
+    def __init__(self, output_dir: str = "data"):
+        self.path = Path(output_dir) / ".baliza" / "pipeline_state.json"
+
+    def load_state(self) -> Dict[str, Any]:
+        """Read the state file (an empty state if it does not exist yet)."""
+        if not self.path.exists():
+            return {"version": STATE_VERSION}
+
+        with self.path.open(encoding="utf-8") as f:
+            return json.load(f)
+
+    def save_state(self, state: Dict[str, Any]):
+        """Atomically write the whole state document."""
+        state["version"] = STATE_VERSION
+        state["last_updated"] = datetime.now(timezone.utc).isoformat()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f".{self.path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with tmp_path.open("w", encoding="utf-8") as f:
+            json.dump(state, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def get(self, section: str, key: str, default: Any = None) -> Any:
+        return self.load_state().get(section, {}).get(key, default)
+
+    def get_section(self, section: str) -> Dict[str, Any]:
+        return self.load_state().get(section, {})
+
+    def set(self, section: str, key: str, value: Any):
+        """Set one key of a section (``None`` removes it)."""
+        self.update(section, {key: value})
+
+    def update(self, section: str, values: Dict[str, Any]):
+        """Set several keys of a section in one write (``None`` values remove keys)."""
+        with _lock, try_lease(str(self.path.parent.parent), STATE_LEASE, blocking=True):
+            state = self.load_state()
+            entries = state.setdefault(section, {})
+            for key, value in values.items():
+                if value is None:
+                    entries.pop(key, None)
+                else:
+                    entries[key] = value
+            self.save_state(state)
+
+    # Watermarks for change-data-capture endpoints (YYYYMMDD of the last synced day)
+
+    def get_watermark(self, name: str) -> Optional[str]:
+        return self.get("incremental_watermarks", name)
+
+    def set_watermark(self, name: str, value: str):
+        self.set("incremental_watermarks", name, value)
+
+    # Negative cache: shards ("endpoint|YYYY-MM|modalidade") of closed windows
+    # the API reported empty, with the time they were last checked
+
+    def mark_empty_shards(self, keys: Iterable[str]):
+        checked_at = datetime.now(timezone.utc).isoformat()
+        self.update(EMPTY_SHARDS, {key: checked_at for key in keys})
+
+    def clear_empty_shards(self, keys: Iterable[str]):
+        self.update(EMPTY_SHARDS, {key: None for key in keys})
+
+    def empty_shards(self, max_age_days: float) -> Set[str]:
+        """Shards found empty less than ``max_age_days`` ago (older ones are revalidated)."""
+        cutoff = (datetime.now(timezone.utc) - timedelta(days=max_age_days)).isoformat()
+        return {key for key, checked_at in self.get_section(EMPTY_SHARDS).items() if checked_at >= cutoff}
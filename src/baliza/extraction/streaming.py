@@ -0,0 +1,288 @@
+"""
+Memory-bounded streaming between fetchers and writers.
+
+Stages that fetch pages themselves (PCA, and anything else built on
+``stream_async``) hand decoded pages to the writer through a
+``SpillingQueue``. The queue is bounded in estimated bytes rather than
+items, so a burst of large pages cannot pile up in RAM:
+
+1. While under ``stream_buffer_bytes`` pages stay in memory.
+2. Past the bound, pages are pickled to a spill file under
+   ``{output}/.baliza/spill`` (up to ``stream_spill_bytes``) and read back
+   in order once the writer catches up.
+3. Past both bounds ``put`` blocks. Fetchers await it before requesting the
+   next page, so a slow writer throttles the HTTP layer instead of growing
+   the heap.
+
+Resident memory above ``memory_alert_threshold`` counts as a full buffer,
+whatever the byte estimate says, so pages spill (or fetchers wait) when the
+process as a whole is under pressure. Peak memory therefore depends on the
+buffer bound, not on how many shards or months are in flight.
+
+Usage:
+    q = SpillingQueue("pca_pages", spill_dir=spill_dir(output_dir))
+    for page in stream_async(lambda q: produce(q), q):
+        write(page)
+"""
+
+import asyncio
+import json
+import pickle
+import struct
+import tempfile
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Awaitable, BinaryIO, Callable, Deque, Iterator, Optional, Tuple, cast
+
+from baliza import metrics
+from baliza.settings import settings
+
+DECODED_OVERHEAD = 4     # Decoded dicts/strs take ~4x their JSON text in CPython
+SAMPLE_RECORDS = 8       # Records serialized to estimate a page's size
+SIZE_SAMPLE_EVERY = 64   # Record-at-a-time buffers re-estimate their record size this often
+PRESSURE_INTERVAL = 0.5  # Seconds between resident-memory checks
+_LENGTH = struct.Struct("<Q")
+
+
+class QueueClosed(Exception):
+    """Raised by ``put`` after an abort and by ``get`` once the queue is closed and drained."""
+
+
+def estimate_bytes(value: Any) -> int:
+    """
+    Approximate in-memory size of decoded JSON.
+
+    Lists are estimated from their first few items, so a page of records
+    costs a handful of ``json.dumps`` calls rather than one per record.
+    """
+    if isinstance(value, (list, tuple)):
+        if not value:
+            return 64
+        sample = value[:SAMPLE_RECORDS]
+        sampled = sum(len(json.dumps(item, default=str)) for item in sample)
+        return int(sampled * len(value) / len(sample) * DECODED_OVERHEAD)
+    return len(json.dumps(value, default=str)) * DECODED_OVERHEAD
+
+
+def spill_dir(output_dir: str) -> Path:
+    return Path(settings.stream_spill_dir or Path(output_dir) / ".baliza" / "spill")
+
+
+class MemoryPressure:
+    """Rate-limited check of resident memory against ``memory_alert_threshold``."""
+
+    def __init__(self, threshold: Optional[float] = None, interval: float = PRESSURE_INTERVAL):
+        self.threshold = settings.memory_alert_threshold if threshold is None else threshold
+        self.interval = interval
+        self._checked_at = 0.0
+        self._high = False
+
+    def __call__(self) -> bool:
+        now = time.monotonic()
+        if now - self._checked_at >= self.interval:
+            self._checked_at = now
+            percent = metrics.memory_percent()
+            self._high = percent is not None and percent >= self.threshold
+        return self._high
+
+
+class SpillingQueue:
+    """FIFO queue bounded by estimated bytes that spills to disk before blocking."""
+
+    def __init__(
+        self,
+        name: str,
+        max_bytes: Optional[int] = None,
+        spill_dir: Optional[Path] = None,
+        max_spill_bytes: Optional[int] = None,
+        pressure: Optional[Callable[[], bool]] = None
+    ):
+        """
+        Args:
+            name: Label of the queue metrics
+            max_bytes: In-memory budget (default: settings.stream_buffer_bytes)
+            spill_dir: Directory for the spill file; None disables spilling,
+                so ``put`` blocks as soon as the memory budget is used
+            max_spill_bytes: Spill file budget (default: settings.stream_spill_bytes)
+            pressure: Returns True when memory is short (default: MemoryPressure())
+        """
+        self.name = name
+        self.max_bytes = max_bytes or settings.stream_buffer_bytes
+        self.max_spill_bytes = max_spill_bytes or settings.stream_spill_bytes
+        self.spill_dir = spill_dir
+        self.pressure = pressure or MemoryPressure()
+
+        self.memory_bytes = 0
+        self.peak_bytes = 0
+        self.spilled_items = 0
+        self.spilled_bytes = 0
+        self.blocked_seconds = 0.0
+
+        self._items: Deque[Tuple[Any, int]] = deque()
+        self._spill: Optional[BinaryIO] = None
+        self._spill_pending = 0   # Items in the spill file not read back yet
+        self._read_at = 0
+        self._write_at = 0
+        self._closed = False
+        self._aborted = False
+        self._cond = threading.Condition()
+
+    def __len__(self) -> int:
+        with self._cond:
+            return len(self._items) + self._spill_pending
+
+    def put(self, item: Any, size: Optional[int] = None):
+        """
+        Add ``item``, spilling it to disk or blocking while the queue is full.
+
+        Raises:
+            QueueClosed: The consumer aborted
+        """
+        size = estimate_bytes(item) if size is None else size
+        with self._cond:
+            started = None
+            while True:
+                if self._aborted or self._closed:
+                    raise QueueClosed(self.name)
+                # Once anything is on disk, newer items follow it there to keep FIFO order
+                if not self._spill_pending:
+                    empty = not self._items
+                    if empty or (self.memory_bytes + size <= self.max_bytes and not self.pressure()):
+                        self._push(item, size)
+                        break
+                if self.spill_dir is not None and self._write_at - self._read_at < self.max_spill_bytes:
+                    self._spill_item(item, self.spill_dir)
+                    break
+                started = started or time.perf_counter()
+                self._cond.wait(PRESSURE_INTERVAL)
+            if started:
+                self.blocked_seconds += time.perf_counter() - started
+            self._update_metrics()
+            self._cond.notify_all()
+
+    async def put_async(self, item: Any, size: Optional[int] = None):
+        """``put`` from a coroutine without blocking its event loop."""
+        await asyncio.to_thread(self.put, item, size)
+
+    def get(self) -> Any:
+        """
+        Next item in FIFO order, blocking until one arrives.
+
+        Raises:
+            QueueClosed: The queue is closed and drained
+        """
+        with self._cond:
+            while not self._items and not self._spill_pending:
+                if self._closed or self._aborted:
+                    raise QueueClosed(self.name)
+                self._cond.wait()
+            if self._items:
+                item, size = self._items.popleft()
+                self.memory_bytes -= size
+            else:
+                item = self._unspill_item()
+            self._update_metrics()
+            self._cond.notify_all()
+            return item
+
+    def __iter__(self) -> Iterator[Any]:
+        while True:
+            try:
+                yield self.get()
+            except QueueClosed:
+                return
+
+    def close(self):
+        """No more items will be put; consumers drain what is left."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def abort(self):
+        """Consumer gone: fail pending and future puts and drop the spill file."""
+        with self._cond:
+            self._aborted = True
+            self._items.clear()
+            self.memory_bytes = 0
+            self._spill_pending = 0
+            self._drop_spill()
+            self._update_metrics()
+            self._cond.notify_all()
+
+    def _push(self, item: Any, size: int):
+        self._items.append((item, size))
+        self.memory_bytes += size
+        self.peak_bytes = max(self.peak_bytes, self.memory_bytes)
+
+    def _spill_item(self, item: Any, spill_dir: Path):
+        if self._spill is None:
+            spill_dir.mkdir(parents=True, exist_ok=True)
+            self._spill = tempfile.TemporaryFile(dir=spill_dir, prefix=f"{self.name}-")
+        spill = self._spill
+        payload = pickle.dumps(item, protocol=pickle.HIGHEST_PROTOCOL)
+        spill.seek(self._write_at)
+        spill.write(_LENGTH.pack(len(payload)))
+        spill.write(payload)
+        self._write_at += _LENGTH.size + len(payload)
+        self._spill_pending += 1
+        self.spilled_items += 1
+        self.spilled_bytes += len(payload)
+        metrics.SPILLED_BYTES.inc(len(payload), queue=self.name)
+
+    def _unspill_item(self) -> Any:
+        spill = cast(BinaryIO, self._spill)  # Open while items are spilled
+        spill.seek(self._read_at)
+        (length,) = _LENGTH.unpack(spill.read(_LENGTH.size))
+        item = pickle.loads(spill.read(length))
+        self._read_at += _LENGTH.size + length
+        self._spill_pending -= 1
+        if not self._spill_pending:
+            # Drained: reuse the file from the start
+            spill.truncate(0)
+            self._read_at = self._write_at = 0
+        return item
+
+    def _drop_spill(self):
+        if self._spill is not None:
+            self._spill.close()
+            self._spill = None
+        self._read_at = self._write_at = 0
+
+    def _update_metrics(self):
+        metrics.QUEUE_DEPTH.set(len(self._items) + self._spill_pending, queue=self.name)
+        metrics.QUEUE_BYTES.set(self.memory_bytes, queue=self.name)
+
+
+def stream_async(produce: Callable[[SpillingQueue], Awaitable[None]], pages: SpillingQueue) -> Iterator[Any]:
+    """
+    Run ``produce(pages)`` on a background event loop and yield its items.
+
+    The producer's exception, if any, is re-raised once the items it queued
+    have been consumed. If the consumer stops early the queue is aborted, so
+    producers blocked on a full queue fail with QueueClosed instead of hanging.
+    """
+    errors = []
+
+    def run():
+        try:
+            asyncio.run(produce(pages))
+        except QueueClosed:
+            pass
+        except BaseException as e:
+            errors.append(e)
+        finally:
+            pages.close()
+
+    producer = threading.Thread(target=run, name=f"{pages.name}-fetch", daemon=True)
+    producer.start()
+    try:
+        yield from pages
+    finally:
+        # Unblocks producers if the consumer stopped early; drops the spill file either way
+        pages.abort()
+        producer.join()
+
+    if errors:
+        raise errors[0]
@@ -0,0 +1,253 @@
+"""
+``baliza sync``: keep the archive fresh, refreshing recent data most often.
+
+Late PNCP publications keep landing in past windows, but rarely in old
+ones. Instead of re-fetching a fixed "last 7 days" from cron, the daemon
+refreshes recency tiers on their own cadence:
+
+- ``today``: the current day, every few minutes;
+- ``recent``: the last 30 days, hourly;
+- ``year``: the rest of the last year, weekly;
+- ``archive``: everything older, every few months.
+
+A tier is refreshed in passes: when due, its endpoint-month windows are
+planned and re-fetched one at a time, always working on the most recent
+tier that has windows pending, so a long archive pass never delays the
+``today`` refresh. After each window the ``totalRegistros`` the API just
+reported (see verify.py) are compared with the previous pass; a pass that
+saw changes halves the tier's interval, a quiet one stretches it by half,
+within the tier's bounds. Intervals, last passes and totals are kept in
+the ``sync_schedule`` section of the pipeline state, so tuning survives
+restarts.
+
+The process stays up between cycles: the rate limiter, the pooled HTTP
+session of the REST source (http_client.rest_session), settings and
+imported modules are set up once, so a cycle costs only the requests it
+makes. Amendments to already published records come from ``baliza cdc``.
+"""
+
+import signal
+import threading
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, NotRequired, Optional, Set, Tuple, TypedDict
+
+from baliza.settings import ENDPOINT_CONFIG
+from .http_client import RateLimiter, install_rate_limiter, quota_rate
+from .pipeline import plan_month_windows, run_structured_extraction
+from .state_manager import StateManager
+from .verify import SHARD_TOTALS
+
+SYNC_SCHEDULE = "sync_schedule"
+SYNC_ENDPOINTS = ["contratacoes_publicacao", "contratos", "atas"]
+FIRST_DATE = "20210101"  # PNCP data starts in 2021 (as for backfills)
+
+MINUTE, HOUR, DAY = 60, 3600, 86400
+FASTER = 0.5  # Interval factor after a pass that saw changes
+SLOWER = 1.5  # Interval factor after a quiet pass
+CHANGE_RATE_WEIGHT = 0.3  # Weight of the latest pass in the tier's change rate
+
+
+@dataclass(frozen=True)
+class Tier:
+    """Days ``newest``..``oldest`` ago (None: back to FIRST_DATE), refreshed every ``interval`` seconds."""
+    name: str
+    newest: int
+    oldest: Optional[int]
+    interval: float
+    min_interval: float
+    max_interval: float
+
+    def window(self, today: date) -> Optional[Tuple[str, str]]:
+        end = today - timedelta(days=self.newest)
+        if self.oldest is None:
+            start = datetime.strptime(FIRST_DATE, "%Y%m%d").date()
+        else:
+            start = today - timedelta(days=self.oldest)
+        if start > end:
+            return None
+        return start.strftime("%Y%m%d"), end.strftime("%Y%m%d")
+
+
+class TierSchedule(TypedDict):
+    """A tier's entry in the ``sync_schedule`` state section."""
+    interval: float
+    last_run: NotRequired[str]                 # Start of the last finished pass (ISO)
+    change_rate: NotRequired[Optional[float]]  # Smoothed share of windows that changed per pass
+    totals: Dict[str, int]                     # totalRegistros per window key in the last pass
+
+
+@dataclass
+class TierPass:
+    """A tier pass in progress: its windows and what it observed so far."""
+    started: str
+    windows: Set[str]
+    observed: int = 0
+    changed: int = 0
+    totals: Dict[str, int] = field(default_factory=dict)
+
+
+TIERS = (
+    Tier("today", 0, 0, 5 * MINUTE, 2 * MINUTE, 30 * MINUTE),
+    Tier("recent", 1, 30, HOUR, 15 * MINUTE, 6 * HOUR),
+    Tier("year", 31, 365, 7 * DAY, DAY, 30 * DAY),
+    Tier("archive", 366, None, 90 * DAY, 30 * DAY, 365 * DAY),
+)
+
+
+def window_key(endpoint: str, window_start: str, window_end: str) -> str:
+    return f"{endpoint}|{window_start}|{window_end}"
+
+
+def reported_total(state: StateManager, endpoint: str, window_start: str, since: str) -> Optional[int]:
+    """totalRegistros recorded for the window's month since ``since`` (None if the load recorded none)."""
+    prefix = f"{endpoint}|{window_start[:4]}-{window_start[4:6]}|"
+    totals = [entry["reported"] for key, entry in state.get_section(SHARD_TOTALS).items()
+              if key.startswith(prefix) and entry.get("recorded_at", "") >= since]
+    return sum(totals) if totals else None
+
+
+def tune_interval(tier: Tier, interval: float, observed: int, changed: int) -> float:
+    """Next interval of a tier after a pass comparing ``observed`` windows, ``changed`` of which moved."""
+    if not observed:
+        return interval
+    factor = FASTER if changed else SLOWER
+    return min(tier.max_interval, max(tier.min_interval, interval * factor))
+
+
+class SyncScheduler:
+    """Tier passes, change observations and interval tuning of one output directory."""
+
+    def __init__(self, output_dir: str, endpoints: List[str], tiers=TIERS):
+        self.output_dir = output_dir
+        self.endpoints = endpoints
+        self.tiers = list(tiers)
+        self.state = StateManager(output_dir)
+        self.pending: Dict[str, List[Tuple[str, str, str]]] = {}
+        self.passes: Dict[str, TierPass] = {}
+
+    def schedule(self, tier: Tier) -> TierSchedule:
+        return self.state.get(SYNC_SCHEDULE, tier.name) or TierSchedule(interval=tier.interval, totals={})
+
+    def next_due(self, tier: Tier) -> datetime:
+        schedule = self.schedule(tier)
+        last_run = schedule.get("last_run")
+        if not last_run:
+            return datetime.min.replace(tzinfo=timezone.utc)
+        return datetime.fromisoformat(last_run) + timedelta(seconds=schedule["interval"])
+
+    def _start_pass(self, tier: Tier, now: datetime, today: date) -> bool:
+        span = tier.window(today)
+        windows = plan_month_windows(*span, self.endpoints) if span else []
+        self.passes[tier.name] = TierPass(now.isoformat(), {window_key(*window) for window in windows})
+        self.pending[tier.name] = windows
+        if not windows:
+            self._finish_pass(tier)
+            return False
+        print(f"🗓️  {tier.name}: refreshing {len(windows)} endpoint-months")
+        return True
+
+    def _finish_pass(self, tier: Tier):
+        current = self.passes.pop(tier.name)
+        self.pending.pop(tier.name, None)
+        schedule = self.schedule(tier)
+        interval = tune_interval(tier, schedule["interval"], current.observed, current.changed)
+        rate = schedule.get("change_rate")
+        if current.observed:
+            latest = current.changed / current.observed
+            rate = latest if rate is None else CHANGE_RATE_WEIGHT * latest + (1 - CHANGE_RATE_WEIGHT) * rate
+        self.state.set(SYNC_SCHEDULE, tier.name, TierSchedule(
+            interval=interval,
+            last_run=current.started,
+            change_rate=rate,
+            # Windows that rolled out of the tier are dropped; failed ones keep their last totals
+            totals={**{key: total for key, total in schedule["totals"].items() if key in current.windows},
+                    **current.totals},
+        ))
+        if current.observed:
+            print(f"   {tier.name}: {current.changed}/{current.observed} windows changed, "
+                  f"next pass in {interval / MINUTE:.0f} min")
+
+    def next_window(self, now: datetime, today: date) -> Optional[Tuple[Tier, Tuple[str, str, str]]]:
+        """Most recent tier with work (starting due passes) and its next window."""
+        for tier in self.tiers:
+            if tier.name not in self.pending and now >= self.next_due(tier):
+                if not self._start_pass(tier, now, today):
+                    continue
+            if self.pending.get(tier.name):
+                return tier, self.pending[tier.name].pop(0)
+        return None
+
+    def refresh(self, tier: Tier, window: Tuple[str, str, str]):
+        """Re-fetch one window and compare its reported totals with the previous pass."""
+        endpoint, window_start, window_end = window
+        since = datetime.now(timezone.utc).isoformat()
+        try:
+            run_structured_extraction(window_start, window_end, [endpoint], self.output_dir, skip_completed=False)
+
+            current = self.passes[tier.name]
+            total = reported_total(self.state, endpoint, window_start, since)
+            if total is not None:
+                key = window_key(endpoint, window_start, window_end)
+                previous = self.schedule(tier)["totals"].get(key)
+                current.totals[key] = total
+                if previous is not None:
+                    current.observed += 1
+                    current.changed += total != previous
+        finally:
+            # A failed window is retried by the tier's next pass
+            if not self.pending.get(tier.name):
+                self._finish_pass(tier)
+
+    def seconds_until_due(self, now: datetime) -> float:
+        if any(self.pending.values()):
+            return 0.0
+        return max(0.0, min((self.next_due(tier) - now).total_seconds() for tier in self.tiers))
+
+
+def run_sync(
+    output_dir: str = "data",
+    endpoints: Optional[List[str]] = None,
+    tiers: Optional[List[str]] = None,
+    once: bool = False,
+    max_sleep: float = 5 * MINUTE
+):
+    """
+    Refresh the archive tier by tier until stopped (SIGINT/SIGTERM).
+
+    Args:
+        output_dir: Base output directory
+        endpoints: Date-windowed endpoints to refresh (default: SYNC_ENDPOINTS)
+        tiers: Names of the tiers to run (default: all)
+        once: Run the passes that are due now, then return
+        max_sleep: Longest wait between checks, so the schedule is re-read
+    """
+    endpoints = [e for e in (endpoints or SYNC_ENDPOINTS) if ENDPOINT_CONFIG[e].sync_type == "incremental"]
+    selected = [tier for tier in TIERS if not tiers or tier.name in tiers]
+    scheduler = SyncScheduler(output_dir, endpoints, selected)
+
+    # One limiter and one pooled REST session for every cycle of this process
+    install_rate_limiter(RateLimiter(quota_rate()))
+
+    stop = threading.Event()
+    if threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGTERM, lambda *_: stop.set())
+
+    print(f"🔁 Syncing {', '.join(endpoints)} ({', '.join(tier.name for tier in selected)})")
+    try:
+        while not stop.is_set():
+            now = datetime.now(timezone.utc)
+            work = scheduler.next_window(now, date.today())
+            if work is not None:
+                tier, window = work
+                try:
+                    scheduler.refresh(tier, window)
+                except Exception as e:
+                    print(f"⚠️  {tier.name} {window[0]} {window[1][:6]}: {e}")
+                continue
+            if once:
+                break
+            stop.wait(min(max_sleep, scheduler.seconds_until_due(now)))
+    except KeyboardInterrupt:
+        pass
+    print("⏹️  Sync stopped")
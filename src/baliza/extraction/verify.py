@@ -0,0 +1,330 @@
+"""
+Completeness verification against API-reported totals.
+
+Every page of a PNCP listing carries ``totalRegistros``: the number of
+records the API holds for that query. ``totals_hook`` captures it from the
+first page of each shard (endpoint × month × modalidade) during extraction,
+and the totals are kept in the pipeline state (``shard_totals``).
+
+Checks:
+
+- After each month load, ``check_window`` compares the rows dlt wrote with
+  the reported totals. A short month (e.g. pages that came back empty and
+  ended pagination early) is not marked ``.completed`` and is queued for
+  re-fetch instead.
+- ``verify_archive`` (``baliza verify``) re-checks the whole archive in
+  parallel: distinct natural keys per partition and modalidade (rows after
+  dedup) against the reported totals, plus SHA-256 checksums of every
+  Parquet file against ``.baliza/checksums.json`` to catch files whose
+  content changed behind an unchanged size and mtime.
+
+Mismatched shards go to the ``refetch_queue`` state section;
+``run_refetch_queue`` re-extracts just those endpoint-months (and
+modalidades) rather than the whole archive.
+"""
+
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from baliza.storage.layout import NATURAL_KEY_COLUMN, list_partitions
+from .state_manager import StateManager
+
+SHARD_TOTALS = "shard_totals"
+REFETCH_QUEUE = "refetch_queue"
+MODALIDADE_PARAM = "codigoModalidadeContratacao"
+MODALIDADE_COLUMN = "modalidade_id"  # dlt's snake_case of modalidadeId
+HASH_CHUNK = 1024 * 1024
+
+
+@dataclass
+class ShardCheck:
+    """Reported vs archived rows of one endpoint-month (or modalidade within it)."""
+    endpoint: str
+    month: str               # YYYY-MM
+    modalidade: str          # "" for endpoints without modalidade
+    reported: int
+    archived: int
+
+    @property
+    def status(self) -> str:
+        if self.archived < self.reported:
+            return "missing"
+        if self.archived > self.reported:
+            return "extra"     # Published after the extraction, or loaded by CDC
+        return "ok"
+
+
+@dataclass
+class VerifyResult:
+    """Outcome of ``verify_archive``."""
+    checks: List[ShardCheck]
+    files: int = 0
+    corrupt: List[str] = field(default_factory=list)  # Files whose checksum changed (relative paths)
+    unverified_months: int = 0                        # Partitions with no recorded totals
+
+    @property
+    def missing(self) -> List[ShardCheck]:
+        return [check for check in self.checks if check.status == "missing"]
+
+
+def shard_key(endpoint: str, month: str, modalidade: str = "") -> str:
+    return f"{endpoint}|{month}|{modalidade}"
+
+
+def totals_hook(totals: Dict[str, int]) -> Callable:
+    """
+    dlt ``response_actions`` hook storing ``totalRegistros`` per modalidade.
+
+    Only first pages are decoded; ``totals`` maps the modalidade of the
+    request ("" when the endpoint has none) to the reported total.
+    """
+    def capture(response, *args, **kwargs):
+        if response.status_code == 200:
+            params = parse_qs(urlparse(str(response.url)).query)
+            if params.get("pagina", ["1"])[0] == "1":
+                try:
+                    total = response.json().get("totalRegistros")
+                except ValueError:
+                    total = None
+                if total is not None:
+                    totals[params.get(MODALIDADE_PARAM, [""])[0]] = int(total)
+        elif response.status_code == 204:
+            # PNCP answers 204 for windows without records
+            params = parse_qs(urlparse(str(response.url)).query)
+            totals.setdefault(params.get(MODALIDADE_PARAM, [""])[0], 0)
+        return response
+
+    return capture
+
+
+def normalized_rows(pipeline, table: str) -> Optional[int]:
+    """Rows of ``table`` in the last normalize step of a dlt pipeline (None if unknown)."""
+    try:
+        return pipeline.last_trace.last_normalize_info.row_counts.get(table, 0)
+    except AttributeError:
+        return None
+
+
+def check_window(
+    state: StateManager,
+    endpoint: str,
+    month: str,
+    totals: Dict[str, int],
+    loaded_rows: Optional[int]
+) -> bool:
+    """
+    Record the reported totals of a freshly loaded month and compare.
+
+    Args:
+        loaded_rows: Rows dlt wrote to the endpoint's table (None if unknown)
+
+    Returns:
+        True if the month looks complete (no reported total is larger than
+        what was loaded); False queues it for re-fetch
+    """
+    recorded_at = datetime.now(timezone.utc).isoformat()
+    state.update(SHARD_TOTALS, {
+        shard_key(endpoint, month, modalidade): {"reported": total, "recorded_at": recorded_at}
+        for modalidade, total in totals.items()
+    })
+
+    reported = sum(totals.values())
+    if loaded_rows is None or loaded_rows >= reported:
+        state.set(REFETCH_QUEUE, shard_key(endpoint, month), None)
+        return True
+
+    print(f"⚠️  {endpoint} {month}: API reports {reported} records, {loaded_rows} loaded - queued for re-fetch")
+    queue_refetch(state, [ShardCheck(endpoint, month, "", reported, loaded_rows)])
+    return False
+
+
+def queue_refetch(state: StateManager, checks: List[ShardCheck]):
+    """Add shards to the re-fetch queue, one entry per endpoint-month."""
+    queued = state.get_section(REFETCH_QUEUE)
+    entries: Dict[str, dict] = {}
+    for check in checks:
+        key = shard_key(check.endpoint, check.month)
+        entry = entries.get(key) or dict(queued.get(key, {}), modalidades=[])
+        entry.update(
+            endpoint=check.endpoint,
+            month=check.month,
+            queued_at=datetime.now(timezone.utc).isoformat(),
+            attempts=queued.get(key, {}).get("attempts", 0),
+        )
+        if check.modalidade and check.modalidade not in entry["modalidades"]:
+            entry["modalidades"].append(check.modalidade)
+        entries[key] = entry
+    state.update(REFETCH_QUEUE, entries)
+
+
+def checksums_path(output_dir: str) -> Path:
+    return Path(output_dir) / ".baliza" / "checksums.json"
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(HASH_CHUNK):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _archived_counts(files: List[Path]) -> Dict[str, int]:
+    """Distinct natural keys per modalidade ("" when there is no modalidade column) in one partition."""
+    import pyarrow.dataset as ds
+
+    dataset = ds.dataset([str(f) for f in files], format="parquet")
+    names = set(dataset.schema.names)
+    key = NATURAL_KEY_COLUMN if NATURAL_KEY_COLUMN in names else None
+    group = MODALIDADE_COLUMN if MODALIDADE_COLUMN in names else None
+
+    if key is None:
+        # Written before natural keys existed: rows as stored
+        if group is None:
+            return {"": dataset.count_rows()}
+        counts = dataset.to_table(columns=[group]).group_by(group).aggregate([(group, "count")])
+        return {str(m): n for m, n in zip(counts[group].to_pylist(), counts[f"{group}_count"].to_pylist())}
+
+    table = dataset.to_table(columns=[c for c in (key, group) if c])
+    if group is None:
+        return {"": len(set(table[key].to_pylist()))}
+    counts = table.group_by(group).aggregate([(key, "count_distinct")])
+    return {str(m): n for m, n in zip(counts[group].to_pylist(), counts[f"{key}_count_distinct"].to_pylist())}
+
+
+def verify_archive(
+    output_dir: str,
+    endpoints: Optional[List[str]] = None,
+    workers: Optional[int] = None,
+    checksums: bool = True,
+    queue: bool = True
+) -> VerifyResult:
+    """
+    Compare archived rows with recorded ``totalRegistros`` and checksum files.
+
+    Args:
+        output_dir: Base output directory
+        endpoints: Endpoints to check (default: every endpoint with recorded totals)
+        workers: Threads counting partitions and hashing files (default: min(32, 4 × CPUs))
+        checksums: Hash every Parquet file against the checksum manifest
+        queue: Add missing shards to the re-fetch queue
+
+    Returns:
+        Per-shard checks, corrupt files and partitions without totals
+    """
+    state = StateManager(output_dir)
+    reported: Dict[Tuple[str, str], Dict[str, int]] = {}
+    for key, entry in state.get_section(SHARD_TOTALS).items():
+        endpoint, month, modalidade = key.split("|")
+        if not endpoints or endpoint in endpoints:
+            reported.setdefault((endpoint, month), {})[modalidade] = entry["reported"]
+
+    tables = sorted({endpoint for endpoint, _ in reported} | set(endpoints or []))
+    partitions = {(p.table, p.key): p for table in tables for p in list_partitions(output_dir, table)}
+    workers = workers or min(32, 4 * (os.cpu_count() or 1))
+    root = Path(output_dir)
+
+    manifest: Dict[str, list] = {}
+    if checksums:
+        try:
+            manifest = json.loads(checksums_path(output_dir).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            manifest = {}
+
+    def count(shard: Tuple[str, str]) -> Tuple[Tuple[str, str], Dict[str, int]]:
+        partition = partitions.get(shard)
+        return shard, _archived_counts(partition.files) if partition else {}
+
+    def checksum(path: Path) -> Tuple[str, list]:
+        stat = path.stat()
+        return path.relative_to(root).as_posix(), [stat.st_size, stat.st_mtime_ns, file_sha256(path)]
+
+    files = [path for partition in partitions.values() for path in partition.files]
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="baliza-verify") as pool:
+        counted = dict(pool.map(count, sorted(reported)))
+        hashed = dict(pool.map(checksum, files)) if checksums else {}
+
+    checks = []
+    for (endpoint, month), totals in sorted(reported.items()):
+        archived = counted[(endpoint, month)]
+        if set(totals) == {""} or set(archived) == {""}:
+            # Compare the month as a whole when either side is not split by modalidade
+            totals = {"": sum(totals.values())}
+            archived = {"": sum(archived.values())}
+        for modalidade, total in sorted(totals.items()):
+            checks.append(ShardCheck(endpoint, month, modalidade, total, archived.get(modalidade, 0)))
+
+    corrupt = []
+    for key, (size, mtime_ns, digest) in hashed.items():
+        previous = manifest.get(key)
+        # Same size and mtime but different bytes: changed behind the writer's back
+        if previous and previous[:2] == [size, mtime_ns] and previous[2] != digest:
+            corrupt.append(key)
+    if checksums:
+        manifest.update(hashed)
+        path = checksums_path(output_dir)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".json.tmp")
+        tmp_path.write_text(json.dumps(manifest, separators=(",", ":")), encoding="utf-8")
+        os.replace(tmp_path, path)
+
+    result = VerifyResult(
+        checks=checks,
+        files=len(files),
+        corrupt=sorted(corrupt),
+        unverified_months=len(set(partitions) - set(reported)),
+    )
+    if queue:
+        queue_refetch(state, result.missing + [_file_shard(key) for key in corrupt])
+    return result
+
+
+def _file_shard(key: str) -> ShardCheck:
+    """Shard of an archive file (``pncp_raw/{table}/year=YYYY/month=MM/...``), to re-fetch it whole."""
+    _, table, year, month = key.split("/")[:4]
+    return ShardCheck(table, f"{year.split('=')[1]}-{month.split('=')[1]}", "", 0, 0)
+
+
+def run_refetch_queue(output_dir: str, limit: Optional[int] = None) -> Tuple[int, int]:
+    """
+    Re-extract the queued endpoint-months.
+
+    Months still short after the re-fetch are re-queued by the load itself
+    (see ``check_window``) with their attempt count raised.
+
+    Returns:
+        (months re-fetched, months still queued)
+    """
+    from calendar import monthrange
+    from .pipeline import run_structured_extraction
+
+    state = StateManager(output_dir)
+    queued = sorted(state.get_section(REFETCH_QUEUE).items(), key=lambda item: item[1]["queued_at"])
+    for key, entry in queued[:limit]:
+        year, month = int(entry["month"][:4]), int(entry["month"][5:7])
+        start = f"{year:04d}{month:02d}01"
+        end = f"{year:04d}{month:02d}{monthrange(year, month)[1]:02d}"
+        modalidades = [int(m) for m in entry.get("modalidades", [])] or None
+
+        state.update(REFETCH_QUEUE, {key: dict(entry, attempts=entry.get("attempts", 0) + 1)})
+        run_structured_extraction(start, end, [entry["endpoint"]], output_dir,
+                                  skip_completed=False, modalidades=modalidades)
+
+    return len(queued[:limit]), len(state.get_section(REFETCH_QUEUE))
+
+
+def report(result: VerifyResult) -> Dict[str, object]:
+    """JSON-serializable summary of a verification."""
+    return {
+        "files": result.files,
+        "corrupt": result.corrupt,
+        "unverified_months": result.unverified_months,
+        "checks": [dict(asdict(check), status=check.status) for check in result.checks],
+    }
@@ -0,0 +1,395 @@
+"""
+Coordinator-free work queue on a shared output directory.
+
+Splits a backfill between machines that mount the same output root (NFS,
+SMB, a shared volume) without any service to coordinate them. The queue is
+plain files under ``{output_dir}/.baliza/queue``:
+
+- ``tasks/{id}.json``: one endpoint-month window, written once by whoever
+  enqueues it first;
+- ``claims/{id}.json``: the worker holding the task and when its lease
+  expires; created with ``link()``, so exactly one worker wins a claim;
+- ``done/{id}.json`` / ``failed/{id}.json``: outcome of the task.
+
+Workers renew their leases with a heartbeat while they work. A claim whose
+lease expired (crashed or partitioned worker) is broken by renaming it
+away, which only one contender can do, and the task is claimed again; the
+reclaim counts as an attempt, so a task that keeps killing its workers ends
+in ``failed/`` after ``max_attempts``.
+
+Leases compare wall-clock timestamps across machines: keep clocks in sync
+(NTP) and the lease far longer than their skew. A worker that lost its
+lease while still running only repeats idempotent work: loads are published
+per shard (workspace.py), deduplicated by natural key and marked complete
+once.
+
+Usage:
+    WorkQueue(output_dir).enqueue(plan_month_windows(start, end, endpoints))
+    run_worker(output_dir)        # on every node, as many as wanted
+"""
+
+import contextlib
+import json
+import multiprocessing
+import os
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+DEFAULT_LEASE_SECONDS = 600
+DEFAULT_POLL_SECONDS = 30
+MAX_ATTEMPTS = 3
+
+
+def queue_dir(output_dir: str) -> Path:
+    return Path(output_dir) / ".baliza" / "queue"
+
+
+def task_id(endpoint: str, window_start: str) -> str:
+    return f"{endpoint}__{window_start[:4]}-{window_start[4:6]}"
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
+
+def _read(path: Path) -> Optional[Dict[str, Any]]:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def _create(path: Path, data: Dict[str, Any]) -> bool:
+    """Write ``path`` only if it does not exist yet; False when someone else created it."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+    tmp_path.write_text(json.dumps(data), encoding="utf-8")
+    try:
+        # link() publishes the complete file or fails if it exists (atomic on NFS too)
+        os.link(tmp_path, path)
+    except FileExistsError:
+        return False
+    finally:
+        tmp_path.unlink(missing_ok=True)
+    return True
+
+
+def _write(path: Path, data: Dict[str, Any]):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+    tmp_path.write_text(json.dumps(data), encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
+@dataclass
+class Task:
+    """One endpoint-month window of the backfill."""
+    id: str
+    endpoint: str
+    window_start: str
+    window_end: str
+    attempts: int = 0
+
+
+class WorkQueue:
+    """Tasks, claims and outcomes of the queue of one output directory."""
+
+    def __init__(
+        self,
+        output_dir: str,
+        worker_id: Optional[str] = None,
+        lease_seconds: float = DEFAULT_LEASE_SECONDS,
+        max_attempts: int = MAX_ATTEMPTS
+    ):
+        self.root = queue_dir(output_dir)
+        self.worker_id = worker_id or default_worker_id()
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+
+    def _path(self, kind: str, tid: str) -> Path:
+        return self.root / kind / f"{tid}.json"
+
+    def _finished(self, tid: str) -> bool:
+        return self._path("done", tid).exists() or self._path("failed", tid).exists()
+
+    def enqueue(self, windows: Iterable[Tuple[str, str, str]]) -> int:
+        """
+        Add (endpoint, window_start, window_end) windows; already queued ones are kept as they are.
+
+        Returns:
+            Number of new tasks
+        """
+        added = 0
+        for endpoint, window_start, window_end in windows:
+            tid = task_id(endpoint, window_start)
+            task = {"id": tid, "endpoint": endpoint, "window_start": window_start,
+                    "window_end": window_end, "attempts": 0}
+            added += _create(self._path("tasks", tid), task)
+        return added
+
+    def _lease(self) -> Dict[str, Any]:
+        return {"worker": self.worker_id, "host": socket.gethostname(), "pid": os.getpid(),
+                "expires_at": time.time() + self.lease_seconds}
+
+    def _break_expired(self, tid: str) -> bool:
+        """Remove an expired claim; only one contender succeeds."""
+        claim_path = self._path("claims", tid)
+        broken = claim_path.with_name(f".{claim_path.name}.{self.worker_id}.broken")
+        try:
+            os.rename(claim_path, broken)
+        except FileNotFoundError:
+            return True  # Released (or broken by someone else) meanwhile
+        except OSError:
+            return False
+
+        claim = _read(broken) or {}
+        if claim.get("expires_at", 0) >= time.time():
+            # Renewed between our check and the rename: hand it back
+            with contextlib.suppress(OSError):
+                os.link(broken, claim_path)
+            broken.unlink(missing_ok=True)
+            return False
+        broken.unlink(missing_ok=True)
+
+        # An expired lease counts as a failed attempt
+        task = _read(self._path("tasks", tid))
+        if task is not None:
+            task["attempts"] = task.get("attempts", 0) + 1
+            _write(self._path("tasks", tid), task)
+            if task["attempts"] >= self.max_attempts:
+                _create(self._path("failed", tid), {**task, "error": f"lease of {claim.get('worker')} expired"})
+                return False
+        return True
+
+    def claim(self) -> Optional[Task]:
+        """Lease the first task nobody holds (or whose lease expired); None when there is none."""
+        tasks = self.root / "tasks"
+        if not tasks.exists():
+            return None
+
+        for path in sorted(tasks.glob("*.json")):
+            tid = path.stem
+            if self._finished(tid):
+                continue
+            claim_path = self._path("claims", tid)
+            claim = _read(claim_path)
+            if claim_path.exists():
+                if claim is not None and claim.get("expires_at", 0) >= time.time():
+                    continue
+                if not self._break_expired(tid):
+                    continue
+            if not _create(claim_path, self._lease()):
+                continue
+            if self._finished(tid):  # Completed between our check and the claim
+                claim_path.unlink(missing_ok=True)
+                continue
+            task = _read(path)
+            if task is None:
+                claim_path.unlink(missing_ok=True)
+                continue
+            return Task(**{key: task[key] for key in ("id", "endpoint", "window_start", "window_end")},
+                        attempts=task.get("attempts", 0))
+        return None
+
+    def owns(self, task: Task) -> bool:
+        claim = _read(self._path("claims", task.id))
+        return claim is not None and claim.get("worker") == self.worker_id
+
+    def heartbeat(self, task: Task) -> bool:
+        """Extend the lease on ``task``; False once another worker took it over."""
+        if not self.owns(task):
+            return False
+        _write(self._path("claims", task.id), self._lease())
+        return True
+
+    def _release(self, task: Task):
+        if self.owns(task):
+            self._path("claims", task.id).unlink(missing_ok=True)
+
+    def complete(self, task: Task, loads: int = 0):
+        """Record the task as done (the output is already published) and drop the claim."""
+        _write(self._path("done", task.id), {"id": task.id, "worker": self.worker_id,
+                                               "loads": loads, "finished_at": time.time()})
+        self._release(task)
+
+    def fail(self, task: Task, error: str):
+        """Give the task back for another attempt, or move it to failed/ after ``max_attempts``."""
+        record = _read(self._path("tasks", task.id)) or {}
+        record["attempts"] = record.get("attempts", task.attempts) + 1
+        record["last_error"] = error
+        _write(self._path("tasks", task.id), record)
+        if record["attempts"] >= self.max_attempts:
+            _write(self._path("failed", task.id), {**record, "worker": self.worker_id})
+        self._release(task)
+
+    def counts(self) -> Dict[str, int]:
+        """Tasks per state: pending, claimed (live lease), expired, done, failed."""
+        counts = {"pending": 0, "claimed": 0, "expired": 0, "done": 0, "failed": 0}
+        now = time.time()
+        for path in sorted((self.root / "tasks").glob("*.json")):
+            tid = path.stem
+            if self._path("done", tid).exists():
+                counts["done"] += 1
+            elif self._path("failed", tid).exists():
+                counts["failed"] += 1
+            else:
+                claim = _read(self._path("claims", tid))
+                if claim is None:
+                    counts["pending"] += 1
+                elif claim.get("expires_at", 0) >= now:
+                    counts["claimed"] += 1
+                else:
+                    counts["expired"] += 1
+        return counts
+
+    def drained(self) -> bool:
+        counts = self.counts()
+        return counts["pending"] + counts["claimed"] + counts["expired"] == 0
+
+
+@contextlib.contextmanager
+def _heartbeat(queue: WorkQueue, task: Task) -> Iterator[None]:
+    """Renew the lease on ``task`` in the background while the block runs."""
+    stop = threading.Event()
+
+    def beat():
+        while not stop.wait(queue.lease_seconds / 3):
+            if not queue.heartbeat(task):
+                print(f"⚠️  Lease on {task.id} taken over by another worker")
+                return
+
+    thread = threading.Thread(target=beat, name=f"heartbeat-{task.id}", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def enqueue_backfill(
+    output_dir: str,
+    start_date: Optional[str],
+    end_date: Optional[str],
+    endpoints: List[str],
+    skip_completed: bool = True
+) -> int:
+    """Queue the month windows of a backfill (the same plan ``baliza extract`` runs)."""
+    from baliza.utils.completion_tracking import is_extraction_completed
+    from .pipeline import plan_month_windows
+
+    windows = plan_month_windows(start_date, end_date, endpoints)
+    if skip_completed:
+        windows = [
+            (endpoint, window_start, window_end) for endpoint, window_start, window_end in windows
+            if not is_extraction_completed(output_dir, endpoint, f"{window_start[:4]}-{window_start[4:6]}")
+        ]
+    return WorkQueue(output_dir).enqueue(windows)
+
+
+def run_worker(
+    output_dir: str,
+    worker_id: Optional[str] = None,
+    lease_seconds: float = DEFAULT_LEASE_SECONDS,
+    poll_seconds: float = DEFAULT_POLL_SECONDS,
+    max_tasks: Optional[int] = None
+) -> Tuple[int, int]:
+    """
+    Work through the queue until every task is done or failed.
+
+    While other workers still hold leases, the worker polls: their tasks
+    come back to the queue if those leases expire.
+
+    Args:
+        output_dir: Shared output root holding the queue and the archive
+        worker_id: Name in claims and results (default: host-pid-random)
+        lease_seconds: Lease length; renewed every third of it
+        poll_seconds: Wait between claims while only leased tasks remain
+        max_tasks: Stop after this many tasks
+
+    Returns:
+        (tasks completed, tasks failed) by this worker
+    """
+    from baliza.utils.completion_tracking import is_extraction_completed
+    from .pipeline import run_structured_extraction
+
+    queue = WorkQueue(output_dir, worker_id, lease_seconds)
+    completed = failed = 0
+    while max_tasks is None or completed + failed < max_tasks:
+        task = queue.claim()
+        if task is None:
+            if queue.drained():
+                break
+            time.sleep(poll_seconds)
+            continue
+
+        print(f"🔧 {queue.worker_id}: {task.id} (attempt {task.attempts + 1})")
+        try:
+            with _heartbeat(queue, task):
+                results = run_structured_extraction(
+                    task.window_start, task.window_end, [task.endpoint], output_dir, skip_completed=True
+                )
+        except Exception as e:
+            print(f"⚠️  {task.id}: {e}")
+            queue.fail(task, str(e))
+            failed += 1
+            continue
+        # Short of totalRegistros (left unmarked) or deferred to another run's lease: not done yet
+        if not is_extraction_completed(output_dir, task.endpoint, f"{task.window_start[:4]}-{task.window_start[4:6]}"):
+            print(f"⏳ {task.id}: month not completed, back to the queue")
+            queue.fail(task, "incomplete")
+            failed += 1
+            continue
+        queue.complete(task, len(results or []))
+        completed += 1
+
+    print(f"✅ {queue.worker_id}: {completed} tasks done, {failed} failed")
+    return completed, failed
+
+
+def _init_worker(limiter, overrides: Dict[str, Any]):
+    from baliza.settings import settings
+    from .http_client import install_rate_limiter
+
+    for name, value in overrides.items():
+        setattr(settings, name, value)
+    install_rate_limiter(limiter)
+
+
+def run_workers(
+    output_dir: str,
+    processes: int,
+    lease_seconds: float = DEFAULT_LEASE_SECONDS,
+    poll_seconds: float = DEFAULT_POLL_SECONDS
+) -> Tuple[int, int]:
+    """
+    Run ``processes`` queue workers on this machine.
+
+    They share one rate limiter (see parallel.py); workers on other
+    machines spend their own quota.
+
+    Returns:
+        (tasks completed, tasks failed) by these workers
+    """
+    from baliza.settings import settings
+    from .http_client import SharedRateLimiter, quota_rate
+
+    context = multiprocessing.get_context("spawn")
+    limiter = SharedRateLimiter(quota_rate(), context=context)
+    prefix = default_worker_id()
+    with ProcessPoolExecutor(
+        max_workers=processes, mp_context=context,
+        initializer=_init_worker, initargs=(limiter, settings.model_dump())
+    ) as pool:
+        futures = [
+            pool.submit(run_worker, output_dir, f"{prefix}-{n}", lease_seconds, poll_seconds)
+            for n in range(processes)
+        ]
+        outcomes = [future.result() for future in futures]
+    return sum(done for done, _ in outcomes), sum(failed for _, failed in outcomes)
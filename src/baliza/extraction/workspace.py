@@ -0,0 +1,178 @@
+"""
+Isolated dlt working directories per shard.
+
+A single ``baliza_pncp`` pipeline shares one dlt state and working
+directory, so concurrent loads (threads, processes, overlapping runs)
+corrupt it or serialize on it. ``shard_pipeline`` gives every load its own
+context instead:
+
+- a uniquely named pipeline whose working directory lives under
+  ``{output}/.baliza/pipelines/{name}``;
+- a private staging bucket ``{output}/.baliza/staging/{name}`` the
+  filesystem destination writes to.
+
+When the load succeeds, ``publish`` moves the staged files into the shared
+archive with ``os.replace``: data files first, dlt's ``_dlt_loads`` entries
+last, so a load only shows up as committed once its data is in place. A
+failed or interrupted load never leaves partial files in the archive.
+Both directories are removed afterwards; ``collect_garbage`` removes the
+ones left behind by crashed processes.
+
+Usage:
+    with shard_pipeline(output_dir, (2024, 1), "contratos") as pipeline:
+        pipeline.run(source, loader_file_format="parquet")
+"""
+
+import contextlib
+import json
+import os
+import re
+import shutil
+import socket
+import time
+import uuid
+from pathlib import Path
+from typing import Iterator, Optional, Tuple
+
+import dlt
+from dlt.destinations import filesystem
+
+from baliza.storage.layout import DATASET_NAME, PARTITION_LAYOUT, partition_placeholders
+
+OWNER_FILE = "owner.json"
+COMMIT_TABLE = "_dlt_loads"
+GC_MAX_AGE_SECONDS = 24 * 3600  # Leftovers of other hosts are removed after this long
+
+
+def pipelines_dir(output_dir: str) -> Path:
+    return Path(output_dir) / ".baliza" / "pipelines"
+
+
+def staging_dir(output_dir: str) -> Path:
+    return Path(output_dir) / ".baliza" / "staging"
+
+
+def _shard_name(prefix: str, shard: str) -> str:
+    slug = re.sub(r"[^a-z0-9]+", "_", f"{prefix}_{shard}".lower()).strip("_")
+    return f"{slug}_{os.getpid()}_{uuid.uuid4().hex[:8]}"
+
+
+def publish(staging: Path, output_dir: str) -> int:
+    """
+    Move a staged load into the archive (each file atomically).
+
+    Files already present in the archive (dlt's schema/init files) are
+    left alone.
+
+    Returns:
+        Number of files published
+    """
+    source = staging / DATASET_NAME
+    if not source.exists():
+        return 0
+    target = Path(output_dir) / DATASET_NAME
+
+    files = [path for path in source.rglob("*") if path.is_file()]
+    # The load is committed by its _dlt_loads entry, so that goes last
+    files.sort(key=lambda path: path.relative_to(source).parts[0] == COMMIT_TABLE)
+
+    published = 0
+    for path in files:
+        destination = target / path.relative_to(source)
+        if destination.exists():
+            continue
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(path, destination)
+        published += 1
+    return published
+
+
+@contextlib.contextmanager
+def shard_pipeline(
+    output_dir: str,
+    partition: Optional[Tuple[int, int]],
+    shard: str,
+    prefix: str = "baliza"
+) -> Iterator["dlt.Pipeline"]:
+    """
+    dlt pipeline with its own working directory and staging bucket.
+
+    Args:
+        output_dir: Archive the load is published into
+        partition: (year, month) the files belong to (see create_default_pipeline)
+        shard: Shard description used in the pipeline name, e.g. "contratos_2024_01"
+        prefix: Pipeline name prefix, e.g. per stage ("baliza_replay")
+
+    Yields:
+        The pipeline; its files are published when the block exits cleanly
+    """
+    name = _shard_name(prefix, shard)
+    staging = staging_dir(output_dir) / name
+    staging.mkdir(parents=True, exist_ok=True)
+    (staging / OWNER_FILE).write_text(
+        json.dumps({"host": socket.gethostname(), "pid": os.getpid(), "shard": shard}), encoding="utf-8"
+    )
+
+    layout = PARTITION_LAYOUT if partition else "{table_name}/{load_id}"
+    placeholders = partition_placeholders(*partition) if partition else None
+    pipeline = dlt.pipeline(
+        pipeline_name=name,
+        pipelines_dir=str(pipelines_dir(output_dir)),
+        destination=filesystem(bucket_url=str(staging), layout=layout, extra_placeholders=placeholders),
+        dataset_name=DATASET_NAME,
+    )
+    try:
+        yield pipeline
+        publish(staging, output_dir)
+    finally:
+        # Staging goes last: collect_garbage finds leftovers through it
+        shutil.rmtree(pipelines_dir(output_dir) / name, ignore_errors=True)
+        shutil.rmtree(staging, ignore_errors=True)
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def collect_garbage(output_dir: str, max_age_seconds: float = GC_MAX_AGE_SECONDS) -> int:
+    """
+    Remove working and staging directories of loads that can no longer finish.
+
+    A directory is garbage when its process is gone (same host) or, for
+    other hosts sharing the output directory, once it is older than
+    ``max_age_seconds``. Their staged files were never published, so the
+    shards they belonged to are still unmarked and get re-fetched.
+
+    Returns:
+        Number of shard workspaces removed
+    """
+    root = staging_dir(output_dir)
+    if not root.exists():
+        return 0
+
+    host = socket.gethostname()
+    removed = 0
+    for staging in root.iterdir():
+        try:
+            try:
+                owner = json.loads((staging / OWNER_FILE).read_text(encoding="utf-8"))
+                age = time.time() - (staging / OWNER_FILE).stat().st_mtime
+            except (OSError, ValueError):
+                owner, age = {}, time.time() - staging.stat().st_mtime
+            if owner.get("host") == host and owner.get("pid"):
+                stale = not _alive(int(owner["pid"]))
+            else:
+                stale = age > max_age_seconds
+            if stale:
+                shutil.rmtree(staging, ignore_errors=True)
+                shutil.rmtree(pipelines_dir(output_dir) / staging.name, ignore_errors=True)
+                removed += 1
+        except FileNotFoundError:
+            continue  # Published or collected by another process meanwhile
+    return removed
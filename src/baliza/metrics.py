@@ -0,0 +1,424 @@
+"""
+Prometheus/OpenMetrics metrics for extraction runs.
+
+A small in-process registry (no client library needed) collects request
+latency per endpoint, HTTP statuses, retries, bytes, pages and records,
+rate-limiter waits, queue depths, rows written per partition, and process
+CPU/RSS (on Unix). Updates are a dict increment under a lock, so they are always on.
+
+Exposition:
+- textfile: ``write_textfile(path)`` writes the Prometheus text format
+  atomically, for node_exporter's textfile collector (cron runs);
+- HTTP: ``serve(port)`` answers ``/metrics`` from a background thread,
+  in OpenMetrics when the scraper asks for it.
+
+``metrics_run`` wraps a CLI command: it serves/flushes while the command
+runs, then records duration and outcome, checks ``cpu_alert_threshold`` /
+``memory_alert_threshold`` and writes the final textfile.
+"""
+
+import bisect
+import contextlib
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, TypeVar
+
+from baliza.settings import settings
+
+try:
+    import resource
+except ImportError:  # Windows: no CPU/RSS process metrics
+    resource = None  # type: ignore[assignment]
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+OPENMETRICS_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+PROMETHEUS_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for v in values)
+    return "{" + ",".join(f'{n}="{v}"' for n, v in zip(names, escaped)) + "}"
+
+
+class Metric:
+    """A metric family: one value per label combination."""
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.values: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labels)
+
+    def samples(self) -> Iterator[Tuple[str, str, float]]:
+        """(suffix, label string, value) of every sample."""
+        with self._lock:
+            items = list(self.values.items())
+        for key, value in sorted(items):
+            yield "", _labels(self.labels, key), value
+
+    def clear(self):
+        with self._lock:
+            self.values.clear()
+
+    def take(self) -> Dict[Tuple[str, ...], Any]:
+        """Values so far, clearing them (what a worker process hands to its parent)."""
+        with self._lock:
+            values, self.values = self.values, {}
+        return values
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self.values[key] = self.values.get(key, 0.0) + amount
+
+    def merge(self, values: Dict[Tuple[str, ...], float]):
+        with self._lock:
+            for key, amount in values.items():
+                self.values[key] = self.values.get(key, 0.0) + amount
+
+    def samples(self):
+        for _, labels, value in super().samples():
+            yield "_total", labels, value
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self.values[self._key(labels)] = value
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self.values.get(key) or ([0] * (len(self.buckets) + 1), 0.0)
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            self.values[key] = (counts, total + value)
+
+    def merge(self, values: Dict[Tuple[str, ...], Tuple[List[int], float]]):
+        with self._lock:
+            for key, (counts, total) in values.items():
+                mine, my_total = self.values.get(key) or ([0] * (len(self.buckets) + 1), 0.0)
+                self.values[key] = ([a + b for a, b in zip(mine, counts)], my_total + total)
+
+    def samples(self):
+        with self._lock:
+            items = [(key, (list(counts), total)) for key, (counts, total) in self.values.items()]
+        for key, (counts, total) in sorted(items):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                yield "_bucket", _labels(self.labels + ("le",), key + (le,)), cumulative
+            yield "_count", _labels(self.labels, key), cumulative
+            yield "_sum", _labels(self.labels, key), total
+
+
+M = TypeVar("M", bound=Metric)
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: List[Metric] = []
+        self.collectors: List[Callable[[], None]] = []
+
+    def register(self, metric: M) -> M:
+        self.metrics.append(metric)
+        return metric
+
+    def render(self, openmetrics: bool = False) -> str:
+        """Exposition text; OpenMetrics names counter families without ``_total`` and ends with ``# EOF``."""
+        for collect in self.collectors:
+            collect()
+        lines = []
+        for metric in self.metrics:
+            family = metric.name if openmetrics or metric.kind != "counter" else f"{metric.name}_total"
+            lines.append(f"# HELP {family} {metric.help}")
+            lines.append(f"# TYPE {family} {metric.kind}")
+            for suffix, labels, value in metric.samples():
+                lines.append(f"{metric.name}{suffix}{labels} {float(value)!r}")
+        if openmetrics:
+            lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "baliza_http_request_duration_seconds", "PNCP API request latency", ["endpoint"]))
+RESPONSES = REGISTRY.register(Counter(
+    "baliza_http_responses", "PNCP API responses by status code", ["endpoint", "status"]))
+RETRIES = REGISTRY.register(Counter(
+    "baliza_http_retries", "Requests retried after a transport error, 429 or 5xx", ["endpoint"]))
+COALESCED = REGISTRY.register(Counter(
+    "baliza_http_coalesced_requests", "Requests answered by an identical request already in flight", ["endpoint"]))
+BYTES = REGISTRY.register(Counter(
+    "baliza_http_received_bytes", "Response body bytes downloaded", ["endpoint"]))
+PAGES = REGISTRY.register(Counter(
+    "baliza_pages", "Response pages processed", ["endpoint"]))
+RECORDS = REGISTRY.register(Counter(
+    "baliza_records", "Records loaded into the archive", ["table"]))
+RATE_LIMIT_WAIT = REGISTRY.register(Counter(
+    "baliza_rate_limiter_wait_seconds", "Time spent waiting for rate limiter tokens"))
+QUEUE_DEPTH = REGISTRY.register(Gauge(
+    "baliza_queue_depth", "Items waiting in a producer/consumer queue", ["queue"]))
+QUEUE_BYTES = REGISTRY.register(Gauge(
+    "baliza_queue_bytes", "Estimated bytes held in memory by a producer/consumer queue", ["queue"]))
+SPILLED_BYTES = REGISTRY.register(Counter(
+    "baliza_queue_spilled_bytes", "Bytes a full queue spilled to disk", ["queue"]))
+ROWS_WRITTEN = REGISTRY.register(Counter(
+    "baliza_rows_written", "Rows written per table and month partition", ["table", "partition"]))
+CPU_SECONDS = REGISTRY.register(Counter(
+    "baliza_process_cpu_seconds", "User + system CPU time of the process"))
+RSS_BYTES = REGISTRY.register(Gauge(
+    "baliza_process_resident_memory_bytes", "Resident set size of the process"))
+CPU_PERCENT = REGISTRY.register(Gauge(
+    "baliza_process_cpu_percent", "CPU use of the process since the run started (100 = one core)"))
+MEMORY_PERCENT = REGISTRY.register(Gauge(
+    "baliza_process_memory_percent", "Resident memory as a share of system memory"))
+ALERTS = REGISTRY.register(Gauge(
+    "baliza_resource_alert", "1 when cpu/memory use crossed the configured alert threshold", ["resource"]))
+RUN_SECONDS = REGISTRY.register(Gauge(
+    "baliza_run_duration_seconds", "Wall time of the last run", ["command"]))
+RUN_SUCCESS = REGISTRY.register(Gauge(
+    "baliza_run_success", "1 if the last run succeeded, 0 otherwise", ["command"]))
+RUN_TIMESTAMP = REGISTRY.register(Gauge(
+    "baliza_run_last_finished_timestamp_seconds", "Unix time the last run finished", ["command"]))
+
+_PROCESS_STARTED = (time.monotonic(), 0.0)
+
+
+def _cpu_seconds() -> Optional[float]:
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def _rss_bytes() -> Optional[int]:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        if resource is None:
+            return None
+        # Peak instead of current RSS where /proc is unavailable (KiB on Linux, bytes on macOS)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _total_memory() -> Optional[int]:
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def memory_percent() -> Optional[float]:
+    """Resident memory of this process as a share of system memory (None if unknown)."""
+    total = _total_memory()
+    rss = _rss_bytes()
+    return 100 * rss / total if total and rss is not None else None
+
+
+def _collect_process():
+    cpu = _cpu_seconds()
+    if cpu is not None:
+        CPU_SECONDS.clear()
+        CPU_SECONDS.inc(cpu)
+        elapsed = time.monotonic() - _PROCESS_STARTED[0]
+        if elapsed > 0:
+            CPU_PERCENT.set(round(100 * (cpu - _PROCESS_STARTED[1]) / elapsed, 2))
+    rss = _rss_bytes()
+    if rss is not None:
+        RSS_BYTES.set(rss)
+        total = _total_memory()
+        if total:
+            MEMORY_PERCENT.set(round(100 * rss / total, 2))
+
+
+REGISTRY.collectors.append(_collect_process)
+
+
+# Instrumentation helpers
+
+def observe_response(endpoint: str, response: Any, seconds: Optional[float] = None):
+    """
+    Record latency, status and bytes of one requests/httpx response.
+
+    Without ``seconds`` the latency is the response's ``elapsed`` (requests);
+    httpx raises on ``elapsed`` until the response is closed, so its callers time the call.
+    """
+    if seconds is None:
+        elapsed = getattr(response, "elapsed", None)
+        seconds = elapsed.total_seconds() if elapsed else 0.0
+    REQUEST_SECONDS.observe(seconds, endpoint=endpoint)
+    RESPONSES.inc(endpoint=endpoint, status=response.status_code)
+    if response.status_code < 300:
+        BYTES.inc(len(response.content or b""), endpoint=endpoint)
+        PAGES.inc(endpoint=endpoint)
+
+
+def response_hook(endpoint: str) -> Callable:
+    """dlt ``response_actions`` hook feeding ``observe_response``."""
+    def observe(response, *args, **kwargs):
+        observe_response(endpoint, response)
+        return response
+
+    return observe
+
+
+def observe_load(pipeline: Any, partition: Optional[Tuple[int, int]] = None):
+    """Count the rows of a finished dlt load per table (from its normalize step)."""
+    try:
+        row_counts = pipeline.last_trace.last_normalize_info.row_counts
+    except AttributeError:
+        return
+    label = f"{partition[0]:04d}-{partition[1]:02d}" if partition else ""
+    for table, rows in row_counts.items():
+        if table.startswith("_dlt"):
+            continue
+        ROWS_WRITTEN.inc(rows, table=table, partition=label)
+        if "__" not in table:
+            RECORDS.inc(rows, table=table)
+
+
+# Worker processes (extraction/parallel.py)
+
+def take_counts() -> Dict[str, Dict[Tuple[str, ...], Any]]:
+    """Counters and histograms counted since the last call, for the parent process to ``merge_counts``."""
+    return {
+        metric.name: metric.take()
+        for metric in REGISTRY.metrics
+        if isinstance(metric, (Counter, Histogram)) and metric is not CPU_SECONDS
+    }
+
+
+def merge_counts(counts: Dict[str, Dict[Tuple[str, ...], Any]]):
+    """Add a worker's ``take_counts`` to this process's metrics."""
+    by_name = {metric.name: metric for metric in REGISTRY.metrics}
+    for name, values in counts.items():
+        metric = by_name.get(name)
+        if isinstance(metric, (Counter, Histogram)):
+            metric.merge(values)
+
+
+# Exposition
+
+def write_textfile(path: str):
+    """Atomically write the Prometheus text exposition (node_exporter textfile collector)."""
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+    tmp.write_text(REGISTRY.render(), encoding="utf-8")
+    os.replace(tmp, target)
+
+
+def serve(port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Serve ``/metrics`` from a daemon thread; returns the server (call ``shutdown`` to stop)."""
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            openmetrics = "application/openmetrics-text" in self.headers.get("Accept", "")
+            body = REGISTRY.render(openmetrics).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", OPENMETRICS_TYPE if openmetrics else PROMETHEUS_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="baliza-metrics", daemon=True).start()
+    return server
+
+
+def check_alerts() -> List[str]:
+    """Compare CPU/memory use with the configured thresholds; returns the resources over them."""
+    REGISTRY.render()  # refresh process gauges
+    over = []
+    for name, gauge, threshold in (
+        ("cpu", CPU_PERCENT, settings.cpu_alert_threshold),
+        ("memory", MEMORY_PERCENT, settings.memory_alert_threshold),
+    ):
+        value = gauge.values.get((), 0.0)
+        alert = value >= threshold
+        ALERTS.set(1 if alert else 0, resource=name)
+        if alert:
+            over.append(name)
+            print(f"⚠️  {name} use {value:.1f}% is above the {threshold:.0f}% alert threshold")
+    return over
+
+
+@contextlib.contextmanager
+def metrics_run(command: str, textfile: Optional[str] = None, port: Optional[int] = None) -> Iterator[None]:
+    """
+    Expose metrics while a command runs and record its outcome.
+
+    The textfile is rewritten every ``settings.metrics_flush_interval``
+    seconds so long backfills stay visible, and once more at the end.
+
+    Args:
+        command: ``command`` label of the run metrics
+        textfile: Path of the ``.prom`` file to maintain
+        port: Serve ``/metrics`` on this port while the command runs
+    """
+    global _PROCESS_STARTED
+    _PROCESS_STARTED = (time.monotonic(), _cpu_seconds() or 0.0)
+    started = time.time()
+    server = serve(port) if port else None
+    stop = threading.Event()
+
+    def flush():
+        while not stop.wait(settings.metrics_flush_interval):
+            write_textfile(textfile)
+
+    flusher = threading.Thread(target=flush, name="baliza-metrics-flush", daemon=True) if textfile else None
+    if flusher is not None:
+        flusher.start()
+
+    try:
+        yield
+    finally:
+        # Also set when the block is closed by click's context while an exception propagates
+        error = sys.exc_info()[1]
+        succeeded = error is None or getattr(error, "exit_code", getattr(error, "code", 1)) in (0, None)
+        stop.set()
+        if flusher is not None:
+            flusher.join()
+        RUN_SECONDS.set(round(time.time() - started, 3), command=command)
+        RUN_SUCCESS.set(1 if succeeded else 0, command=command)
+        RUN_TIMESTAMP.set(round(time.time(), 3), command=command)
+        check_alerts()
+        if textfile:
+            write_textfile(textfile)
+        if server is not None:
+            server.shutdown()
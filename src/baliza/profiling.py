@@ -0,0 +1,296 @@
+"""
+Hot-path profiling for extraction runs.
+
+Stage timers wrap the expensive steps of a run: fetch, decode, hash, dlt
+extract/normalize/write and the derived-table refresh. They are no-ops
+unless a profiler is active, so instrumented code pays one global lookup
+when profiling is off (processing steps are not even wrapped).
+
+With a profiler active (``baliza extract --profile``) every stage records
+calls, wall time, bytes and, with tracemalloc, the peak memory allocated
+while it ran. A run also captures either sampled stacks of all threads,
+written in collapsed format for flamegraph.pl/speedscope, or a cProfile
+dump of the main thread. Stage times are inclusive: fetch and hash run
+inside dlt's extract. tracemalloc slows allocation-heavy stages, so only
+compare timings between runs profiled the same way.
+
+Usage:
+    with profile_run(output_dir) as profiler:
+        run_structured_extraction(...)
+    # -> {output_dir}/.baliza/profiles/{run_id}/report.json + stacks.collapsed
+"""
+
+import contextlib
+import cProfile
+import functools
+import json
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+SAMPLERS = ("sample", "cprofile", "off")
+
+_active: Optional["Profiler"] = None
+_NOOP = contextlib.nullcontext()
+
+
+@dataclass
+class StageStats:
+    """Accumulated measurements of one stage."""
+    calls: int = 0
+    seconds: float = 0.0
+    bytes: int = 0
+    peak_bytes: int = 0
+
+
+class StackSampler:
+    """Background thread counting the stacks of every other thread."""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.counts: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="baliza-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(ident, "thread"))
+                self.counts[";".join(reversed(stack))] += 1
+
+    def write(self, path: Path):
+        """Write collapsed stacks (``frame;frame;frame count`` per line)."""
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.counts.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class Profiler:
+    """Per-stage timers plus optional stack sampling and memory tracing."""
+
+    def __init__(self, sampler: str = "sample", memory: bool = True, interval: float = 0.005):
+        """
+        Args:
+            sampler: "sample" (all threads, collapsed stacks), "cprofile"
+                (main thread, .prof dump) or "off" (stage timers only)
+            memory: Trace allocations to report peak memory per stage
+            interval: Seconds between stack samples
+        """
+        if sampler not in SAMPLERS:
+            raise ValueError(f"Unknown sampler '{sampler}'. Available: {', '.join(SAMPLERS)}")
+        self.sampler = sampler
+        self.memory = memory
+        self.stats: Dict[str, StageStats] = {}
+        self.wall_seconds = 0.0
+
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._stack_sampler = StackSampler(interval) if sampler == "sample" else None
+        self._cprofile = cProfile.Profile() if sampler == "cprofile" else None
+        self._owns_tracemalloc = False
+        self._started = 0.0
+        self.peak_traced = 0
+
+    def start(self):
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._owns_tracemalloc = True
+        if self._stack_sampler is not None:
+            self._stack_sampler.start()
+        if self._cprofile is not None:
+            self._cprofile.enable()
+        self._started = time.perf_counter()
+
+    def stop(self):
+        self.wall_seconds = time.perf_counter() - self._started
+        if self._cprofile is not None:
+            self._cprofile.disable()
+        if self._stack_sampler is not None:
+            self._stack_sampler.stop()
+        if self._owns_tracemalloc:
+            self.peak_traced = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+    def add(self, name: str, seconds: float, nbytes: int = 0, peak_bytes: int = 0):
+        with self._lock:
+            stats = self.stats.setdefault(name, StageStats())
+            stats.calls += 1
+            stats.seconds += seconds
+            stats.bytes += nbytes
+            stats.peak_bytes = max(stats.peak_bytes, peak_bytes)
+
+    @contextlib.contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """
+        Time a block as ``name``.
+
+        Peak memory is tracked per thread with a stack of open stages:
+        tracemalloc has a single process-wide peak, so an inner stage folds
+        its peak into the enclosing one before resetting it. Stages running
+        concurrently in other threads share that peak.
+        """
+        stack: List[List[int]] = self._local.__dict__.setdefault("stack", [])
+        frame = [0, 0]  # traced bytes at entry, highest peak seen inside
+        if self.memory and tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            if stack:
+                stack[-1][1] = max(stack[-1][1], peak)
+            tracemalloc.reset_peak()
+            frame = [current, current]
+
+        stack.append(frame)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - started
+            stack.pop()
+            peak_bytes = 0
+            if self.memory and tracemalloc.is_tracing():
+                highest = max(frame[1], tracemalloc.get_traced_memory()[1])
+                if stack:
+                    stack[-1][1] = max(stack[-1][1], highest)
+                peak_bytes = max(0, highest - frame[0])
+            self.add(name, seconds, peak_bytes=peak_bytes)
+
+    def report(self) -> Dict[str, Any]:
+        stages = {}
+        for name, stats in sorted(self.stats.items(), key=lambda item: -item[1].seconds):
+            stages[name] = {
+                **asdict(stats),
+                "seconds": round(stats.seconds, 6),
+                "share_of_wall": round(stats.seconds / self.wall_seconds, 4) if self.wall_seconds else None,
+                "peak_mb": round(stats.peak_bytes / 1024**2, 2),
+            }
+        return {
+            "wall_seconds": round(self.wall_seconds, 6),
+            "sampler": self.sampler,
+            "memory": self.memory,
+            "peak_traced_mb": round(self.peak_traced / 1024**2, 2),
+            "stages": stages,
+        }
+
+    def write(self, directory: Path) -> Path:
+        """Write report.json plus stacks.collapsed or profile.prof into ``directory``."""
+        directory.mkdir(parents=True, exist_ok=True)
+        (directory / "report.json").write_text(json.dumps(self.report(), indent=2), encoding="utf-8")
+        if self._stack_sampler is not None:
+            self._stack_sampler.write(directory / "stacks.collapsed")
+        if self._cprofile is not None:
+            self._cprofile.dump_stats(str(directory / "profile.prof"))
+        return directory
+
+    def summary(self) -> str:
+        lines = [f"{'stage':<24}{'calls':>10}{'seconds':>12}{'% wall':>9}{'peak MB':>10}"]
+        for name, stage in self.report()["stages"].items():
+            share = f"{stage['share_of_wall'] * 100:.1f}" if stage["share_of_wall"] is not None else "-"
+            lines.append(f"{name:<24}{stage['calls']:>10}{stage['seconds']:>12.3f}{share:>9}{stage['peak_mb']:>10.1f}")
+        return "\n".join(lines)
+
+
+def active() -> Optional[Profiler]:
+    return _active
+
+
+def stage(name: str):
+    """Context manager timing a block as ``name`` (a shared no-op when profiling is off)."""
+    profiler = _active
+    return profiler.stage(name) if profiler is not None else _NOOP
+
+
+def record(name: str, seconds: float, nbytes: int = 0):
+    """Add an externally measured duration (e.g. a response's elapsed time)."""
+    profiler = _active
+    if profiler is not None:
+        profiler.add(name, seconds, nbytes)
+
+
+def wrap(fn: Callable, name: str) -> Callable:
+    """``fn`` timed as ``name`` if a profiler is active when wrapping, else ``fn`` itself."""
+    profiler = _active
+    if profiler is None:
+        return fn
+
+    @functools.wraps(fn)
+    def timed(*args, **kwargs):
+        with profiler.stage(name):
+            return fn(*args, **kwargs)
+
+    return timed
+
+
+def response_hook() -> Optional[Callable]:
+    """
+    dlt ``response_actions`` hook recording fetch time and bytes per response.
+
+    Returns:
+        The hook, or None when profiling is off
+    """
+    profiler = _active
+    if profiler is None:
+        return None
+
+    def measure(response, *args, **kwargs):
+        elapsed = getattr(response, "elapsed", None)
+        profiler.add("fetch", elapsed.total_seconds() if elapsed else 0.0, len(response.content or b""))
+        return response
+
+    return measure
+
+
+def profiles_dir(output_dir: str) -> Path:
+    return Path(output_dir) / ".baliza" / "profiles"
+
+
+@contextlib.contextmanager
+def profile_run(output_dir: str, sampler: str = "sample", memory: bool = True) -> Iterator[Profiler]:
+    """
+    Profile everything run inside the block and write the report on exit.
+
+    Args:
+        output_dir: Archive directory; reports go to ``.baliza/profiles/{run_id}``
+        sampler: See Profiler
+        memory: See Profiler
+
+    Yields:
+        The active profiler
+    """
+    global _active
+    if _active is not None:
+        raise RuntimeError("A profiler is already active")
+
+    profiler = Profiler(sampler, memory)
+    _active = profiler
+    profiler.start()
+    try:
+        yield profiler
+    finally:
+        profiler.stop()
+        _active = None
+        directory = profiler.write(profiles_dir(output_dir) / datetime.now().strftime("%Y%m%dT%H%M%S"))
+        print(profiler.summary())
+        print(f"🔬 Profile written to {directory}")
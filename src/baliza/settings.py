@@ -1,4 +1,4 @@
-from typing import Dict, List, ClassVar
+from typing import Dict, List, ClassVar, Optional
 
 from pydantic import BaseModel
 from pydantic_settings import BaseSettings
@@ -21,10 +21,19 @@ class Settings(BaseSettings):
     duckdb_memory_limit: str = "4GB"
     duckdb_enable_progress_bar: bool = True
 
+    # Derived Tables (refreshed for the partitions touched by each load)
+    enable_upsert: bool = True  # Latest version per natural key, prior versions in *__history
+    enable_rollups: bool = True
+    enable_lookup_index: bool = True
+    enable_search_index: bool = False  # SQLite FTS5 over objeto* fields (optional)
+
     # Rate Limiting
     requests_per_minute: int = 120
     requests_per_hour: int = 7200
     concurrent_endpoints: int = 12
+    drilldown_concurrency: int = 32  # In-flight single-record requests (still bound by requests_per_minute)
+    extract_processes: Optional[int] = None  # baliza extract --processes default (None: one per CPU)
+    request_timeout: float = 30.0
 
     # Retry Configuration
     max_retry_attempts: int = 3
@@ -35,6 +44,32 @@ class Settings(BaseSettings):
     circuit_breaker_failure_threshold: int = 5
     circuit_breaker_recovery_timeout: int = 300
 
+    # Change-Data-Capture (``*_atualizacao`` endpoints)
+    cdc_initial_days: int = 7   # Window for the first sync, before any watermark exists
+    cdc_overlap_days: int = 2   # Re-poll days before the watermark to catch late changes
+
+    # Negative cache of empty (endpoint, month, modalidade) shards
+    enable_negative_cache: bool = True
+    negative_cache_min_age_days: int = 60       # Windows ending more recently stay exempt (late publications)
+    negative_cache_revalidate_days: int = 180   # Re-request cached empty shards after this long
+
+    # Annual PCA (Plano de Contratações Anual) extraction
+    pca_first_year: int = 2023
+    pca_classification_codes: List[str] = []  # Extra codigoClassificacaoSuperior values (most are discovered)
+    pca_discovery_days: int = 30               # First look-back of code discovery over /v1/pca/atualizacao (0 = off)
+    pca_user_ids: List[int] = []               # idUsuario values for pca_usuario (cannot be discovered)
+
+    # Raw response archive (rebuild outputs offline with baliza replay)
+    enable_raw_archive: bool = True
+    raw_segment_max_bytes: int = 256 * 1024 * 1024
+    raw_archive_zstd_level: int = 10
+    replay_processes: Optional[int] = None  # Default: one per CPU
+
+    # Streaming between fetchers and writers (extraction/streaming.py)
+    stream_buffer_bytes: int = 256 * 1024 * 1024       # Decoded pages/records held in memory per queue or loader
+    stream_spill_bytes: int = 4 * 1024 * 1024 * 1024   # Spill file budget before fetchers block
+    stream_spill_dir: Optional[str] = None             # Default: {output}/.baliza/spill
+
     # Default Date Ranges
     default_date_range_days: int = 7
     max_date_range_days: int = 30
@@ -84,6 +119,9 @@ class Settings(BaseSettings):
     # Monitoring
     cpu_alert_threshold: float = 90.0  # Percentage
     memory_alert_threshold: float = 90.0  # Percentage
+    metrics_textfile: Optional[str] = None  # .prom file for node_exporter's textfile collector
+    metrics_port: Optional[int] = None  # Serve /metrics while a command runs
+    metrics_flush_interval: float = 15.0  # Seconds between textfile rewrites during a run
 
     # Logging
     log_level: str = "INFO"
@@ -110,6 +148,10 @@ class EndpointConfig(BaseModel):
     priority: int
     requires_modalidade: bool
     sync_type: str = "incremental"
+    # Fields identifying a record across versions (latest-wins upsert) and the
+    # field ordering those versions
+    natural_key: List[str] = []
+    version_field: Optional[str] = "dataAtualizacao"
 
 
 # ALL 12 PNCP ENDPOINTS - Clean definitions without duplicates
@@ -123,6 +165,7 @@ ENDPOINT_CONFIG: Dict[str, EndpointConfig] = {
         default_page_size=50,
         priority=1,
         requires_modalidade=True,
+        natural_key=["numeroControlePNCP"],
     ),
     "contratos": EndpointConfig(
         path="/v1/contratos",
@@ -132,6 +175,7 @@ ENDPOINT_CONFIG: Dict[str, EndpointConfig] = {
         default_page_size=500,
         priority=2,
         requires_modalidade=False,
+        natural_key=["numeroControlePNCP"],
     ),
     "atas": EndpointConfig(
         path="/v1/atas",
@@ -141,6 +185,7 @@ ENDPOINT_CONFIG: Dict[str, EndpointConfig] = {
         default_page_size=500,
         priority=3,
         requires_modalidade=False,
+        natural_key=["numeroControlePNCPAta"],
     ),
     
     # Phase 2: Update/Sync Endpoints
@@ -153,6 +198,7 @@ ENDPOINT_CONFIG: Dict[str, EndpointConfig] = {
         priority=4,
         requires_modalidade=True,
         sync_type="incremental",
+        natural_key=["numeroControlePNCP"],
     ),
     "contratos_atualizacao": EndpointConfig(
         path="/v1/contratos/atualizacao",
@@ -163,6 +209,7 @@ ENDPOINT_CONFIG: Dict[str, EndpointConfig] = {
         priority=5,
         requires_modalidade=False,
         sync_type="incremental",
+        natural_key=["numeroControlePNCP"],
     ),
     "atas_atualizacao": EndpointConfig(
         path="/v1/atas/atualizacao",
@@ -173,6 +220,7 @@ ENDPOINT_CONFIG: Dict[str, EndpointConfig] = {
         priority=6,
         requires_modalidade=False,
         sync_type="incremental",
+        natural_key=["numeroControlePNCPAta"],
     ),
     
     # Phase 3: Specialized Endpoints
@@ -185,6 +233,7 @@ ENDPOINT_CONFIG: Dict[str, EndpointConfig] = {
         priority=7,
         requires_modalidade=False,
         sync_type="snapshot",
+        natural_key=["numeroControlePNCP"],
     ),
     "instrumentoscobranca_inclusao": EndpointConfig(
         path="/v1/instrumentoscobranca/inclusao",
@@ -195,6 +244,7 @@ ENDPOINT_CONFIG: Dict[str, EndpointConfig] = {
         priority=8,
         requires_modalidade=False,
         sync_type="incremental",
+        natural_key=["cnpj", "ano", "sequencialContrato", "sequencialInstrumentoCobranca"],
     ),
     
     # Phase 4: PCA (Plano de Contratação Anual) Endpoints
@@ -207,6 +257,9 @@ ENDPOINT_CONFIG: Dict[str, EndpointConfig] = {
         priority=9,
         requires_modalidade=False,
         sync_type="annual",
+        # /v1/pca returns each plan once per classification, with only its items
+        natural_key=["idPcaPncp", "codigoClassificacaoSuperior"],
+        version_field="dataAtualizacaoGlobalPCA",
     ),
     "pca_usuario": EndpointConfig(
         path="/v1/pca/usuario",
@@ -217,6 +270,8 @@ ENDPOINT_CONFIG: Dict[str, EndpointConfig] = {
         priority=10,
         requires_modalidade=False,
         sync_type="annual",
+        natural_key=["idPcaPncp"],
+        version_field="dataAtualizacaoGlobalPCA",
     ),
     "pca_atualizacao": EndpointConfig(
         path="/v1/pca/atualizacao",
@@ -227,13 +282,13 @@ ENDPOINT_CONFIG: Dict[str, EndpointConfig] = {
         priority=11,
         requires_modalidade=False,
         sync_type="incremental",
+        natural_key=["idPcaPncp"],
+        version_field="dataAtualizacaoGlobalPCA",
     ),
     
     # Phase 5: Detail/Drill-down Endpoints  
-    # Note: These endpoints with path parameters are not currently implemented
-    # They would require custom DLT resources for dynamic URL formatting
-    # If the current config doesn't work, this will need to be implemented as a
-    # separate, specialized resource.
+    # Path parameters come from archived contratacoes_publicacao records;
+    # fetched by extraction/drilldown.py (baliza drilldown), not the REST source.
     "contratacao_especifica": EndpointConfig(
         path="/v1/orgaos/{cnpj}/compras/{ano}/{sequencial}",
         required_params=["cnpj", "ano", "sequencial"],
@@ -243,6 +298,7 @@ ENDPOINT_CONFIG: Dict[str, EndpointConfig] = {
         priority=12,
         requires_modalidade=False,
         sync_type="on_demand",
+        natural_key=["numeroControlePNCP"],
     ),
 }
 
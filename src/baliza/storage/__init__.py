@@ -0,0 +1,29 @@
+"""
+PNCP Archive Storage Module
+
+Read-side components for the Parquet archive produced by the extraction
+pipeline.
+
+Key components:
+- layout.py: Hive-style month partition layout and discovery
+- inventory.py: Cached per-table rows, sizes and date coverage from Parquet footers
+- query.py: Embedded DuckDB query layer over the archive
+- upsert.py: Latest-wins compaction by natural key with version history
+- rollups.py: Incrementally maintained aggregate tables
+- lookup_index.py: Memory-mapped CNPJ/numeroControlePNCP lookup index
+- search_index.py: Optional full-text index over procurement objects
+- raw_archive.py: Append-only compressed archive of raw API responses
+"""
+
+from .layout import (
+    Partition,
+    list_tables,
+    list_partitions
+)
+
+__all__ = [
+    # Layout
+    "Partition",
+    "list_tables",
+    "list_partitions",
+]
@@ -0,0 +1,213 @@
+"""
+Archive inventory from Parquet footers.
+
+Row counts, sizes and business-date ranges come from each file's footer
+(``num_rows`` and row-group column statistics), so no data page is read.
+Footers are read on a thread pool and cached in
+``{output_dir}/.baliza/inventory.json`` keyed by file path, mtime and size:
+on a warm cache an inventory costs one ``stat`` per file, and only files
+written or rewritten since the last run are opened.
+
+Usage:
+    for table, stats in build_inventory("data").items():
+        print(table, stats.rows, stats.min_date, stats.max_date, stats.holes)
+"""
+
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import pyarrow.parquet as pq
+
+from .layout import list_partitions, list_tables
+
+CACHE_VERSION = 1
+
+# Business date of each record, in dlt's snake_case column names; the first
+# column present in a file is used
+DATE_COLUMNS: Dict[str, Tuple[str, ...]] = {
+    "instrumentoscobranca_inclusao": ("data_inclusao",),
+    "contratacoes_proposta": ("data_publicacao_pncp", "data_encerramento_proposta"),
+}
+DEFAULT_DATE_COLUMNS = ("data_publicacao_pncp", "data_assinatura", "data_inclusao")
+
+
+@dataclass
+class FileStats:
+    """Footer summary of one Parquet file."""
+    mtime_ns: int
+    size: int
+    rows: int
+    min_date: Optional[str] = None
+    max_date: Optional[str] = None
+
+
+@dataclass
+class TableInventory:
+    """Totals of one archived table."""
+    table: str
+    files: int = 0
+    rows: int = 0
+    bytes: int = 0
+    min_date: Optional[str] = None
+    max_date: Optional[str] = None
+    months: List[str] = field(default_factory=list)
+    holes: List[str] = field(default_factory=list)  # Months without files between the first and last
+
+
+def cache_path(output_dir: str) -> Path:
+    return Path(output_dir) / ".baliza" / "inventory.json"
+
+
+def _date_text(value) -> Optional[str]:
+    """YYYY-MM-DD of a statistics value (timestamp, date or ISO string)."""
+    if value is None:
+        return None
+    if isinstance(value, bytes):
+        value = value.decode("utf-8", "replace")
+    text = value.isoformat() if hasattr(value, "isoformat") else str(value)
+    return text[:10] if len(text) >= 10 and text[4] == "-" else None
+
+
+def read_footer(path: Path, date_columns: Tuple[str, ...], mtime_ns: int, size: int) -> FileStats:
+    """Rows and the min/max business date of one file, from its footer only."""
+    metadata = pq.read_metadata(path)
+    stats = FileStats(mtime_ns, size, metadata.num_rows)
+
+    names = set(metadata.schema.names)
+    column = next((c for c in date_columns if c in names), None)
+    if column is None:
+        return stats
+
+    for group in range(metadata.num_row_groups):
+        row_group = metadata.row_group(group)
+        for index in range(row_group.num_columns):
+            chunk = row_group.column(index)
+            if chunk.path_in_schema != column:
+                continue
+            statistics = chunk.statistics
+            if statistics is None or not statistics.has_min_max:
+                break
+            low, high = _date_text(statistics.min), _date_text(statistics.max)
+            if low and (stats.min_date is None or low < stats.min_date):
+                stats.min_date = low
+            if high and (stats.max_date is None or high > stats.max_date):
+                stats.max_date = high
+            break
+    return stats
+
+
+def _load_cache(output_dir: str) -> Dict[str, list]:
+    try:
+        with open(cache_path(output_dir), encoding="utf-8") as f:
+            cache = json.load(f)
+        return cache["files"] if cache.get("version") == CACHE_VERSION else {}
+    except (OSError, ValueError, KeyError):
+        return {}
+
+
+def _save_cache(output_dir: str, files: Dict[str, list]):
+    path = cache_path(output_dir)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".json.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"version": CACHE_VERSION, "files": files}, f, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+
+def _missing_months(months: List[str]) -> List[str]:
+    """YYYY-MM keys between the first and last of ``months`` that are not in it."""
+    if not months:
+        return []
+    present = set(months)
+    year, month = int(months[0][:4]), int(months[0][5:7])
+    holes = []
+    while f"{year:04d}-{month:02d}" < months[-1]:
+        key = f"{year:04d}-{month:02d}"
+        if key not in present:
+            holes.append(key)
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return holes
+
+
+def build_inventory(
+    output_dir: str,
+    tables: Optional[List[str]] = None,
+    workers: Optional[int] = None,
+    use_cache: bool = True
+) -> Dict[str, TableInventory]:
+    """
+    Summarize archived tables from their Parquet footers.
+
+    Args:
+        output_dir: Base output directory
+        tables: Tables to include (default: every archived table)
+        workers: Threads reading footers (default: min(32, 4 × CPUs))
+        use_cache: Reuse footers cached for unchanged files
+
+    Returns:
+        Inventory per table, in table order
+    """
+    tables = tables or list_tables(output_dir)
+    root = Path(output_dir)
+    cached = _load_cache(output_dir) if use_cache else {}
+    files: Dict[str, list] = {}
+    pending: List[Tuple[str, Path, Tuple[str, ...], int, int]] = []
+    months: Dict[str, List[str]] = {}
+    file_tables: Dict[str, str] = {}
+
+    for table in tables:
+        date_columns = DATE_COLUMNS.get(table, DEFAULT_DATE_COLUMNS)
+        months[table] = []
+        for partition in list_partitions(output_dir, table):
+            months[table].append(partition.key)
+            for path in partition.files:
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                key = path.relative_to(root).as_posix()
+                file_tables[key] = table
+                entry = cached.get(key)
+                if entry and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size:
+                    files[key] = entry
+                else:
+                    pending.append((key, path, date_columns, stat.st_mtime_ns, stat.st_size))
+
+    if pending:
+        workers = workers or min(32, 4 * (os.cpu_count() or 1))
+
+        def read(item):
+            key, path, date_columns, mtime_ns, size = item
+            try:
+                return key, read_footer(path, date_columns, mtime_ns, size)
+            except (OSError, ValueError) as e:
+                print(f"⚠️  Unreadable Parquet footer {path}: {e}")
+                return key, None
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="baliza-footer") as pool:
+            for key, stats in pool.map(read, pending):
+                if stats is not None:
+                    files[key] = [stats.mtime_ns, stats.size, stats.rows, stats.min_date, stats.max_date]
+
+    if use_cache and (pending or len(files) != len(cached)):
+        # Keeps entries of tables outside this call; drops files that disappeared
+        kept = {key: entry for key, entry in cached.items()
+                if key not in file_tables and (root / key).exists()}
+        _save_cache(output_dir, {**kept, **files})
+
+    inventory = {table: TableInventory(table, months=months[table], holes=_missing_months(months[table]))
+                 for table in tables}
+    for key, (_, size, rows, min_date, max_date) in files.items():
+        stats = inventory[file_tables[key]]
+        stats.files += 1
+        stats.rows += rows
+        stats.bytes += size
+        if min_date and (stats.min_date is None or min_date < stats.min_date):
+            stats.min_date = min_date
+        if max_date and (stats.max_date is None or max_date > stats.max_date):
+            stats.max_date = max_date
+    return inventory
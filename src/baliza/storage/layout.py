@@ -0,0 +1,135 @@
+"""
+Archive layout helpers.
+
+Extracted data is written by the dlt filesystem destination as hive-style
+month partitions:
+
+    {output_dir}/pncp_raw/{table}/year=YYYY/month=MM/{load_id}.{file_id}.parquet
+
+Keeping the partition keys in the path lets DuckDB and pyarrow skip whole
+months without opening any file.
+"""
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+DATASET_NAME = "pncp_raw"
+ROLLUP_DATASET_NAME = "pncp_rollups"
+PARTITION_LAYOUT = "{table_name}/year={year}/month={month}/{load_id}.{file_id}.{ext}"
+
+# Columns added at extraction time: natural key shared by every version of a
+# record, and the value ordering those versions (see storage/upsert.py)
+NATURAL_KEY_COLUMN = "_baliza_key"
+VERSION_COLUMN = "_baliza_version"
+
+
+@dataclass(frozen=True)
+class Partition:
+    """One month partition of an archived table."""
+    table: str
+    year: int
+    month: int
+    path: Path
+    files: List[Path] = field(default_factory=list, compare=False)
+
+    @property
+    def key(self) -> str:
+        """Month key in YYYY-MM format (same format as completion markers)."""
+        return f"{self.year:04d}-{self.month:02d}"
+
+
+def dataset_dir(output_dir: str, dataset: str = DATASET_NAME) -> Path:
+    """Directory holding one sub-directory per archived table."""
+    return Path(output_dir) / dataset
+
+
+def table_dir(output_dir: str, table: str, dataset: str = DATASET_NAME) -> Path:
+    return dataset_dir(output_dir, dataset) / table
+
+
+def partition_dir(output_dir: str, table: str, year: int, month: int, dataset: str = DATASET_NAME) -> Path:
+    return table_dir(output_dir, table, dataset) / f"year={year:04d}" / f"month={month:02d}"
+
+
+def partition_placeholders(year: int, month: int) -> dict:
+    """Values for the custom ``{year}``/``{month}`` placeholders of PARTITION_LAYOUT."""
+    return {"year": f"{year:04d}", "month": f"{month:02d}"}
+
+
+def month_of(value) -> Optional[Tuple[int, int]]:
+    """
+    (year, month) partition of a PNCP date/datetime string.
+
+    Accepts "2024-01-15", "2024-01-15T10:30:00Z" and "20240115".
+    """
+    if not value:
+        return None
+    text = str(value)
+    try:
+        if len(text) >= 7 and text[4] == "-":
+            return int(text[:4]), int(text[5:7])
+        if len(text) >= 6 and text[:6].isdigit():
+            return int(text[:4]), int(text[4:6])
+    except ValueError:
+        pass
+    return None
+
+
+def list_tables(output_dir: str, dataset: str = DATASET_NAME) -> List[str]:
+    """List archived tables that have at least one Parquet partition."""
+    root = dataset_dir(output_dir, dataset)
+    if not root.exists():
+        return []
+
+    return sorted(
+        path.name for path in root.iterdir()
+        if path.is_dir()
+        and not path.name.startswith("_dlt")
+        and any(path.glob("year=*/month=*/*.parquet"))
+    )
+
+
+def list_partitions(
+    output_dir: str,
+    table: str,
+    start_month: Optional[str] = None,
+    end_month: Optional[str] = None,
+    dataset: str = DATASET_NAME
+) -> List[Partition]:
+    """
+    List month partitions of a table, optionally restricted to a month range.
+
+    Args:
+        output_dir: Base output directory
+        table: Table name (endpoint or dlt child table)
+        start_month: First month to include (YYYY-MM), inclusive
+        end_month: Last month to include (YYYY-MM), inclusive
+        dataset: Dataset directory (raw tables or rollups)
+
+    Returns:
+        Partitions sorted by month, each with its Parquet files
+    """
+    partitions = []
+
+    for month_path in table_dir(output_dir, table, dataset).glob("year=*/month=*"):
+        try:
+            year = int(month_path.parent.name.split("=", 1)[1])
+            month = int(month_path.name.split("=", 1)[1])
+        except (IndexError, ValueError):
+            continue
+
+        partition = Partition(table, year, month, month_path, sorted(month_path.glob("*.parquet")))
+        if start_month and partition.key < start_month:
+            continue
+        if end_month and partition.key > end_month:
+            continue
+        if partition.files:
+            partitions.append(partition)
+
+    return sorted(partitions, key=lambda p: p.key)
+
+
+def table_glob(output_dir: str, table: str, dataset: str = DATASET_NAME) -> str:
+    """Glob matching every Parquet file of a table across all partitions."""
+    return str(table_dir(output_dir, table, dataset) / "year=*" / "month=*" / "*.parquet")
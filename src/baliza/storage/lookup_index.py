@@ -0,0 +1,269 @@
+"""
+Supplier/agency lookup index across endpoints.
+
+Maps ``niFornecedor``, órgão CNPJs and ``numeroControlePNCP`` values to the
+(table, file, row group) that contains them, so "everything about CNPJ X"
+reads a handful of row groups instead of scanning every endpoint.
+
+There is one index segment per source partition
+(``.baliza/lookup/{table}/YYYY-MM.idx``), rebuilt whenever a load touches
+that month. A segment is a single file:
+
+    MAGIC | u32 header length | JSON header (file names) | records
+
+Records are fixed-width ``(u64 key hash, u16 file index, u16 row group)``
+sorted by hash, so a lookup memory-maps the segment and binary-searches it
+without parsing anything. Hash collisions only cost an extra row-group
+read; rows are filtered on the real value afterwards.
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from .layout import list_partitions, partition_dir
+
+MAGIC = b"BLZIDX01"
+HEADER_LENGTH = struct.Struct("<I")
+RECORD = struct.Struct("<QHH")
+
+# Tables covered by the index and the (dlt-normalized) columns indexed in them
+INDEXED_TABLES = ["contratos", "atas", "contratacoes_publicacao", "instrumentoscobranca_inclusao"]
+LOOKUP_FIELDS = [
+    "ni_fornecedor",
+    "orgao_entidade__cnpj",
+    "cnpj_orgao",
+    "cnpj",
+    "numero_controle_pncp",
+    "numero_controle_pncp_ata",
+    "numero_controle_pncp_compra",
+    "recuperar_contrato_dto__ni_fornecedor",
+]
+
+
+@dataclass(frozen=True)
+class LookupHit:
+    """A row group that may contain the looked-up key."""
+    table: str
+    year: int
+    month: int
+    file: Path
+    row_group: int
+
+
+def normalize_key(value) -> str:
+    """
+    Normalize a lookup key.
+
+    Formatted CNPJ/CPF values ("12.345.678/0001-00") are reduced to their
+    digits so they match the raw values stored by PNCP.
+    """
+    text = str(value).strip()
+    digits = "".join(ch for ch in text if ch.isdigit())
+    if digits and all(ch.isdigit() or ch in "./- " for ch in text):
+        return digits
+    return text.upper()
+
+
+def key_hash(value) -> int:
+    """64-bit hash of a normalized key."""
+    digest = hashlib.blake2b(normalize_key(value).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+def index_dir(output_dir: str) -> Path:
+    return Path(output_dir) / ".baliza" / "lookup"
+
+
+def segment_path(output_dir: str, table: str, year: int, month: int) -> Path:
+    return index_dir(output_dir) / table / f"{year:04d}-{month:02d}.idx"
+
+
+def build_segment(output_dir: str, table: str, year: int, month: int) -> Optional[Path]:
+    """
+    (Re)build the index segment of one source partition.
+
+    Returns:
+        Path of the written segment, or None if the partition has no files
+    """
+    month_key = f"{year:04d}-{month:02d}"
+    partitions = list_partitions(output_dir, table, month_key, month_key)
+    target = segment_path(output_dir, table, year, month)
+
+    if not partitions:
+        if target.exists():
+            target.unlink()
+        return None
+
+    files = partitions[0].files
+    entries = set()
+
+    for file_index, path in enumerate(files):
+        parquet_file = pq.ParquetFile(path)
+        columns = [c for c in LOOKUP_FIELDS if c in parquet_file.schema_arrow.names]
+        if not columns:
+            continue
+
+        for row_group in range(parquet_file.num_row_groups):
+            data = parquet_file.read_row_group(row_group, columns=columns)
+            for column in columns:
+                for value in pc.unique(data.column(column)).to_pylist():
+                    if value:
+                        entries.add((key_hash(value), file_index, row_group))
+
+    header = json.dumps({
+        "table": table,
+        "partition": month_key,
+        "files": [path.name for path in files],
+    }).encode("utf-8")
+
+    records = bytearray(RECORD.size * len(entries))
+    for position, entry in enumerate(sorted(entries)):
+        RECORD.pack_into(records, position * RECORD.size, *entry)
+
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp_target = target.with_suffix(".idx.tmp")
+    with tmp_target.open("wb") as f:
+        f.write(MAGIC)
+        f.write(HEADER_LENGTH.pack(len(header)))
+        f.write(header)
+        f.write(records)
+    os.replace(tmp_target, target)
+
+    return target
+
+
+def refresh_lookup_index(
+    output_dir: str,
+    touched: Optional[Iterable[Tuple[str, int, int]]] = None
+) -> int:
+    """
+    Rebuild the segments of the partitions touched by a load.
+
+    Args:
+        output_dir: Base output directory
+        touched: (table, year, month) partitions written by the load.
+            None rebuilds the whole index.
+
+    Returns:
+        Number of segments written
+    """
+    if touched is None:
+        touched = [
+            (table, partition.year, partition.month)
+            for table in INDEXED_TABLES
+            for partition in list_partitions(output_dir, table)
+        ]
+
+    return sum(
+        1 for table, year, month in sorted(set(touched))
+        if table in INDEXED_TABLES and build_segment(output_dir, table, year, month)
+    )
+
+
+def _search_segment(path: Path, wanted: int) -> Tuple[List[str], List[Tuple[int, int]]]:
+    """Binary-search one memory-mapped segment for a key hash."""
+    with path.open("rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        if data[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"Not a lookup index segment: {path}")
+
+        header_length = HEADER_LENGTH.unpack_from(data, len(MAGIC))[0]
+        header_start = len(MAGIC) + HEADER_LENGTH.size
+        records_start = header_start + header_length
+        count = (len(data) - records_start) // RECORD.size
+
+        low, high = 0, count
+        while low < high:
+            middle = (low + high) // 2
+            if RECORD.unpack_from(data, records_start + middle * RECORD.size)[0] < wanted:
+                low = middle + 1
+            else:
+                high = middle
+
+        matches = []
+        while low < count:
+            hashed, file_index, row_group = RECORD.unpack_from(data, records_start + low * RECORD.size)
+            if hashed != wanted:
+                break
+            matches.append((file_index, row_group))
+            low += 1
+
+        if not matches:
+            return [], []
+
+        header = json.loads(data[header_start:records_start].decode("utf-8"))
+        return header["files"], matches
+
+
+def lookup(output_dir: str, key: str, tables: Optional[List[str]] = None) -> List[LookupHit]:
+    """
+    Find the row groups that may contain a key.
+
+    Args:
+        output_dir: Base output directory
+        key: CNPJ/CPF (formatted or not) or numeroControlePNCP
+        tables: Restrict to these tables (default: all indexed tables)
+
+    Returns:
+        Candidate row groups, one LookupHit each
+    """
+    wanted = key_hash(key)
+    hits = []
+
+    for table in tables or INDEXED_TABLES:
+        for path in sorted((index_dir(output_dir) / table).glob("*.idx")):
+            files, matches = _search_segment(path, wanted)
+            if not matches:
+                continue
+
+            year, month = (int(part) for part in path.stem.split("-"))
+            base = partition_dir(output_dir, table, year, month)
+            for file_index, row_group in matches:
+                hits.append(LookupHit(table, year, month, base / files[file_index], row_group))
+
+    return hits
+
+
+def read_matches(output_dir: str, key: str, tables: Optional[List[str]] = None) -> Iterator[Tuple[str, pa.Table]]:
+    """
+    Read the rows matching a key, touching only the candidate row groups.
+
+    Yields:
+        (table, pyarrow.Table of matching rows plus year/month) per source file
+    """
+    normalized = normalize_key(key)
+    by_file: Dict[Tuple[str, int, int, Path], List[int]] = {}
+    for hit in lookup(output_dir, key, tables):
+        by_file.setdefault((hit.table, hit.year, hit.month, hit.file), []).append(hit.row_group)
+
+    for (table, year, month, path), row_groups in by_file.items():
+        if not path.exists():
+            continue
+
+        data = pq.ParquetFile(path).read_row_groups(sorted(set(row_groups)))
+        mask = None
+        for column in LOOKUP_FIELDS:
+            if column not in data.column_names:
+                continue
+            values = pa.array(
+                [v is not None and normalize_key(v) == normalized for v in data.column(column).to_pylist()]
+            )
+            mask = values if mask is None else pc.or_(mask, values)
+
+        if mask is None:
+            continue
+
+        matching = data.filter(mask)
+        if matching.num_rows:
+            matching = matching.append_column("year", pa.array([year] * matching.num_rows, pa.int64()))
+            matching = matching.append_column("month", pa.array([month] * matching.num_rows, pa.int64()))
+            yield table, matching
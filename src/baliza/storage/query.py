@@ -0,0 +1,175 @@
+"""
+Embedded DuckDB query layer over the Parquet archive.
+
+Every archived table and rollup is registered as a DuckDB view over its
+month partitions. Views are read with ``hive_partitioning`` so filters on
+``year``/``month`` prune whole partitions, and DuckDB only decodes the
+columns a query references. Results are streamed as Arrow record batches or
+copied straight to CSV/Parquet by DuckDB, never materialized in Python.
+"""
+
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterator, List, Optional, Sequence
+
+import duckdb
+
+if TYPE_CHECKING:
+    import pyarrow
+
+from baliza.settings import settings
+from .layout import DATASET_NAME, ROLLUP_DATASET_NAME, list_partitions, list_tables, table_glob
+
+DEFAULT_BATCH_ROWS = 100_000
+EXPORT_FORMATS = {".csv": "CSV, HEADER", ".parquet": "PARQUET, COMPRESSION ZSTD"}
+# Partition columns as integers (autocast would read month=01 as VARCHAR)
+HIVE_OPTIONS = "hive_partitioning = true, hive_types = {'year': 'INTEGER', 'month': 'INTEGER'}, union_by_name = true"
+
+
+def _quote_identifier(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _quote_literal(value: str) -> str:
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+class ArchiveQuery:
+    """
+    DuckDB connection with one view per archived table and rollup.
+
+    Example:
+        with ArchiveQuery("data") as archive:
+            for batch in archive.fetch_batches("SELECT * FROM contratos WHERE year = 2024"):
+                ...
+    """
+
+    def __init__(self, output_dir: str = "data", database: str = ":memory:"):
+        """
+        Args:
+            output_dir: Base output directory of the archive
+            database: DuckDB catalog (default: a throwaway in-memory one). A file
+                such as settings.database_path keeps user-defined views across
+                sessions, but DuckDB locks it to one process at a time.
+        """
+        self.output_dir = output_dir
+        self.database = database
+
+        if self.database != ":memory:":
+            Path(self.database).parent.mkdir(parents=True, exist_ok=True)
+
+        self.con = duckdb.connect(self.database)
+        self._configure()
+        self.tables = self.register_views()
+
+    def _configure(self):
+        """Apply DuckDB resource settings from Settings."""
+        Path(settings.temp_directory).mkdir(parents=True, exist_ok=True)
+        self.con.execute(f"SET threads = {int(settings.duckdb_threads)}")
+        self.con.execute(f"SET memory_limit = {_quote_literal(settings.duckdb_memory_limit)}")
+        self.con.execute(f"SET temp_directory = {_quote_literal(settings.temp_directory)}")
+        progress = "true" if settings.duckdb_enable_progress_bar else "false"
+        self.con.execute(f"SET enable_progress_bar = {progress}")
+
+    def register_views(self) -> List[str]:
+        """
+        (Re)create one view per archived table and rollup.
+
+        Rollups (see storage/rollups.py) are registered under their own
+        names, e.g. ``contratos_mensal``.
+
+        Returns:
+            Names of the registered views
+        """
+        views = []
+        for dataset in (DATASET_NAME, ROLLUP_DATASET_NAME):
+            for table in list_tables(self.output_dir, dataset):
+                glob = table_glob(self.output_dir, table, dataset)
+                self.con.execute(
+                    f"CREATE OR REPLACE VIEW {_quote_identifier(table)} AS "
+                    f"SELECT * FROM read_parquet({_quote_literal(glob)}, {HIVE_OPTIONS})"
+                )
+                views.append(table)
+        return views
+
+    def scan(
+        self,
+        table: str,
+        columns: Optional[Sequence[str]] = None,
+        start_month: Optional[str] = None,
+        end_month: Optional[str] = None,
+        where: Optional[str] = None
+    ) -> "duckdb.DuckDBPyRelation":
+        """
+        Relation over a single table with explicit partition and column pruning.
+
+        Only the files of the months in range are handed to DuckDB, so months
+        outside the range are never listed or opened.
+
+        Args:
+            table: Archived table name
+            columns: Columns to project (default: all)
+            start_month: First month (YYYY-MM), inclusive
+            end_month: Last month (YYYY-MM), inclusive
+            where: Optional SQL filter expression
+
+        Returns:
+            Lazy DuckDB relation
+        """
+        files = [
+            str(path)
+            for partition in list_partitions(self.output_dir, table, start_month, end_month)
+            for path in partition.files
+        ]
+        if not files:
+            raise ValueError(f"No partitions found for {table} in {start_month or '*'}..{end_month or '*'}")
+
+        file_list = ", ".join(_quote_literal(path) for path in files)
+        relation = self.con.sql(f"SELECT * FROM read_parquet([{file_list}], {HIVE_OPTIONS})")
+        if columns:
+            relation = relation.project(", ".join(_quote_identifier(c) for c in columns))
+        if where:
+            relation = relation.filter(where)
+        return relation
+
+    def sql(self, query: str) -> "duckdb.DuckDBPyRelation":
+        """Run SQL against the registered views and return a lazy relation."""
+        return self.con.sql(query)
+
+    def fetch_batches(self, query: str, batch_size: int = DEFAULT_BATCH_ROWS) -> Iterator["pyarrow.RecordBatch"]:
+        """
+        Stream query results as Arrow record batches.
+
+        Args:
+            query: SQL query
+            batch_size: Maximum rows per batch
+
+        Yields:
+            pyarrow.RecordBatch objects
+        """
+        reader = self.con.execute(query).fetch_record_batch(batch_size)
+        yield from reader
+
+    def export(self, query: str, path: str) -> Path:
+        """
+        Write query results to a CSV or Parquet file (chosen by extension).
+
+        The copy runs inside DuckDB and streams, so results larger than
+        memory are fine.
+        """
+        target = Path(path)
+        options = EXPORT_FORMATS.get(target.suffix.lower())
+        if options is None:
+            raise ValueError(f"Unsupported export format: {target.suffix}. Use .csv or .parquet")
+
+        target.parent.mkdir(parents=True, exist_ok=True)
+        self.con.execute(f"COPY ({query}) TO {_quote_literal(str(target))} (FORMAT {options})")
+        return target
+
+    def close(self):
+        self.con.close()
+
+    def __enter__(self) -> "ArchiveQuery":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
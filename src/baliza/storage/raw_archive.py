@@ -0,0 +1,228 @@
+"""
+Append-only archive of raw PNCP response bodies.
+
+Every response fetched during extraction is kept so outputs can be rebuilt
+offline (``baliza replay``) after a transform changes, instead of asking
+PNCP for years of data again.
+
+Layout, under ``{output_dir}/.baliza/raw/{endpoint}/{bucket}/``
+(bucket = "YYYY-MM" request window, or "YYYY" for annual endpoints):
+
+- ``{segment}.jsonl.zst``: one compressed frame per response, each frame
+  decompressing to one JSON line ``{"url", "status", "fetched_at", "body"}``.
+  Frames are independent, so any of them can be read on its own.
+- ``{segment}.idx``: one JSON line per frame with its byte offset and
+  length plus the route the records were loaded with (destination table,
+  fixed partition or partition field), appended only after the frame is
+  written.
+
+Frames use zstd when the optional ``zstandard`` package is installed
+(``pip install baliza[raw]``) and gzip otherwise; the segment extension
+records which. Segment names include the writer's pid, so concurrent
+processes never append to the same file.
+"""
+
+import gzip
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from baliza.settings import settings
+
+INDEX_SUFFIX = ".idx"
+CODEC_SUFFIXES = {"zstd": ".jsonl.zst", "gzip": ".jsonl.gz"}
+
+_lock = threading.Lock()
+_open_segments: Dict[Tuple[str, str, str], Path] = {}
+
+
+@dataclass(frozen=True)
+class Segment:
+    """One segment file and the endpoint/bucket it belongs to."""
+    endpoint: str
+    bucket: str
+    path: Path
+
+    @property
+    def index_path(self) -> Path:
+        return _index_path(self.path)
+
+
+def raw_dir(output_dir: str) -> Path:
+    return Path(output_dir) / ".baliza" / "raw"
+
+
+def _index_path(segment_path: Path) -> Path:
+    return segment_path.with_name(segment_path.name.split(".")[0] + INDEX_SUFFIX)
+
+
+def _codec_of(path: Path) -> str:
+    return "zstd" if path.name.endswith(CODEC_SUFFIXES["zstd"]) else "gzip"
+
+
+def default_codec() -> str:
+    try:
+        import zstandard  # noqa: F401
+        return "zstd"
+    except ImportError:
+        return "gzip"
+
+
+def _compress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        import zstandard
+        return zstandard.ZstdCompressor(level=settings.raw_archive_zstd_level).compress(data)
+    return gzip.compress(data, compresslevel=6)
+
+
+def _decompress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        try:
+            import zstandard
+        except ImportError as e:
+            raise ImportError("Reading .zst raw segments requires zstandard: pip install baliza[raw]") from e
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+
+def _segment_for(output_dir: str, endpoint: str, bucket: str) -> Path:
+    """Current segment of this process for (endpoint, bucket); rotated past raw_segment_max_bytes."""
+    cache_key = (str(output_dir), endpoint, bucket)
+    path = _open_segments.get(cache_key)
+    if path is None or (path.exists() and path.stat().st_size >= settings.raw_segment_max_bytes):
+        directory = raw_dir(output_dir) / endpoint / bucket
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"{time.time_ns()}-{os.getpid()}{CODEC_SUFFIXES[default_codec()]}"
+        _open_segments[cache_key] = path
+    return path
+
+
+def append_response(
+    output_dir: str,
+    endpoint: str,
+    bucket: str,
+    body: bytes,
+    url: str = "",
+    status: int = 200,
+    route: Optional[Dict[str, Any]] = None
+) -> Tuple[Path, int]:
+    """
+    Append one response body as a new frame.
+
+    Args:
+        output_dir: Base output directory
+        endpoint: Endpoint the response came from
+        bucket: "YYYY-MM" request window (or "YYYY")
+        body: Raw response body
+        url: Request URL, query string included
+        status: HTTP status code
+        route: How the records were loaded: ``table`` plus either
+            ``partition`` ("YYYY-MM") or ``partition_field``
+
+    Returns:
+        (segment path, frame offset)
+    """
+    line = json.dumps({
+        "url": url,
+        "status": status,
+        "fetched_at": datetime.now(timezone.utc).isoformat(),
+        "body": body.decode("utf-8", errors="replace"),
+    }, ensure_ascii=False).encode("utf-8") + b"\n"
+
+    with _lock:
+        path = _segment_for(output_dir, endpoint, bucket)
+        frame = _compress(line, _codec_of(path))
+        with path.open("ab") as f:
+            offset = f.tell()
+            f.write(frame)
+        entry = {"offset": offset, "length": len(frame), "status": status, "url": url, **(route or {})}
+        with _index_path(path).open("a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    return path, offset
+
+
+def response_hook(
+    output_dir: str,
+    endpoint: str,
+    bucket: str,
+    **route: Any
+) -> Optional[Callable]:
+    """
+    Build a callback archiving responses, or None when the archive is disabled.
+
+    Works as a dlt REST API ``response_actions`` hook and as the
+    ``on_response`` callback of ``extraction.http_client.get_json``: both
+    requests and httpx responses expose ``content``, ``url`` and
+    ``status_code``.
+    """
+    if not settings.enable_raw_archive:
+        return None
+
+    def archive(response, *args, **kwargs):
+        if response.status_code < 300 and response.content:
+            append_response(output_dir, endpoint, bucket, response.content,
+                            str(response.url), response.status_code, route)
+        return response
+
+    return archive
+
+
+def list_segments(
+    output_dir: str,
+    endpoints: Optional[List[str]] = None,
+    start_bucket: Optional[str] = None,
+    end_bucket: Optional[str] = None
+) -> List[Segment]:
+    """
+    Segments in the raw archive, optionally filtered.
+
+    Args:
+        output_dir: Base output directory
+        endpoints: Only these endpoints
+        start_bucket: First bucket, e.g. "2024-01" (inclusive, compared as text)
+        end_bucket: Last bucket, e.g. "2024-12" (inclusive; "2024" buckets sort before "2024-01")
+    """
+    root = raw_dir(output_dir)
+    if not root.exists():
+        return []
+
+    segments = []
+    for endpoint_dir in sorted(p for p in root.iterdir() if p.is_dir()):
+        if endpoints and endpoint_dir.name not in endpoints:
+            continue
+        for bucket_dir in sorted(p for p in endpoint_dir.iterdir() if p.is_dir()):
+            if start_bucket and bucket_dir.name < start_bucket[: len(bucket_dir.name)]:
+                continue
+            if end_bucket and bucket_dir.name[: len(end_bucket)] > end_bucket:
+                continue
+            for path in sorted(bucket_dir.glob("*.jsonl.*")):
+                segments.append(Segment(endpoint_dir.name, bucket_dir.name, path))
+    return segments
+
+
+def read_segment(path: Path) -> Iterator[Tuple[Dict[str, Any], Dict[str, Any]]]:
+    """
+    Yield (index entry, decoded frame) for every indexed frame of a segment.
+
+    Frames past the last index line (a writer interrupted mid-append) are
+    ignored.
+    """
+    path = Path(path)
+    codec = _codec_of(path)
+    index_path = _index_path(path)
+    if not index_path.exists():
+        return
+
+    with index_path.open(encoding="utf-8") as index, path.open("rb") as data:
+        for line in index:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            data.seek(entry["offset"])
+            frame = json.loads(_decompress(data.read(entry["length"]), codec))
+            yield entry, frame
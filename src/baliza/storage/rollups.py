@@ -0,0 +1,147 @@
+"""
+Incrementally maintained aggregate (rollup) tables.
+
+Rollups pre-aggregate the spend fields dashboards group by órgão, UF,
+modalidade and month. They are partitioned exactly like the raw tables
+(``pncp_rollups/{rollup}/year=YYYY/month=MM``), so a load only recomputes the
+rollup partitions of the months it touched, and dashboard queries read a
+few KB instead of scanning the archive.
+"""
+
+import os
+from dataclasses import dataclass
+from typing import Iterable, List, Optional, Tuple
+
+import duckdb
+
+from .layout import ROLLUP_DATASET_NAME, list_partitions, list_tables, partition_dir
+from .query import _quote_identifier, _quote_literal
+
+
+@dataclass(frozen=True)
+class Rollup:
+    """Definition of one aggregate table over a raw table."""
+    name: str
+    source_table: str
+    value_columns: Tuple[str, ...]
+    dimensions: Tuple[str, ...]
+
+
+# Column names follow dlt's snake_case normalization of the PNCP payloads
+# (e.g. orgaoEntidade.cnpj -> orgao_entidade__cnpj).
+ROLLUPS: List[Rollup] = [
+    Rollup(
+        name="contratos_mensal",
+        source_table="contratos",
+        value_columns=("valor_global", "valor_inicial"),
+        dimensions=("orgao_entidade__cnpj", "unidade_orgao__uf_sigla"),
+    ),
+    Rollup(
+        name="contratacoes_mensal",
+        source_table="contratacoes_publicacao",
+        value_columns=("valor_total_estimado", "valor_total_homologado"),
+        dimensions=("orgao_entidade__cnpj", "unidade_orgao__uf_sigla", "modalidade_id"),
+    ),
+]
+
+
+def _rollup_sql(rollup: Rollup, files: List[str]) -> str:
+    """SELECT computing one rollup partition from the source partition files."""
+    dimensions = ", ".join(_quote_identifier(c) for c in rollup.dimensions)
+    sums = ", ".join(
+        f"sum({_quote_identifier(c)}) AS {_quote_identifier(c)}" for c in rollup.value_columns
+    )
+    file_list = ", ".join(_quote_literal(f) for f in files)
+    # DISTINCT ON _dlt_id: re-runs of a month may append the same record twice
+    return (
+        f"SELECT {dimensions}, count(*) AS registros, {sums} "
+        f"FROM (SELECT DISTINCT ON (_dlt_id) * FROM read_parquet([{file_list}], union_by_name = true)) "
+        f"GROUP BY {dimensions}"
+    )
+
+
+def refresh_rollup_partition(
+    output_dir: str,
+    rollup: Rollup,
+    year: int,
+    month: int,
+    con: Optional["duckdb.DuckDBPyConnection"] = None
+) -> bool:
+    """
+    Recompute one month of a rollup from its source partition.
+
+    The partition is written to a temporary file and swapped in with
+    ``os.replace`` so readers never see a half-written rollup.
+
+    Returns:
+        True if the partition was written, False if the source month is empty
+    """
+    month_key = f"{year:04d}-{month:02d}"
+    partitions = list_partitions(output_dir, rollup.source_table, month_key, month_key)
+    if not partitions:
+        return False
+
+    files = [str(path) for path in partitions[0].files]
+    target_dir = partition_dir(output_dir, rollup.name, year, month, dataset=ROLLUP_DATASET_NAME)
+    target_dir.mkdir(parents=True, exist_ok=True)
+    target = target_dir / "rollup.parquet"
+    tmp_target = target_dir / "rollup.parquet.tmp"
+
+    connection = con or duckdb.connect()
+    try:
+        connection.execute(
+            f"COPY ({_rollup_sql(rollup, files)}) TO {_quote_literal(str(tmp_target))} (FORMAT PARQUET)"
+        )
+    finally:
+        if con is None:
+            connection.close()
+
+    os.replace(tmp_target, target)
+    return True
+
+
+def refresh_rollups(
+    output_dir: str,
+    touched: Optional[Iterable[Tuple[str, int, int]]] = None
+) -> int:
+    """
+    Recompute the rollup partitions affected by a load.
+
+    Args:
+        output_dir: Base output directory
+        touched: (table, year, month) partitions written by the load.
+            None rebuilds every rollup partition (initial build).
+
+    Returns:
+        Number of rollup partitions written
+    """
+    if touched is None:
+        touched = [
+            (rollup.source_table, partition.year, partition.month)
+            for rollup in ROLLUPS
+            for partition in list_partitions(output_dir, rollup.source_table)
+        ]
+
+    written = 0
+    con = duckdb.connect()
+    try:
+        for table, year, month in sorted(set(touched)):
+            for rollup in ROLLUPS:
+                if rollup.source_table != table:
+                    continue
+                try:
+                    if refresh_rollup_partition(output_dir, rollup, year, month, con):
+                        written += 1
+                except duckdb.Error as e:
+                    # Missing columns (e.g. an empty month without the value field)
+                    # must not fail the load itself
+                    print(f"⚠️  Could not refresh rollup {rollup.name} {year:04d}-{month:02d}: {e}")
+    finally:
+        con.close()
+
+    return written
+
+
+def list_rollups(output_dir: str) -> List[str]:
+    """List rollup tables that have at least one partition."""
+    return list_tables(output_dir, dataset=ROLLUP_DATASET_NAME)
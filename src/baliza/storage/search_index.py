@@ -0,0 +1,234 @@
+"""
+Full-text search over the free-text procurement object fields.
+
+An optional SQLite FTS5 index over ``objetoCompra``, ``objetoContrato`` and
+``objetoContratacao``, stored in ``.baliza/search.sqlite`` and maintained
+per partition: a load deletes and re-inserts only the documents of the
+months it touched.
+
+Text is normalized for Portuguese before it reaches FTS5: accents are
+folded, stopwords dropped and plurals reduced to the singular (a light
+version of the RSLP plural step), so "aquisição de ambulâncias" also
+matches "AQUISICOES ... AMBULANCIA". Queries go through the same
+normalization.
+"""
+
+import re
+import sqlite3
+import unicodedata
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+from .layout import list_partitions
+
+# Searchable text column and record id column per table (dlt-normalized names)
+SEARCH_FIELDS = {
+    "contratacoes_publicacao": ("objeto_compra", "numero_controle_pncp"),
+    "contratos": ("objeto_contrato", "numero_controle_pncp"),
+    "atas": ("objeto_contratacao", "numero_controle_pncp_ata"),
+}
+
+STOPWORDS = frozenset("""
+    a ao aos as com da das de do dos e em na nas no nos o os ou para pela pelas
+    pelo pelos por que se sem sob sobre um uma umas uns
+""".split())
+
+# (suffix, replacement) applied to the first matching suffix, longest first
+PLURAL_RULES = [
+    ("oes", "ao"), ("aes", "ao"), ("ais", "al"), ("eis", "el"), ("ois", "ol"),
+    ("res", "r"), ("zes", "z"), ("ses", "s"), ("ns", "m"), ("is", "il"), ("s", ""),
+]
+
+_WORD = re.compile(r"\w+")
+
+
+@dataclass(frozen=True)
+class SearchHit:
+    """A matching record and where it lives in the archive."""
+    table: str
+    year: int
+    month: int
+    file: str
+    row_group: int
+    record_id: Optional[str]
+    text: str
+    score: float
+
+
+def fold_accents(text: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def _singular(word: str) -> str:
+    if len(word) <= 3 or not word.endswith("s"):
+        return word
+    for suffix, replacement in PLURAL_RULES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 2:
+            return word[: len(word) - len(suffix)] + replacement
+    return word
+
+
+def normalize_terms(text: str) -> List[str]:
+    """Lowercase, accent-fold, drop stopwords and singularize."""
+    words = _WORD.findall(fold_accents(text or "").lower())
+    return [_singular(word) for word in words if word not in STOPWORDS]
+
+
+def index_path(output_dir: str) -> Path:
+    return Path(output_dir) / ".baliza" / "search.sqlite"
+
+
+def _connect(output_dir: str) -> sqlite3.Connection:
+    path = index_path(output_dir)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    con = sqlite3.connect(path)
+    con.execute("PRAGMA journal_mode = WAL")
+    con.executescript("""
+        CREATE TABLE IF NOT EXISTS documents (
+            id INTEGER PRIMARY KEY,
+            table_name TEXT NOT NULL,
+            year INTEGER NOT NULL,
+            month INTEGER NOT NULL,
+            file TEXT NOT NULL,
+            row_group INTEGER NOT NULL,
+            record_id TEXT,
+            text TEXT
+        );
+        CREATE INDEX IF NOT EXISTS documents_partition ON documents (table_name, year, month);
+        CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(
+            terms, tokenize = 'unicode61 remove_diacritics 2'
+        );
+    """)
+    return con
+
+
+def index_partition(con: sqlite3.Connection, output_dir: str, table: str, year: int, month: int) -> int:
+    """
+    Replace the documents of one partition in the index.
+
+    Returns:
+        Number of documents indexed
+    """
+    import pyarrow.parquet as pq
+
+    text_column, id_column = SEARCH_FIELDS[table]
+    month_key = f"{year:04d}-{month:02d}"
+
+    con.execute(
+        "DELETE FROM documents_fts WHERE rowid IN "
+        "(SELECT id FROM documents WHERE table_name = ? AND year = ? AND month = ?)",
+        (table, year, month)
+    )
+    con.execute("DELETE FROM documents WHERE table_name = ? AND year = ? AND month = ?", (table, year, month))
+
+    indexed = 0
+    for partition in list_partitions(output_dir, table, month_key, month_key):
+        for path in partition.files:
+            parquet_file = pq.ParquetFile(path)
+            names = parquet_file.schema_arrow.names
+            if text_column not in names:
+                continue
+            columns = [text_column] + ([id_column] if id_column in names else [])
+
+            for row_group in range(parquet_file.num_row_groups):
+                data = parquet_file.read_row_group(row_group, columns=columns).to_pydict()
+                texts = data[text_column]
+                ids = data.get(id_column, [None] * len(texts))
+
+                for text, record_id in zip(texts, ids):
+                    if not text:
+                        continue
+                    cursor = con.execute(
+                        "INSERT INTO documents (table_name, year, month, file, row_group, record_id, text) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (table, year, month, path.name, row_group, record_id, text)
+                    )
+                    con.execute(
+                        "INSERT INTO documents_fts (rowid, terms) VALUES (?, ?)",
+                        (cursor.lastrowid, " ".join(normalize_terms(text)))
+                    )
+                    indexed += 1
+
+    return indexed
+
+
+def refresh_search_index(
+    output_dir: str,
+    touched: Optional[Iterable[Tuple[str, int, int]]] = None
+) -> int:
+    """
+    Re-index the partitions touched by a load.
+
+    Args:
+        output_dir: Base output directory
+        touched: (table, year, month) partitions written by the load.
+            None re-indexes every partition.
+
+    Returns:
+        Number of documents indexed
+    """
+    if touched is None:
+        touched = [
+            (table, partition.year, partition.month)
+            for table in SEARCH_FIELDS
+            for partition in list_partitions(output_dir, table)
+        ]
+
+    con = _connect(output_dir)
+    try:
+        indexed = 0
+        for table, year, month in sorted(set(touched)):
+            if table in SEARCH_FIELDS:
+                with con:
+                    indexed += index_partition(con, output_dir, table, year, month)
+        return indexed
+    finally:
+        con.close()
+
+
+def search(
+    output_dir: str,
+    query: str,
+    limit: int = 50,
+    tables: Optional[List[str]] = None
+) -> List[SearchHit]:
+    """
+    Search the procurement object fields.
+
+    Every (normalized) query term must match; results are ranked by BM25.
+
+    Args:
+        output_dir: Base output directory
+        query: Free text, e.g. "aquisição de ambulâncias"
+        limit: Maximum number of hits
+        tables: Restrict to these tables (default: all indexed tables)
+
+    Returns:
+        Hits ordered by relevance
+    """
+    terms = normalize_terms(query)
+    if not terms or not index_path(output_dir).exists():
+        return []
+
+    match = " AND ".join(f'"{term}"' for term in terms)
+    sql = (
+        "SELECT d.table_name, d.year, d.month, d.file, d.row_group, d.record_id, d.text, "
+        "bm25(documents_fts) AS score "
+        "FROM documents_fts JOIN documents d ON d.id = documents_fts.rowid "
+        "WHERE documents_fts MATCH ?"
+    )
+    params: list = [match]
+    if tables:
+        sql += f" AND d.table_name IN ({', '.join('?' for _ in tables)})"
+        params.extend(tables)
+    sql += " ORDER BY score LIMIT ?"
+    params.append(limit)
+
+    con = _connect(output_dir)
+    try:
+        return [SearchHit(*row) for row in con.execute(sql, params)]
+    finally:
+        con.close()
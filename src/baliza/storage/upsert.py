@@ -0,0 +1,204 @@
+"""
+Latest-wins upsert of archive partitions by natural key.
+
+The filesystem destination can only append, so when PNCP republishes a
+record (new ``dataAtualizacao``, hence a new ``_dlt_id`` hash) a partition
+ends up holding every version of it. After each load the touched partitions
+are compacted:
+
+- the newest version per ``_baliza_key`` (ordered by ``_baliza_version``)
+  stays in the table, rewritten as a single ``current.parquet`` file;
+- superseded versions not seen before are appended to ``{table}__history``
+  (same month partition), so prior versions remain queryable and linked
+  by ``_baliza_key``;
+- dlt nested tables (``{table}__{field}``, ``{table}__{field}__{sub}``)
+  are pruned the same way, level by level: a row stays while its
+  ``_dlt_parent_id`` row does.
+"""
+
+import os
+import time
+from typing import Iterable, List, Optional, Set, Tuple
+
+import duckdb
+
+from .layout import NATURAL_KEY_COLUMN, VERSION_COLUMN, list_partitions, list_tables, partition_dir
+from .query import _quote_literal
+
+HISTORY_SUFFIX = "__history"
+CURRENT_FILE = "current.parquet"
+
+
+def _read_sql(files: List[str]) -> str:
+    file_list = ", ".join(_quote_literal(f) for f in files)
+    return f"read_parquet([{file_list}], union_by_name = true)"
+
+
+def _columns(con: "duckdb.DuckDBPyConnection", files: List[str]) -> Set[str]:
+    return {row[0] for row in con.execute(f"DESCRIBE SELECT * FROM {_read_sql(files)}").fetchall()}
+
+
+def _count(con: "duckdb.DuckDBPyConnection", relation_sql: str) -> int:
+    row = con.execute(f"SELECT count(*) FROM {relation_sql}").fetchone()
+    return row[0] if row else 0
+
+
+def _partition_files(output_dir: str, table: str, year: int, month: int) -> List[str]:
+    month_key = f"{year:04d}-{month:02d}"
+    partitions = list_partitions(output_dir, table, month_key, month_key)
+    return [str(path) for path in partitions[0].files] if partitions else []
+
+
+def _replace_partition(
+    con: "duckdb.DuckDBPyConnection",
+    output_dir: str,
+    table: str,
+    year: int,
+    month: int,
+    files: List[str],
+    select_sql: str
+):
+    """Rewrite a partition as a single file holding ``select_sql``'s rows."""
+    target_dir = partition_dir(output_dir, table, year, month)
+    tmp_target = target_dir / f".{CURRENT_FILE}.tmp"
+    con.execute(f"COPY ({select_sql}) TO {_quote_literal(str(tmp_target))} (FORMAT PARQUET)")
+
+    os.replace(tmp_target, target_dir / CURRENT_FILE)
+    for path in files:
+        if os.path.basename(path) != CURRENT_FILE:
+            os.remove(path)
+
+
+def _append_history(
+    con: "duckdb.DuckDBPyConnection",
+    output_dir: str,
+    table: str,
+    year: int,
+    month: int,
+    select_sql: str,
+    id_column: str
+) -> int:
+    """Append rows not already in the history partition; returns rows written."""
+    history_table = f"{table}{HISTORY_SUFFIX}"
+    history_files = _partition_files(output_dir, history_table, year, month)
+    if history_files:
+        select_sql = (
+            f"SELECT * FROM ({select_sql}) "
+            f"WHERE {id_column} NOT IN (SELECT {id_column} FROM {_read_sql(history_files)})"
+        )
+
+    count = _count(con, f"({select_sql})")
+    if not count:
+        return 0
+
+    target_dir = partition_dir(output_dir, history_table, year, month)
+    target_dir.mkdir(parents=True, exist_ok=True)
+    target = target_dir / f"{time.time_ns()}.parquet"
+    tmp_target = target_dir / f".{target.name}.tmp"
+    con.execute(f"COPY ({select_sql}) TO {_quote_literal(str(tmp_target))} (FORMAT PARQUET)")
+    os.replace(tmp_target, target)
+    return count
+
+
+def upsert_partition(
+    output_dir: str,
+    table: str,
+    year: int,
+    month: int,
+    con: Optional["duckdb.DuckDBPyConnection"] = None
+) -> int:
+    """
+    Compact one partition to the latest version per natural key.
+
+    Returns:
+        Number of superseded versions moved to the history table
+    """
+    files = _partition_files(output_dir, table, year, month)
+    if not files:
+        return 0
+
+    connection = con or duckdb.connect()
+    try:
+        columns = _columns(connection, files)
+        if NATURAL_KEY_COLUMN not in columns:
+            return 0  # Loaded before natural keys existed
+
+        order = f"{VERSION_COLUMN} DESC NULLS LAST" if VERSION_COLUMN in columns else "1"
+        if "_dlt_load_id" in columns:
+            order += ", _dlt_load_id DESC"
+
+        # Identical versions (same _dlt_id) loaded twice are duplicates, not history.
+        # Records without a natural key are not versions of one another: kept as they are
+        deduped = f"(SELECT DISTINCT ON (_dlt_id) * FROM {_read_sql(files)})"
+        versions = (
+            f"SELECT *, row_number() OVER (PARTITION BY {NATURAL_KEY_COLUMN} ORDER BY {order}) AS _baliza_rank "
+            f"FROM {deduped} WHERE {NATURAL_KEY_COLUMN} IS NOT NULL "
+            f"UNION ALL BY NAME "
+            f"SELECT *, 1 AS _baliza_rank FROM {deduped} WHERE {NATURAL_KEY_COLUMN} IS NULL"
+        )
+        connection.execute(f"CREATE OR REPLACE TEMP TABLE _versions AS {versions}")
+
+        current = _count(connection, "_versions WHERE _baliza_rank = 1")
+        raw_rows = _count(connection, _read_sql(files))
+        if raw_rows == current and len(files) == 1:
+            return 0  # Already compact
+
+        superseded = _append_history(
+            connection, output_dir, table, year, month,
+            "SELECT * EXCLUDE (_baliza_rank) FROM _versions WHERE _baliza_rank > 1",
+            "_dlt_id"
+        )
+
+        connection.execute("CREATE OR REPLACE TEMP TABLE _current_ids AS "
+                           "SELECT _dlt_id FROM _versions WHERE _baliza_rank = 1")
+
+        # Nested tables follow their parent rows (_dlt_parent_id), parents before children
+        current_ids = {table: "_current_ids"}
+        children = [child for child in list_tables(output_dir)
+                    if child.startswith(f"{table}__") and not child.endswith(HISTORY_SUFFIX)]
+        for level, child in enumerate(sorted(children, key=lambda name: name.count("__")), 1):
+            parent_ids = current_ids.get(child.rsplit("__", 1)[0])
+            child_files = _partition_files(output_dir, child, year, month)
+            if parent_ids is None or not child_files or "_dlt_parent_id" not in _columns(connection, child_files):
+                continue
+
+            child_rows = f"SELECT DISTINCT ON (_dlt_id) * FROM {_read_sql(child_files)}"
+            kept = f"_dlt_parent_id IN (SELECT _dlt_id FROM {parent_ids})"
+            connection.execute(f"CREATE OR REPLACE TEMP TABLE _current_ids_{level} AS "
+                               f"SELECT _dlt_id FROM ({child_rows}) WHERE {kept}")
+            current_ids[child] = f"_current_ids_{level}"
+            _append_history(
+                connection, output_dir, child, year, month,
+                f"SELECT * FROM ({child_rows}) WHERE NOT {kept}",
+                "_dlt_id"
+            )
+            _replace_partition(
+                connection, output_dir, child, year, month, child_files,
+                f"SELECT * FROM ({child_rows}) WHERE {kept}"
+            )
+
+        _replace_partition(
+            connection, output_dir, table, year, month, files,
+            "SELECT * EXCLUDE (_baliza_rank) FROM _versions WHERE _baliza_rank = 1"
+        )
+        return superseded
+    finally:
+        if con is None:
+            connection.close()
+
+
+def upsert_partitions(output_dir: str, touched: Iterable[Tuple[str, int, int]]) -> int:
+    """
+    Compact the partitions touched by a load.
+
+    Returns:
+        Number of superseded versions moved to history tables
+    """
+    moved = 0
+    con = duckdb.connect()
+    try:
+        for table, year, month in sorted(set(touched)):
+            moved += upsert_partition(output_dir, table, year, month, con)
+    finally:
+        con.close()
+    return moved
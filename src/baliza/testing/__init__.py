@@ -0,0 +1,17 @@
+"""
+Testing and load-testing helpers.
+
+Key components:
+- mock_server.py: Local PNCP API stand-in generated from the OpenAPI spec,
+  with pagination, configurable volume, latency, error bursts and schema drift
+- synthetic.py: Deterministic, streaming generator of payloads for every
+  DTO in models.py (pages or Parquet), with realistic enum and CNPJ skew
+- benchmark.py: End-to-end and per-stage throughput benchmarks with JSON output
+"""
+
+from .mock_server import MockConfig, MockPNCPServer
+
+__all__ = [
+    "MockConfig",
+    "MockPNCPServer",
+]
@@ -0,0 +1,307 @@
+"""
+End-to-end throughput benchmarks.
+
+Runs the real extraction paths against the local mock server (see
+mock_server.py) with synthetic volume and reports machine-readable JSON,
+so results can be compared across commits:
+
+- ``end_to_end``: ``run_structured_extraction`` over the configured
+  window, with records/s, requests/s, bytes written and peak RSS;
+- ``stages``: the same window split into fetch (raw HTTP), decode (JSON),
+  hash (processing steps), and dlt's extract, normalize and write (load)
+  steps;
+- ``micro``: ``hash_sha256``, ``_add_hash_id``, gap detection and the
+  completion marker scan.
+
+Usage:
+    python -m baliza.testing.benchmark --records-per-day 2000 --days 14 -o bench.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from baliza.settings import ENDPOINT_CONFIG, settings
+from .mock_server import MockConfig, MockPNCPServer
+
+try:
+    import resource
+except ImportError:  # Windows: no peak RSS
+    resource = None  # type: ignore[assignment]
+
+
+@dataclass
+class BenchmarkConfig:
+    """Volume and scope of a benchmark run."""
+    start_date: str = "20240101"
+    days: int = 7
+    records_per_day: int = 500
+    latency_ms: float = 0.0
+    endpoints: List[str] = field(default_factory=lambda: ["contratos"])
+    micro_iterations: int = 2_000
+    marker_months: int = 60
+    seed: int = 42
+    generator: str = "openapi"             # Mock server payloads: "openapi" or "models" (synthetic.py)
+
+    @property
+    def end_date(self) -> str:
+        start = datetime.strptime(self.start_date, "%Y%m%d").date()
+        return (start + timedelta(days=self.days - 1)).strftime("%Y%m%d")
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process and its children, in MiB (None without ``resource``)."""
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss + resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    return usage / (1024 * 1024) if sys.platform == "darwin" else usage / 1024
+
+
+def dir_bytes(path: Path) -> int:
+    return sum(f.stat().st_size for f in Path(path).rglob("*") if f.is_file())
+
+
+def _rate(count: float, seconds: float) -> Optional[float]:
+    return round(count / seconds, 2) if seconds > 0 else None
+
+
+def _time(fn: Callable[[], Any]) -> float:
+    started = time.perf_counter()
+    fn()
+    return time.perf_counter() - started
+
+
+def _micro(fn: Callable[[], Any], iterations: int) -> Dict[str, Any]:
+    seconds = _time(lambda: [fn() for _ in range(iterations)])
+    return {"iterations": iterations, "seconds": round(seconds, 6), "ops_per_s": _rate(iterations, seconds)}
+
+
+def _archive_rows(output_dir: str, table: str) -> int:
+    import pyarrow.parquet as pq
+    from baliza.storage.layout import list_partitions
+
+    return sum(
+        pq.ParquetFile(path).metadata.num_rows
+        for partition in list_partitions(output_dir, table)
+        for path in partition.files
+    )
+
+
+def micro_benchmarks(config: BenchmarkConfig, server: MockPNCPServer, workdir: Path) -> Dict[str, Any]:
+    from baliza.extraction.config import _add_hash_id
+    from baliza.extraction.gap_detector import find_extraction_gaps
+    from baliza.utils import hash_sha256
+    from baliza.utils.completion_tracking import get_completed_extractions, mark_extraction_completed
+
+    route = next(r for r in server.routes if r[1] == config.endpoints[0])
+    params = {"dataInicial": config.start_date, "dataFinal": config.end_date}
+    record = server.record(config.endpoints[0], route[2], params, 0)
+
+    results = {
+        "hash_sha256": _micro(lambda: hash_sha256(record), config.micro_iterations),
+        "add_hash_id": _micro(lambda: _add_hash_id(record), config.micro_iterations),
+    }
+
+    # Gap detection and the completion scan read markers from ./data
+    markers = workdir / "markers"
+    first_month = date(2021, 1, 1)
+    last_month = date(first_month.year + (config.marker_months - 1) // 12, (config.marker_months - 1) % 12 + 1, 1)
+    mark_extraction_completed(str(markers / "data"), first_month.strftime("%Y%m%d"),
+                              last_month.strftime("%Y%m28"), config.endpoints)
+
+    cwd = os.getcwd()
+    os.chdir(markers)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            scan_iterations = max(1, config.micro_iterations // 100)
+            results["completion_scan"] = _micro(lambda: get_completed_extractions("data"), scan_iterations)
+            results["completion_scan"]["markers"] = config.marker_months * len(config.endpoints)
+            results["gap_detection"] = _micro(
+                lambda: find_extraction_gaps(first_month.strftime("%Y%m%d"), date.today().strftime("%Y%m%d"),
+                                             config.endpoints),
+                scan_iterations
+            )
+    finally:
+        os.chdir(cwd)
+
+    return results
+
+
+def stage_benchmarks(config: BenchmarkConfig, server: MockPNCPServer, workdir: Path) -> Dict[str, Any]:
+    """Time each stage of one endpoint-window on its own."""
+    import httpx
+    from baliza.extraction.config import default_headers, record_processing_steps
+    from baliza.extraction.pipeline import create_default_pipeline, window_source
+
+    endpoint = config.endpoints[0]
+    endpoint_config = ENDPOINT_CONFIG[endpoint]
+    params = {"dataInicial": config.start_date, "dataFinal": config.end_date,
+              "tamanhoPagina": endpoint_config.default_page_size}
+
+    bodies: List[bytes] = []
+
+    def fetch():
+        with httpx.Client(base_url=server.base_url, headers=default_headers()) as client:
+            page, total_pages = 1, 1
+            while page <= total_pages:
+                response = client.get(endpoint_config.path, params={**params, "pagina": page})
+                if response.status_code != 200:
+                    break
+                bodies.append(response.content)
+                total_pages = response.json()["totalPaginas"]
+                page += 1
+
+    pages: List[Dict[str, Any]] = []
+    records: List[Dict[str, Any]] = []
+    steps = record_processing_steps(endpoint_config)
+
+    def hash_records():
+        for page in pages:
+            for record in page["data"]:
+                for step in steps:
+                    record = step(record)
+                records.append(record)
+
+    stages = {"fetch": _time(fetch)}
+    stages["decode"] = _time(lambda: pages.extend(json.loads(body) for body in bodies))
+    stages["hash"] = _time(hash_records)
+
+    output_dir = workdir / "stages"
+    partition = (int(config.start_date[:4]), int(config.start_date[4:6]))
+    pipeline = create_default_pipeline("parquet", str(output_dir), partition=partition, pipeline_name="baliza_benchmark")
+    stages["extract"] = _time(lambda: pipeline.extract(window_source(endpoint, config.start_date, config.end_date)))
+    stages["normalize"] = _time(pipeline.normalize)
+    stages["write"] = _time(pipeline.load)
+
+    return {
+        "endpoint": endpoint,
+        "records": len(records),
+        "requests": len(bodies),
+        "response_bytes": sum(len(body) for body in bodies),
+        "seconds": {name: round(seconds, 6) for name, seconds in stages.items()},
+        "records_per_s": {name: _rate(len(records), seconds) for name, seconds in stages.items()},
+        "fetch_mb_per_s": _rate(sum(len(body) for body in bodies) / 1e6, stages["fetch"]),
+    }
+
+
+def end_to_end(config: BenchmarkConfig, server: MockPNCPServer, workdir: Path) -> Dict[str, Any]:
+    from baliza.extraction.pipeline import run_structured_extraction
+
+    output_dir = workdir / "end_to_end"
+    requests_before = server.stats["requests"]
+    served_before = server.stats["bytes_sent"]
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        seconds = _time(lambda: run_structured_extraction(
+            config.start_date, config.end_date, config.endpoints, str(output_dir), skip_completed=False
+        ))
+
+    records = sum(_archive_rows(str(output_dir), endpoint) for endpoint in config.endpoints)
+    requests = server.stats["requests"] - requests_before
+    written = dir_bytes(output_dir)
+    return {
+        "seconds": round(seconds, 6),
+        "records": records,
+        "requests": requests,
+        "bytes_received": server.stats["bytes_sent"] - served_before,
+        "bytes_written": written,
+        "records_per_s": _rate(records, seconds),
+        "requests_per_s": _rate(requests, seconds),
+        "mb_written_per_s": _rate(written / 1e6, seconds),
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+                              cwd=Path(__file__).parent).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(config: Optional[BenchmarkConfig] = None) -> Dict[str, Any]:
+    """
+    Run every benchmark against a fresh mock server and temporary directory.
+
+    Returns:
+        JSON-serializable results
+    """
+    config = config or BenchmarkConfig()
+    mock_config = MockConfig(
+        seed=config.seed,
+        records_per_day=config.records_per_day,
+        latency_ms=config.latency_ms,
+        generator=config.generator
+    )
+    base_url = settings.pncp_api_base_url
+
+    with tempfile.TemporaryDirectory(prefix="baliza-bench-") as tmp, MockPNCPServer(mock_config) as server:
+        workdir = Path(tmp)
+        settings.pncp_api_base_url = server.base_url
+        try:
+            results = {
+                "meta": {
+                    "commit": _git_commit(),
+                    "timestamp": datetime.now(timezone.utc).isoformat(),
+                    "python": platform.python_version(),
+                    "platform": platform.platform(),
+                    "cpus": os.cpu_count(),
+                    "config": asdict(config),
+                },
+                "micro": micro_benchmarks(config, server, workdir),
+                "stages": stage_benchmarks(config, server, workdir),
+                "end_to_end": end_to_end(config, server, workdir),
+            }
+        finally:
+            settings.pncp_api_base_url = base_url
+
+    peak = peak_rss_mb()
+    results["meta"]["peak_rss_mb"] = round(peak, 1) if peak is not None else None
+    return results
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Baliza throughput benchmarks")
+    parser.add_argument("--start-date", default="20240101")
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--records-per-day", type=int, default=500)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--endpoints", default="contratos", help="Comma-separated endpoints")
+    parser.add_argument("--micro-iterations", type=int, default=2_000)
+    parser.add_argument("--generator", choices=["openapi", "models"], default="openapi",
+                        help="Payload generator of the mock server")
+    parser.add_argument("--output", "-o", help="Write JSON results here (default: stdout)")
+    args = parser.parse_args(argv)
+
+    config = BenchmarkConfig(
+        start_date=args.start_date,
+        days=args.days,
+        records_per_day=args.records_per_day,
+        latency_ms=args.latency_ms,
+        endpoints=[e.strip() for e in args.endpoints.split(",") if e.strip()],
+        micro_iterations=args.micro_iterations,
+        generator=args.generator,
+    )
+    results = json.dumps(run_benchmarks(config), indent=2)
+
+    if args.output:
+        Path(args.output).write_text(results + "\n", encoding="utf-8")
+        print(f"📊 Benchmark results written to {args.output}")
+    else:
+        print(results)
+
+
+if __name__ == "__main__":
+    main()
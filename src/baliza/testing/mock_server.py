@@ -0,0 +1,445 @@
+"""
+Local PNCP API mock server.
+
+Serves every path of the PNCP OpenAPI spec
+(``baliza/testing/data/api-pncp-consulta.json``) from a background
+``ThreadingHTTPServer`` so extraction can be exercised end to end
+(concurrency, retries, throughput) on one machine:
+
+- records are generated from the response schema of each path, or taken
+  from ``data/fixtures/{endpoint}_response.json`` when a fixture exists
+  (``generator="models"`` uses the DTO-based generator in synthetic.py
+  instead), and are deterministic per (seed, query, record index) so every
+  page of a query stays consistent;
+- pagination follows the API: ``tamanhoPagina``/``pagina`` in,
+  ``totalRegistros``, ``totalPaginas``, ``numeroPagina``,
+  ``paginasRestantes`` and ``empty`` out, 204 for empty results;
+- volume is ``records_per_day`` per day of the requested window (or
+  ``records_per_query`` for non-dated queries);
+- faults: fixed + jittered latency, random 5xx, periodic bursts of 429
+  with ``Retry-After``, and schema drift (dropped, added and retyped
+  fields) on a fraction of records.
+
+Usage:
+    with MockPNCPServer(MockConfig(records_per_day=500, error_rate=0.01)) as server:
+        settings.pncp_api_base_url = server.base_url
+        ...
+
+    python -m baliza.testing.mock_server --port 8000 --records-per-day 500
+    baliza extract --base-url http://127.0.0.1:8000/api/consulta --date 2024-01
+"""
+
+import argparse
+import json
+import math
+import random
+import re
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from importlib.resources import files
+from importlib.resources.abc import Traversable
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+from urllib.parse import parse_qs, urlparse
+
+from baliza.settings import ENDPOINT_CONFIG
+
+# Package data, so the server also works when baliza is installed from a wheel
+DATA = files("baliza.testing") / "data"
+DEFAULT_SPEC = DATA / "api-pncp-consulta.json"
+DEFAULT_FIXTURES = DATA / "fixtures"
+API_PREFIX = "/api/consulta"
+
+
+@dataclass
+class MockConfig:
+    """Volume and fault injection settings of the mock server."""
+    seed: int = 42
+    records_per_day: int = 50
+    records_per_query: int = 200           # Queries without a date window (PCA, proposals)
+    latency_ms: float = 0.0
+    latency_jitter_ms: float = 0.0
+    error_rate: float = 0.0                # Probability of a random 500/502/503
+    throttle_every: int = 0                # Every N requests start a burst of 429s (0 = never)
+    throttle_burst: int = 3
+    retry_after: int = 1
+    drift_rate: float = 0.0                # Fraction of records with schema drift
+    endpoint_volume: Dict[str, int] = field(default_factory=dict)  # Fixed totals per endpoint
+    generator: str = "openapi"             # "openapi" (spec schemas) or "models" (synthetic.py DTO payloads)
+
+
+def _window_days(params: Dict[str, str]) -> int:
+    start = params.get("dataInicial") or params.get("dataInicio")
+    end = params.get("dataFinal") or params.get("dataFim")
+    if not start or not end:
+        return 0
+    try:
+        first = datetime.strptime(start, "%Y%m%d").date()
+        last = datetime.strptime(end, "%Y%m%d").date()
+    except ValueError:
+        return 0
+    return max(0, (last - first).days + 1)
+
+
+class SchemaFaker:
+    """Deterministic values for OpenAPI schemas, with PNCP-flavoured field heuristics."""
+
+    def __init__(self, components: Dict[str, Any]):
+        self.components = components
+
+    def resolve(self, schema: Dict[str, Any]) -> Dict[str, Any]:
+        while "$ref" in schema:
+            schema = self.components[schema["$ref"].rsplit("/", 1)[-1]]
+        return schema
+
+    def value(self, schema: Dict[str, Any], rng: random.Random, name: str, context: Dict[str, Any], depth: int = 0) -> Any:
+        schema = self.resolve(schema)
+        kind = schema.get("type", "object")
+
+        if "enum" in schema:
+            return rng.choice(schema["enum"])
+        if kind == "object":
+            if depth > 3:
+                return None
+            return {
+                prop: self.value(sub, rng, prop, context, depth + 1)
+                for prop, sub in schema.get("properties", {}).items()
+            }
+        if kind == "array":
+            count = rng.randint(1, 3) if depth < 3 else 0
+            return [self.value(schema.get("items", {}), rng, name, context, depth + 1) for _ in range(count)]
+        if kind == "integer":
+            return self._integer(name, rng, context)
+        if kind == "number":
+            return round(rng.lognormvariate(10, 1.5), 2)
+        if kind == "boolean":
+            return rng.random() < 0.5
+        return self._string(name, schema.get("format"), rng, context)
+
+    def _integer(self, name: str, rng: random.Random, context: Dict[str, Any]) -> int:
+        lowered = name.lower()
+        if lowered.startswith("ano"):
+            return context["day"].year
+        if lowered.startswith("sequencial") or lowered.startswith("numero"):
+            return context["index"] + 1
+        return rng.randint(1, 12)
+
+    def _string(self, name: str, fmt: Optional[str], rng: random.Random, context: Dict[str, Any]) -> str:
+        lowered = name.lower()
+        day: date = context["day"]
+        if fmt == "date-time" or (lowered.startswith("data") and fmt != "date"):
+            return f"{day.isoformat()}T{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:{rng.randint(0, 59):02d}"
+        if fmt == "date":
+            return day.isoformat()
+        if "cnpj" in lowered or lowered.startswith("ni"):
+            return context["cnpj"]
+        if lowered.startswith("numerocontrolepncp"):
+            return f"{context['cnpj']}-1-{context['index'] + 1:06d}/{day.year}"
+        if lowered in ("uf", "ufsigla"):
+            return rng.choice(["SP", "RJ", "MG", "RS", "PR", "BA", "PE", "CE", "DF", "RO"])
+        if lowered.startswith("objeto") or lowered.startswith("descricao") or lowered.startswith("informacao"):
+            return " ".join(rng.choice(_WORDS) for _ in range(rng.randint(6, 30))).capitalize()
+        return f"{name}-{rng.randint(1, 10_000)}"
+
+
+_WORDS = (
+    "aquisição contratação serviços material equipamentos manutenção registro preços "
+    "fornecimento medicamentos merenda escolar limpeza veículos combustível obras "
+    "reforma ambulâncias informática software consultoria locação"
+).split()
+
+
+def _synthetic_dtos() -> Dict[str, Any]:
+    from .synthetic import ENDPOINT_DTOS
+    return ENDPOINT_DTOS
+
+
+class MockPNCPServer:
+    """Threaded HTTP server answering PNCP consultation API requests."""
+
+    def __init__(
+        self,
+        config: Optional[MockConfig] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        spec_path: Union[Path, Traversable] = DEFAULT_SPEC,
+        fixtures_dir: Union[Path, Traversable] = DEFAULT_FIXTURES
+    ):
+        self.config = config or MockConfig()
+        self.spec = json.loads(spec_path.read_text(encoding="utf-8"))
+        self.faker = SchemaFaker(self.spec.get("components", {}).get("schemas", {}))
+        self.routes = self._build_routes()
+        self.fixtures = self._load_fixtures(fixtures_dir)
+        self.synthetic = None
+        if self.config.generator == "models":
+            from .synthetic import SyntheticGenerator
+            self.synthetic = SyntheticGenerator(seed=self.config.seed)
+
+        self.stats: Counter = Counter()
+        self._lock = threading.Lock()
+        self._fault_rng = random.Random(self.config.seed)
+        self._throttled_left = 0
+
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host!s}:{port}{API_PREFIX}"
+
+    def _build_routes(self) -> List[Tuple["re.Pattern", str, Dict[str, Any]]]:
+        """(path regex, endpoint name, operation) for every spec path known to ENDPOINT_CONFIG."""
+        by_path = {config.path.rstrip("/"): name for name, config in ENDPOINT_CONFIG.items()}
+        routes = []
+        for path, operations in self.spec["paths"].items():
+            endpoint = by_path.get(path.rstrip("/"))
+            if endpoint is None or "get" not in operations:
+                continue
+            pattern = re.sub(r"\{(\w+)\}", r"(?P<\1>[^/]+)", path.rstrip("/"))
+            routes.append((re.compile(f"^{pattern}/?$"), endpoint, operations["get"]))
+        return routes
+
+    @staticmethod
+    def _load_fixtures(fixtures_dir: Union[Path, Traversable]) -> Dict[str, List[Dict[str, Any]]]:
+        fixtures = {}
+        for name in ENDPOINT_CONFIG:
+            path = fixtures_dir / f"{name}_response.json"
+            if path.is_file():
+                data = json.loads(path.read_text(encoding="utf-8"))
+                fixtures[name] = data.get("data", data) if isinstance(data, dict) else data
+        return fixtures
+
+    # Record generation
+
+    def _record_schema(self, operation: Dict[str, Any], paged: bool) -> Dict[str, Any]:
+        content = operation["responses"]["200"]["content"]
+        schema = self.faker.resolve(next(iter(content.values()))["schema"])
+        if paged:
+            schema = self.faker.resolve(schema["properties"]["data"]["items"])
+        return schema
+
+    def record(self, endpoint: str, operation: Dict[str, Any], params: Dict[str, str], index: int, paged: bool = True) -> Dict[str, Any]:
+        """The ``index``-th record of a query (same value on every call)."""
+        query_key = "&".join(f"{k}={v}" for k, v in sorted(params.items()) if k not in ("pagina", "tamanhoPagina"))
+        rng = random.Random(f"{self.config.seed}|{endpoint}|{query_key}|{index}")
+
+        start = params.get("dataInicial") or params.get("dataInicio")
+        year = params.get("anoPca") or params.get("ano")
+        if start:
+            first_day = datetime.strptime(start, "%Y%m%d").date()
+        elif year:
+            first_day = date(int(year), 1, 1)
+        else:
+            first_day = date.today()
+        days = max(1, _window_days(params) or (365 if year else 1))
+        context: Dict[str, Any] = {
+            "index": index,
+            "day": first_day + timedelta(days=index % days),
+            "cnpj": params.get("cnpj") or f"{rng.randint(0, 99_999_999):08d}0001{rng.randint(10, 99)}",
+        }
+
+        fixture = self.fixtures.get(endpoint)
+        if self.synthetic is not None and paged and endpoint in _synthetic_dtos():
+            record = self.synthetic.record(_synthetic_dtos()[endpoint], index, context["day"], query_key, params.get("cnpj"))
+        elif fixture and paged:
+            record = json.loads(json.dumps(fixture[index % len(fixture)]))
+            if "numeroControlePNCP" in record:
+                record["numeroControlePNCP"] = f"{context['cnpj']}-1-{index + 1:06d}/{context['day'].year}"
+        else:
+            record = self.faker.value(self._record_schema(operation, paged), rng, endpoint, context)
+
+        if self.config.drift_rate and rng.random() < self.config.drift_rate:
+            self._drift(record, rng)
+        return record
+
+    @staticmethod
+    def _drift(record: Dict[str, Any], rng: random.Random):
+        """Mutate a record the way an unannounced API change would."""
+        keys = list(record)
+        change = rng.choice(["drop", "add", "retype"])
+        if change == "drop" and keys:
+            record.pop(rng.choice(keys))
+        elif change == "add":
+            record[f"campoNovo{rng.randint(1, 5)}"] = rng.choice(["valor", 1, None, {"id": 1}])
+        else:
+            numeric = [key for key in keys if isinstance(record[key], (int, float)) and not isinstance(record[key], bool)]
+            if numeric:
+                key = rng.choice(numeric)
+                record[key] = str(record[key])
+
+    def total_records(self, endpoint: str, params: Dict[str, str]) -> int:
+        if endpoint in self.config.endpoint_volume:
+            return self.config.endpoint_volume[endpoint]
+        days = _window_days(params)
+        return self.config.records_per_day * days if days else self.config.records_per_query
+
+    def page(self, endpoint: str, operation: Dict[str, Any], params: Dict[str, str]) -> Optional[Dict[str, Any]]:
+        """Build one response page (None when the query has no records)."""
+        total = self.total_records(endpoint, params)
+        if total == 0:
+            return None
+
+        page_size = max(1, int(params.get("tamanhoPagina") or ENDPOINT_CONFIG[endpoint].default_page_size))
+        page_number = max(1, int(params.get("pagina") or 1))
+        total_pages = math.ceil(total / page_size)
+        first = (page_number - 1) * page_size
+        data = [self.record(endpoint, operation, params, i) for i in range(first, min(first + page_size, total))]
+
+        return {
+            "data": data,
+            "totalRegistros": total,
+            "totalPaginas": total_pages,
+            "numeroPagina": page_number,
+            "paginasRestantes": max(0, total_pages - page_number),
+            "empty": not data,
+        }
+
+    # Fault injection
+
+    def _fault(self) -> Optional[int]:
+        """Status code of an injected fault for this request, if any."""
+        config = self.config
+        with self._lock:
+            self.stats["requests"] += 1
+            if self._throttled_left:
+                self._throttled_left -= 1
+                return 429
+            if config.throttle_every and self.stats["requests"] % config.throttle_every == 0:
+                self._throttled_left = max(0, config.throttle_burst - 1)
+                return 429
+            if config.error_rate and self._fault_rng.random() < config.error_rate:
+                return self._fault_rng.choice([500, 502, 503])
+            delay = config.latency_ms + (self._fault_rng.random() * config.latency_jitter_ms)
+        if delay:
+            time.sleep(delay / 1000)
+        return None
+
+    # HTTP plumbing
+
+    def handle(self, raw_path: str) -> Tuple[int, Optional[Dict[str, Any]], Dict[str, str]]:
+        """Answer one GET: (status, JSON body, extra headers)."""
+        url = urlparse(raw_path)
+        path = url.path[len(API_PREFIX):] if url.path.startswith(API_PREFIX) else url.path
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+
+        for pattern, endpoint, operation in self.routes:
+            match = pattern.match(path)
+            if not match:
+                continue
+
+            required = [p["name"] for p in operation.get("parameters", []) if p.get("required") and p.get("in") == "query"]
+            missing = [name for name in required if name not in params]
+            if missing:
+                return 400, {"message": f"Parâmetros obrigatórios ausentes: {', '.join(missing)}",
+                             "path": path, "status": "400", "error": "Bad Request",
+                             "timestamp": datetime.now().isoformat()}, {}
+
+            fault = self._fault()
+            if fault == 429:
+                return 429, {"message": "Too Many Requests"}, {"Retry-After": str(self.config.retry_after)}
+            if fault:
+                return fault, {"message": "Erro interno"}, {}
+
+            if match.groupdict():
+                # Single-record path (contratacao_especifica)
+                path_params = {**params, **match.groupdict()}
+                record = self.record(endpoint, operation, path_params, int(path_params.get("sequencial", 1)) - 1, paged=False)
+                return 200, record, {}
+
+            body = self.page(endpoint, operation, params)
+            return (204, None, {}) if body is None else (200, body, {})
+
+        return 404, {"message": f"Caminho desconhecido: {path}"}, {}
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                status, body, headers = server.handle(self.path)
+                payload = json.dumps(body, ensure_ascii=False).encode("utf-8") if body is not None else b""
+                with server._lock:
+                    server.stats[f"status_{status}"] += 1
+                    server.stats["bytes_sent"] += len(payload)
+
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                if payload:
+                    self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass  # Keep load tests quiet
+
+        return Handler
+
+    def start(self) -> "MockPNCPServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="mock-pncp", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "MockPNCPServer":
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Local PNCP API mock server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--records-per-day", type=int, default=50)
+    parser.add_argument("--records-per-query", type=int, default=200)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--latency-jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--throttle-every", type=int, default=0)
+    parser.add_argument("--throttle-burst", type=int, default=3)
+    parser.add_argument("--drift-rate", type=float, default=0.0)
+    parser.add_argument("--generator", choices=["openapi", "models"], default="openapi")
+    args = parser.parse_args(argv)
+
+    config = MockConfig(
+        seed=args.seed,
+        records_per_day=args.records_per_day,
+        records_per_query=args.records_per_query,
+        latency_ms=args.latency_ms,
+        latency_jitter_ms=args.latency_jitter_ms,
+        error_rate=args.error_rate,
+        throttle_every=args.throttle_every,
+        throttle_burst=args.throttle_burst,
+        drift_rate=args.drift_rate,
+        generator=args.generator,
+    )
+    server = MockPNCPServer(config, args.host, args.port)
+    print(f"🧪 Mock PNCP API at {server.base_url} (Ctrl+C to stop)")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+        print(f"📊 {dict(server.stats)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,496 @@
+"""
+Synthetic PNCP payload generator.
+
+Builds valid records for every DTO in ``baliza.models`` by walking the model
+annotations, so generated payloads follow the same contract the API client
+validates against. Values are deterministic per (seed, DTO, key, record
+index): any record can be regenerated on its own, which lets pages, Parquet
+batches and mock-server responses be produced lazily without holding the
+dataset in memory.
+
+Realism knobs:
+- enum fields (and their ``*Nome`` labels) are drawn from the domain tables
+  in ``baliza.schemas`` with the weights in ``ENUM_WEIGHTS``;
+- CNPJs carry valid check digits and come from bounded, skewed pools of
+  organs and suppliers, so cardinality resembles the real archive;
+- free text (``objeto*``, ``descricao*``...) has log-normal length and
+  money fields have log-normal values;
+- nested lists (``fontesOrcamentarias``, PCA ``itens``) vary in size.
+
+Usage:
+    generator = SyntheticGenerator(seed=7)
+    for page in generator.iter_pages(RecuperarContratoDTO, 10_000_000, date(2024, 1, 1), date(2024, 12, 31)):
+        ...
+    generator.write_parquet(RecuperarContratoDTO, "contratos.parquet", 10_000_000, start, end)
+"""
+
+import random
+import typing
+from datetime import date, timedelta
+from enum import Enum
+from functools import lru_cache
+from itertools import islice
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Type, Union
+
+from pydantic import BaseModel
+
+from baliza import models, schemas
+
+# Record DTO returned by each endpoint
+ENDPOINT_DTOS: Dict[str, Type[BaseModel]] = {
+    "contratacoes_publicacao": models.RecuperarCompraPublicacaoDTO,
+    "contratacoes_atualizacao": models.RecuperarCompraPublicacaoDTO,
+    "contratacoes_proposta": models.RecuperarCompraPublicacaoDTO,
+    "contratacao_especifica": models.RecuperarCompraDTO,
+    "contratos": models.RecuperarContratoDTO,
+    "contratos_atualizacao": models.RecuperarContratoDTO,
+    "atas": models.AtaRegistroPrecoPeriodoDTO,
+    "atas_atualizacao": models.AtaRegistroPrecoPeriodoDTO,
+    "instrumentoscobranca_inclusao": models.ConsultarInstrumentoCobrancaDTO,
+    "pca": models.PlanoContratacaoComItensDoUsuarioDTO,
+    "pca_usuario": models.PlanoContratacaoComItensDoUsuarioDTO,
+    "pca_atualizacao": models.PlanoContratacaoComItensDoUsuarioDTO,
+}
+
+# Skewed weights for the enums the archive is usually sliced by; members not
+# listed share what is left. Enums without an entry get Zipf weights by
+# declaration order.
+ENUM_WEIGHTS: Dict[Type[Enum], Dict[Enum, float]] = {
+    schemas.ModalidadeContratacao: {
+        schemas.ModalidadeContratacao.DISPENSA_DE_LICITACAO: 0.42,
+        schemas.ModalidadeContratacao.PREGAO_ELETRONICO: 0.33,
+        schemas.ModalidadeContratacao.INEXIGIBILIDADE: 0.15,
+        schemas.ModalidadeContratacao.CONCORRENCIA_ELETRONICA: 0.04,
+    },
+    schemas.SituacaoCompra: {
+        schemas.SituacaoCompra.DIVULGADA_NO_PNCP: 0.9,
+        schemas.SituacaoCompra.REVOGADA: 0.04,
+        schemas.SituacaoCompra.ANULADA: 0.02,
+    },
+    schemas.TipoPessoa: {
+        schemas.TipoPessoa.PESSOA_JURIDICA: 0.86,
+        schemas.TipoPessoa.PESSOA_FISICA: 0.13,
+    },
+    schemas.IndicadorOrcamentoSigiloso: {
+        schemas.IndicadorOrcamentoSigiloso.COMPRA_SEM_SIGILO: 0.95,
+    },
+    schemas.EsferaId: {
+        schemas.EsferaId.MUNICIPAL: 0.7,
+        schemas.EsferaId.ESTADUAL: 0.18,
+        schemas.EsferaId.FEDERAL: 0.1,
+    },
+    schemas.PoderId: {
+        schemas.PoderId.EXECUTIVO: 0.9,
+        schemas.PoderId.LEGISLATIVO: 0.07,
+    },
+    schemas.TipoContrato: {
+        schemas.TipoContrato.CONTRATO_TERMO_INICIAL: 0.55,
+        schemas.TipoContrato.EMPENHO: 0.3,
+    },
+}
+
+# Plain int/str fields that hold a domain table code
+FIELD_ENUMS: Dict[str, Type[Enum]] = {
+    "modalidadeId": schemas.ModalidadeContratacao,
+    "modoDisputaId": schemas.ModoDisputa,
+    "tipoInstrumentoConvocatorioCodigo": schemas.InstrumentoConvocatorio,
+    "criterioJulgamentoId": schemas.CriterioJulgamento,
+    "classificacaoCatalogoId": schemas.ClassificacaoCatalogo,
+    "poderId": schemas.PoderId,
+    "esferaId": schemas.EsferaId,
+}
+
+# Label fields and the code field they describe
+NAME_FIELDS: Dict[str, str] = {
+    "modalidadeNome": "modalidadeId",
+    "modoDisputaNome": "modoDisputaId",
+    "tipoInstrumentoConvocatorioNome": "tipoInstrumentoConvocatorioCodigo",
+    "situacaoCompraNome": "situacaoCompraId",
+    "nomeClassificacaoCatalogo": "classificacaoCatalogoId",
+}
+
+# Optional fields that are rarely filled in practice (default: optional_rate)
+OPTIONAL_RATES: Dict[str, float] = {
+    "orgaoSubRogado": 0.03,
+    "unidadeSubRogada": 0.03,
+    "cnpjOrgaoSubrogado": 0.03,
+    "nomeOrgaoSubrogado": 0.03,
+    "codigoUnidadeOrgaoSubrogado": 0.03,
+    "nomeUnidadeOrgaoSubrogado": 0.03,
+    "niFornecedorSubContratado": 0.05,
+    "nomeFornecedorSubContratado": 0.05,
+    "tipoPessoaSubContratada": 0.05,
+    "dataCancelamento": 0.04,
+    "numeroRetificacao": 0.1,
+    "justificativaPresencial": 0.05,
+}
+
+# Nested {id|codigo, nome} objects backed by a domain table
+NESTED_ENUMS: Dict[str, Type[Enum]] = {
+    "categoriaProcesso": schemas.CategoriaProcesso,
+    "tipoContrato": schemas.TipoContrato,
+    "amparoLegal": schemas.AmparoLegal,
+}
+
+_CITIES: List[Tuple[str, str, str, str]] = [
+    ("SP", "São Paulo", "São Paulo", "3550308"),
+    ("RJ", "Rio de Janeiro", "Rio de Janeiro", "3304557"),
+    ("MG", "Minas Gerais", "Belo Horizonte", "3106200"),
+    ("BA", "Bahia", "Salvador", "2927408"),
+    ("RS", "Rio Grande do Sul", "Porto Alegre", "4314902"),
+    ("PR", "Paraná", "Curitiba", "4106902"),
+    ("PE", "Pernambuco", "Recife", "2611606"),
+    ("CE", "Ceará", "Fortaleza", "2304400"),
+    ("GO", "Goiás", "Goiânia", "5208707"),
+    ("DF", "Distrito Federal", "Brasília", "5300108"),
+    ("RO", "Rondônia", "Porto Velho", "1100205"),
+    ("PA", "Pará", "Belém", "1501402"),
+]
+
+_WORDS = (
+    "aquisição contratação serviços material equipamentos manutenção preventiva corretiva "
+    "registro preços fornecimento medicamentos merenda escolar limpeza conservação veículos "
+    "combustível obras reforma ampliação unidade básica saúde ambulâncias informática "
+    "software licenças consultoria locação imóvel gêneros alimentícios atender demanda "
+    "secretaria municipal educação eventual futura empresa especializada"
+).split()
+
+_SUPPLIER_SUFFIXES = ["LTDA", "EIRELI", "S.A.", "ME", "EPP"]
+_SYSTEMS = ["Compras.gov.br", "BLL Compras", "Licitanet", "Portal de Compras Públicas", "BNC"]
+
+_CNPJ_WEIGHTS = ([5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2], [6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2])
+
+
+def cnpj(root: int, branch: int = 1) -> str:
+    """CNPJ with valid check digits for an 8-digit root and branch number."""
+    digits = [int(c) for c in f"{root % 10**8:08d}{branch:04d}"]
+    for weights in _CNPJ_WEIGHTS:
+        remainder = sum(d * w for d, w in zip(digits, weights)) % 11
+        digits.append(0 if remainder < 2 else 11 - remainder)
+    return "".join(map(str, digits))
+
+
+def enum_label(member: Enum) -> str:
+    return member.name.replace("_", " ").title()
+
+
+@lru_cache(maxsize=None)
+def _fields(dto: Type[BaseModel]) -> List[Tuple[str, Any]]:
+    """(name, resolved annotation) of a DTO, forward references included."""
+    hints = typing.get_type_hints(dto, vars(models))
+    return [(name, hints[name]) for name in dto.model_fields]
+
+
+@lru_cache(maxsize=None)
+def _plan(dto: Type[BaseModel]) -> List[Tuple[str, Any, bool, Optional[Type[Enum]]]]:
+    """(name, inner annotation, is optional, enum class) per field, resolved once per DTO."""
+    plan = []
+    for name, annotation in _fields(dto):
+        inner, optional = _unwrap(annotation)
+        enum_class = inner if isinstance(inner, type) and issubclass(inner, Enum) else FIELD_ENUMS.get(name)
+        plan.append((name, inner, optional, enum_class))
+    return plan
+
+
+@lru_cache(maxsize=None)
+def _list_item(annotation: Any) -> Optional[Any]:
+    """Item annotation of List[...] fields, None for anything else."""
+    return typing.get_args(annotation)[0] if typing.get_origin(annotation) is list else None
+
+
+def _unwrap(annotation: Any) -> Tuple[Any, bool]:
+    """Strip Optional[...] and return (inner annotation, is optional)."""
+    if typing.get_origin(annotation) is Union:
+        args = [arg for arg in typing.get_args(annotation) if arg is not type(None)]
+        return args[0], True
+    return annotation, False
+
+
+@lru_cache(maxsize=None)
+def _enum_table(enum_class: Type[Enum]) -> Tuple[List[Enum], List[float]]:
+    """Members and cumulative weights for ``rng.choices``."""
+    members = list(enum_class)
+    explicit = ENUM_WEIGHTS.get(enum_class)
+    if explicit:
+        rest = [m for m in members if m not in explicit]
+        share = max(0.0, 1.0 - sum(explicit.values())) / len(rest) if rest else 0.0
+        weights = [explicit.get(m, share) for m in members]
+    else:
+        weights = [1.0 / (i + 1) for i in range(len(members))]
+
+    cumulative, total = [], 0.0
+    for weight in weights:
+        total += weight
+        cumulative.append(total)
+    return members, cumulative
+
+
+class SyntheticGenerator:
+    """Deterministic, seedable generator of PNCP DTO payloads."""
+
+    def __init__(
+        self,
+        seed: int = 42,
+        organ_cardinality: int = 20_000,
+        supplier_cardinality: int = 300_000,
+        skew: float = 2.5,
+        optional_rate: float = 0.6
+    ):
+        """
+        Args:
+            seed: Base seed; equal seeds produce equal datasets
+            organ_cardinality: Distinct contracting organs (CNPJ roots)
+            supplier_cardinality: Distinct suppliers
+            skew: Exponent concentrating draws on the first pool members
+                (1.0 = uniform, higher = a few organs/suppliers dominate)
+            optional_rate: Probability that an Optional field is filled
+        """
+        self.seed = seed
+        self.organ_cardinality = organ_cardinality
+        self.supplier_cardinality = supplier_cardinality
+        self.skew = skew
+        self.optional_rate = optional_rate
+
+    # Entry points
+
+    def record(self, dto: Type[BaseModel], index: int, day: date, key: str = "", organ_cnpj: Optional[str] = None) -> Dict[str, Any]:
+        """
+        The ``index``-th record of a dataset (same value on every call).
+
+        Args:
+            dto: DTO class to generate
+            index: Record position, also used for sequential numbers
+            day: Publication day of the record
+            key: Extra seed material, e.g. the query a mock server answers
+            organ_cnpj: Force the contracting organ (queries filtered by CNPJ)
+
+        Returns:
+            JSON-compatible dict that validates against ``dto``
+        """
+        rng = random.Random(f"{self.seed}|{dto.__name__}|{key}|{index}")
+        organ = self._pool(rng, self.organ_cardinality)
+        context = {
+            "index": index,
+            "day": day,
+            "organ": organ_cnpj or cnpj(self._root(organ, 1)),
+            "city": _CITIES[organ % len(_CITIES)],
+        }
+        return self._model(dto, rng, context)
+
+    def iter_records(self, dto: Type[BaseModel], count: int, start: date, end: date, key: str = "") -> Iterator[Dict[str, Any]]:
+        """Stream ``count`` records spread evenly over [start, end] in publication order."""
+        days = max(1, (end - start).days + 1)
+        for index in range(count):
+            yield self.record(dto, index, start + timedelta(days=index * days // count), key)
+
+    def iter_pages(self, dto: Type[BaseModel], count: int, start: date, end: date, page_size: int = 500, key: str = "") -> Iterator[Dict[str, Any]]:
+        """Stream API-shaped response pages (``data``, ``totalRegistros``...)."""
+        total_pages = max(1, -(-count // page_size))
+        records = self.iter_records(dto, count, start, end, key)
+        for number in range(1, total_pages + 1):
+            data = list(islice(records, page_size))
+            yield {
+                "data": data,
+                "totalRegistros": count,
+                "totalPaginas": total_pages,
+                "numeroPagina": number,
+                "paginasRestantes": total_pages - number,
+                "empty": not data,
+            }
+
+    def write_parquet(
+        self,
+        dto: Type[BaseModel],
+        path: Union[str, Path],
+        count: int,
+        start: date,
+        end: date,
+        batch_size: int = 50_000,
+        key: str = ""
+    ) -> int:
+        """
+        Write ``count`` records to one Parquet file, ``batch_size`` at a time.
+
+        Returns:
+            Number of rows written
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        schema = arrow_schema(dto)
+        records = self.iter_records(dto, count, start, end, key)
+        written = 0
+        with pq.ParquetWriter(str(path), schema, compression="zstd") as writer:
+            while batch := list(islice(records, batch_size)):
+                writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+                written += len(batch)
+        return written
+
+    # Value generation
+
+    def _pool(self, rng: random.Random, cardinality: int) -> int:
+        return int(cardinality * rng.random() ** self.skew)
+
+    def _root(self, member: int, salt: int) -> int:
+        # Scramble pool positions into stable, spread-out CNPJ roots
+        return (member * 2_654_435_761 + self.seed * 97 + salt * 7_919) % 10**8
+
+    def _supplier(self, rng: random.Random) -> str:
+        return cnpj(self._root(self._pool(rng, self.supplier_cardinality), 2), rng.randint(1, 3))
+
+    def _model(self, dto: Type[BaseModel], rng: random.Random, context: Dict[str, Any],
+               parent: str = "", position: int = 0, member: Optional[Enum] = None, depth: int = 0) -> Dict[str, Any]:
+        record: Dict[str, Any] = {}
+        chosen: Dict[str, Enum] = {}
+        for name, inner, optional, enum_class in _plan(dto):
+            if optional and rng.random() >= OPTIONAL_RATES.get(name, self.optional_rate):
+                record[name] = None
+                continue
+            if member is not None and name in ("id", "codigo"):
+                record[name] = member.value
+            elif member is not None and name in ("nome", "descricao"):
+                record[name] = enum_label(member)
+            elif name in NAME_FIELDS and NAME_FIELDS[name] in chosen:
+                record[name] = enum_label(chosen[NAME_FIELDS[name]])
+            elif enum_class is not None:
+                members, weights = _enum_table(enum_class)
+                chosen[name] = rng.choices(members, cum_weights=weights)[0]
+                record[name] = chosen[name].value
+            else:
+                record[name] = self._value(name, inner, rng, context, parent, position, depth)
+        return record
+
+    def _value(self, name: str, annotation: Any, rng: random.Random, context: Dict[str, Any],
+               parent: str, position: int, depth: int) -> Any:
+        item = _list_item(annotation)
+        if item is not None:
+            if depth >= 3:
+                return []
+            if name == "itens":
+                count = min(200, int(rng.lognormvariate(1.5, 1.0)) + 1)
+            elif name == "eventos":
+                count = rng.randint(0, 3)
+            else:
+                count = rng.randint(1, 3)
+            return [self._value(name, item, rng, context, name, i, depth + 1) for i in range(count)]
+
+        if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+            if depth >= 3:
+                return None
+            member = None
+            if name in NESTED_ENUMS:
+                members, weights = _enum_table(NESTED_ENUMS[name])
+                member = rng.choices(members, cum_weights=weights)[0]
+            return self._model(annotation, rng, context, name, position, member, depth + 1)
+
+        if annotation is bool:
+            return rng.random() < {"cancelado": 0.04, "receita": 0.02, "srp": 0.3}.get(name, 0.5)
+        if annotation is int:
+            return self._integer(name, rng, context, position)
+        if annotation is float:
+            return self._money(name, rng)
+        return self._string(name, rng, context, parent)
+
+    def _integer(self, name: str, rng: random.Random, context: Dict[str, Any], position: int) -> int:
+        lowered = name.lower()
+        if lowered.startswith("ano"):
+            return context["day"].year
+        if lowered == "numeroitem":
+            return position + 1
+        if lowered == "numeroparcelas":
+            return rng.choice([1, 1, 1, 3, 6, 12])
+        if lowered.startswith("sequencial") or lowered.startswith("numero"):
+            return context["index"] + 1
+        return rng.randint(1, 9_999)
+
+    @staticmethod
+    def _money(name: str, rng: random.Random) -> float:
+        if name.lower().startswith("quantidade"):
+            return float(rng.choice([1, 1, 2, 5, 10, 12, 50, 100, 1_000]))
+        return round(rng.lognormvariate(10.0, 1.8), 2)
+
+    @staticmethod
+    def _text(rng: random.Random, mu: float = 2.8, sigma: float = 0.6) -> str:
+        words = max(3, min(300, int(rng.lognormvariate(mu, sigma))))
+        return " ".join(rng.choice(_WORDS) for _ in range(words)).capitalize()
+
+    def _date(self, name: str, rng: random.Random, day: date) -> str:
+        lowered = name.lower()
+        if any(part in lowered for part in ("publicacao", "inclusao", "atualizacao", "emissao")):
+            moment = day
+        elif any(part in lowered for part in ("fim", "encerramento", "desejada", "cancelamento")):
+            moment = day + timedelta(days=rng.randint(15, 365))
+        elif any(part in lowered for part in ("inicio", "abertura")):
+            moment = day + timedelta(days=rng.randint(1, 30))
+        else:
+            moment = day - timedelta(days=rng.randint(0, 20))
+        return f"{moment.isoformat()}T{rng.randint(7, 19):02d}:{rng.randint(0, 59):02d}:{rng.randint(0, 59):02d}"
+
+    def _string(self, name: str, rng: random.Random, context: Dict[str, Any], parent: str) -> str:
+        lowered = name.lower()
+        uf, state, city, ibge = context["city"]
+        day: date = context["day"]
+        subrogated = "subrog" in lowered or "subrog" in parent.lower()
+
+        if lowered.startswith("data") or lowered.startswith("vigencia"):
+            return self._date(name, rng, day)
+        if lowered.startswith("numerocontrolepncp"):
+            # The record's own id is sequential; references to other documents are not
+            sequence = context["index"] + 1 if lowered in ("numerocontrolepncp", "numerocontrolepncpata") else rng.randint(1, 999_999)
+            return f"{context['organ']}-1-{sequence:06d}/{day.year}"
+        if lowered in ("cnpj", "cnpjorgao", "cnpjorgaosubrogado", "orgaoentidadecnpj"):
+            return cnpj(self._root(self._pool(rng, self.organ_cardinality), 1)) if subrogated else context["organ"]
+        if "cnpj" in lowered or lowered.startswith("ni"):
+            return self._supplier(rng)
+        if lowered in ("razaosocial", "nomeorgao", "orgaoentidaderazaosocial", "nomeorgaosubrogado"):
+            return f"MUNICIPIO DE {city.upper()}" if not subrogated else f"FUNDO MUNICIPAL DE SAUDE DE {city.upper()}"
+        if lowered in ("nomerazaosocialfornecedor", "nomefornecedorsubcontratado", "nomeemitente"):
+            return f"{rng.choice(_WORDS).upper()} {rng.choice(_WORDS).upper()} {rng.choice(_SUPPLIER_SUFFIXES)}"
+        if lowered == "codigopaisfornecedor":
+            return "BR"
+        if lowered in ("uf", "ufsigla"):
+            return uf
+        if lowered == "ufnome":
+            return state
+        if "municipio" in lowered:
+            return city
+        if lowered == "codigoibge":
+            return ibge
+        if lowered.startswith("nomeunidade"):
+            return f"SECRETARIA MUNICIPAL DE {rng.choice(['SAUDE', 'EDUCACAO', 'ADMINISTRACAO', 'OBRAS'])}"
+        if lowered.startswith("codigounidade") or lowered.startswith("codigo"):
+            return f"{rng.randint(1, 999_999):06d}"
+        if lowered.startswith(("objeto", "descricao", "informacao", "justificativa", "observacao", "motivo")):
+            return self._text(rng)
+        if lowered.startswith("link") or lowered.startswith("url"):
+            return f"https://compras.example.gov.br/processo/{context['index'] + 1}"
+        if lowered.startswith("usuario"):
+            return rng.choice(_SYSTEMS)
+        if lowered.startswith(("numero", "processo")):
+            return f"{rng.randint(1, 99_999):05d}/{day.year}"
+        if lowered.startswith("nome"):
+            return " ".join(rng.choice(_WORDS) for _ in range(rng.randint(2, 5))).title()
+        return f"{name}-{rng.randint(1, 10_000)}"
+
+
+@lru_cache(maxsize=None)
+def arrow_schema(dto: Type[BaseModel]):
+    """Arrow schema mirroring a DTO, for streaming it to Parquet."""
+    import pyarrow as pa
+
+    def arrow_type(annotation: Any):
+        annotation, _ = _unwrap(annotation)
+        if typing.get_origin(annotation) is list:
+            return pa.list_(arrow_type(typing.get_args(annotation)[0]))
+        if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+            return pa.struct([pa.field(name, arrow_type(hint)) for name, hint in _fields(annotation)])
+        if annotation is bool:
+            return pa.bool_()
+        if annotation is int or (isinstance(annotation, type) and issubclass(annotation, int)):
+            return pa.int64()
+        if annotation is float:
+            return pa.float64()
+        return pa.string()
+
+    return pa.schema([pa.field(name, arrow_type(hint)) for name, hint in _fields(dto)])
@@ -3,7 +3,7 @@ CLI helper functions for baliza commands.
 Extracted from cli.py to improve modularity and separation of concerns.
 """
 
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
 from datetime import date, timedelta
 from rich.console import Console
 from rich.table import Table
@@ -57,7 +57,17 @@ def parse_date_options(
             raise typer.BadParameter(f"Date range must be in format YYYYMMDD:YYYYMMDD, YYYY-MM-DD:YYYY-MM-DD, or YYYY-MM:YYYY-MM. Error: {e}")
     
     if date_input:
-        return date_input, date_input
+        try:
+            start_str = _normalize_date_format(date_input)
+        except ValueError as e:
+            import typer
+            raise typer.BadParameter(f"Date must be in format YYYYMMDD, YYYY-MM-DD or YYYY-MM. Error: {e}")
+        if len(date_input.strip()) == 7:
+            # Whole month
+            from calendar import monthrange
+            last_day = monthrange(int(start_str[:4]), int(start_str[4:6]))[1]
+            return start_str, f"{start_str[:6]}{last_day:02d}"
+        return start_str, start_str
     
     if days:
         end_date = date.today()
@@ -70,29 +80,33 @@ def parse_date_options(
     return start_date.strftime("%Y%m%d"), end_date.strftime("%Y%m%d")
 
 
-def parse_data_types(data_types: Optional[List[str]]) -> Dict[str, List[int]]:
+# --types name -> (description, endpoints)
+DATA_TYPES: Dict[str, Tuple[str, List[str]]] = {
+    "compras": ("Procurement publications", ["contratacoes_publicacao"]),
+    "contratos": ("Contracts", ["contratos"]),
+    "atas": ("Price registration records", ["atas"]),
+    "atualizacoes": ("Update endpoints", ["contratacoes_atualizacao", "contratos_atualizacao", "atas_atualizacao"]),
+    "propostas": ("Procurements open for proposals", ["contratacoes_proposta"]),
+    "instrumentos": ("Collection instruments", ["instrumentoscobranca_inclusao"]),
+    "pca": ("Annual contracting plans (baliza pca)", ["pca", "pca_usuario", "pca_atualizacao"]),
+    "especifica": ("Procurement details (baliza drilldown)", ["contratacao_especifica"]),
+}
+# What --types all (the default) extracts
+ALL_DATA_TYPES = ["compras", "contratos", "atas"]
+
+
+def parse_data_types(data_types: Optional[List[str]]) -> Dict[str, List[str]]:
     """Parse data types into endpoint configuration."""
-    type_mapping = {
-        "compras": ["contratacoes_publicacao"],
-        "contratos": ["contratos"],
-        "atas": ["atas"],
-        "atualizacoes": ["contratacoes_atualizacao", "contratos_atualizacao", "atas_atualizacao"],
-        "propostas": ["contratacoes_proposta"],
-        "instrumentos": ["instrumentoscobranca_inclusao"],
-        "pca": ["pca", "pca_usuario", "pca_atualizacao"],
-        "especifica": ["contratacao_especifica"]
-    }
-    
-    if not data_types:
-        return {"endpoints": ["contratacoes_publicacao", "contratos", "atas"]}
+    if not data_types or "all" in data_types:
+        data_types = ALL_DATA_TYPES
     
     endpoints = []
     for data_type in data_types:
-        if data_type in type_mapping:
-            endpoints.extend(type_mapping[data_type])
+        if data_type in DATA_TYPES:
+            endpoints.extend(DATA_TYPES[data_type][1])
         else:
             import typer
-            available_types = ", ".join(type_mapping.keys())
+            available_types = ", ".join(DATA_TYPES)
             raise typer.BadParameter(f"Unknown data type '{data_type}'. Available types: {available_types}")
     
     return {"endpoints": endpoints}
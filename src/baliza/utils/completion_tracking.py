@@ -48,7 +48,7 @@ def get_completed_extractions(output_dir: str) -> Dict[str, List[str]]:
         if not endpoint_dir.is_dir():
             continue
             
-        completed[endpoint_dir.name] = []
+        months = []
         
         for year_dir in endpoint_dir.iterdir():
             if not year_dir.is_dir():
@@ -62,7 +62,11 @@ def get_completed_extractions(output_dir: str) -> Dict[str, List[str]]:
                 marker_path = month_dir / ".completed"
                 if marker_path.exists():
                     month_key = f"{year_dir.name}-{month_dir.name}"
-                    completed[endpoint_dir.name].append(month_key)
+                    months.append(month_key)
+        
+        # Only marker trees are endpoints; skips the Parquet dataset and .baliza state dirs
+        if months:
+            completed[endpoint_dir.name] = months
     
     return completed
 
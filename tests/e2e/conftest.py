@@ -0,0 +1,21 @@
+"""
+Shared fixtures for the end-to-end tests.
+"""
+
+import pytest
+
+from baliza.settings import settings
+from baliza.testing import MockConfig, MockPNCPServer
+
+
+@pytest.fixture
+def mock_pncp(monkeypatch):
+    """
+    A local PNCP API with small volume, wired into settings.
+
+    Tests can tweak ``mock_pncp.config`` (latency, errors, drift) before
+    issuing requests.
+    """
+    with MockPNCPServer(MockConfig(records_per_day=5, records_per_query=20)) as server:
+        monkeypatch.setattr(settings, "pncp_api_base_url", server.base_url)
+        yield server
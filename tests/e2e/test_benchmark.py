@@ -0,0 +1,23 @@
+"""
+Smoke test for the throughput benchmark suite.
+"""
+
+import json
+
+
+def test_benchmark_reports_all_sections(tmp_path):
+    from baliza.testing.benchmark import BenchmarkConfig, main, run_benchmarks
+
+    results = run_benchmarks(BenchmarkConfig(days=2, records_per_day=5, micro_iterations=100, marker_months=3))
+
+    assert set(results) == {"meta", "micro", "stages", "end_to_end"}
+    assert set(results["micro"]) == {"hash_sha256", "add_hash_id", "completion_scan", "gap_detection"}
+    assert set(results["stages"]["seconds"]) == {"fetch", "decode", "hash", "extract", "normalize", "write"}
+    assert results["stages"]["records"] == 10
+    assert results["end_to_end"]["records"] == 10
+    assert results["end_to_end"]["requests"] >= 1
+    assert results["meta"]["peak_rss_mb"] > 0
+
+    output = tmp_path / "bench.json"
+    main(["--days", "1", "--records-per-day", "3", "--micro-iterations", "10", "-o", str(output)])
+    assert json.loads(output.read_text())["end_to_end"]["records"] == 3
@@ -0,0 +1,50 @@
+"""
+Tests for change-data-capture sync from the *_atualizacao endpoints.
+"""
+
+from datetime import date, timedelta
+
+from baliza.extraction import cdc
+from baliza.extraction.state_manager import StateManager
+from baliza.settings import settings
+
+
+def test_cdc_window_overlaps_watermark():
+    today = date(2024, 3, 10)
+
+    start, end = cdc.cdc_window("20240308", today)
+    assert end == "20240310"
+    assert start == (date(2024, 3, 8) - timedelta(days=settings.cdc_overlap_days)).strftime("%Y%m%d")
+
+    start, _ = cdc.cdc_window(None, today)
+    assert start == (today - timedelta(days=settings.cdc_initial_days)).strftime("%Y%m%d")
+
+
+def test_sync_routes_changes_and_advances_watermark(tmp_path, monkeypatch):
+    loaded = {}
+
+    def fake_load(records, table, output_dir, partition_field):
+        loaded.update(records=list(records), table=table, field=partition_field)
+        return {(table, 2023, 11)}
+
+    refreshed = []
+    monkeypatch.setattr(cdc, "window_source", lambda endpoint, start, end, response_hook=None: [{"numeroControlePNCP": "C-1"}])
+    monkeypatch.setattr(cdc, "load_records_by_partition", fake_load)
+    monkeypatch.setattr(cdc, "refresh_derived_tables", lambda output_dir, touched: refreshed.extend(touched))
+
+    results = cdc.run_cdc_sync(["contratos"], str(tmp_path), today=date(2024, 3, 10))
+
+    assert [r.endpoint for r in results] == ["contratos_atualizacao"]
+    assert loaded["table"] == "contratos"
+    assert refreshed == [("contratos", 2023, 11)]
+    assert StateManager(str(tmp_path)).get_watermark("contratos_atualizacao") == "20240310"
+
+
+def test_amended_atas_reach_every_month_of_their_vigencia():
+    from baliza.extraction.pipeline import record_partitions
+
+    _, partition_field = cdc.CDC_ENDPOINTS["atas_atualizacao"]
+    ata = {"vigenciaInicio": "2023-11-20", "vigenciaFim": "2024-11-19", "dataPublicacaoPncp": "2023-11-21"}
+
+    assert record_partitions(ata, partition_field, today=date(2024, 2, 10)) == [(2023, 11), (2023, 12), (2024, 1), (2024, 2)]
+    assert record_partitions({"dataPublicacaoPncp": "2024-01-05"}, "dataPublicacaoPncp") == [(2024, 1)]
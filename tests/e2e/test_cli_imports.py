@@ -0,0 +1,50 @@
+"""
+Cold-start import checks for the CLI.
+
+Each subcommand runs in a fresh interpreter; light commands must not load
+the heavy extraction stack.
+"""
+
+import json
+import subprocess
+import sys
+import time
+
+import pytest
+
+HEAVY = ["dlt", "duckdb", "pyarrow", "httpx", "baliza.extraction"]
+
+PROBE = """
+import json, sys
+from typer.testing import CliRunner
+from baliza.cli import app
+result = CliRunner().invoke(app, sys.argv[1:])
+heavy = json.loads({heavy!r})
+print(json.dumps({{"exit": result.exit_code, "loaded": [m for m in heavy if m in sys.modules]}}))
+"""
+
+
+def cold_start(*args: str):
+    started = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-c", PROBE.format(heavy=json.dumps(HEAVY)), *args],
+        capture_output=True, text=True, check=True
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1]), time.perf_counter() - started
+
+
+@pytest.mark.parametrize("args", [["version"], ["info"], ["status", "--output", "does-not-exist"], ["--help"]])
+def test_light_commands_skip_heavy_imports(args):
+    probe, seconds = cold_start(*args)
+
+    assert probe["exit"] == 0
+    assert probe["loaded"] == [], f"{args[0]} imported {probe['loaded']} ({seconds:.2f}s cold start)"
+
+
+def test_version_skips_settings():
+    probe = subprocess.run(
+        [sys.executable, "-c", "import sys; from typer.testing import CliRunner; from baliza.cli import app; "
+         "CliRunner().invoke(app, ['version']); print('pydantic_settings' in sys.modules)"],
+        capture_output=True, text=True, check=True
+    )
+    assert probe.stdout.strip().splitlines()[-1] == "False"
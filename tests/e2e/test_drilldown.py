@@ -0,0 +1,69 @@
+"""
+Tests for the contratacao_especifica drill-down and the shared rate limiter.
+"""
+
+import time
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from baliza.extraction.drilldown import detail_path, iter_pending_keys
+from baliza.extraction.http_client import RateLimiter
+from baliza.storage.layout import partition_dir
+
+
+def _write(output_dir, table, rows, month=1):
+    path = partition_dir(str(output_dir), table, 2024, month)
+    path.mkdir(parents=True, exist_ok=True)
+    pq.write_table(pa.Table.from_pylist(rows), path / "load.0.parquet")
+
+
+def _publicacao(numero, sequencial):
+    return {
+        "numero_controle_pncp": numero,
+        "orgao_entidade__cnpj": "00394460000141",
+        "ano_compra": 2024,
+        "sequencial_compra": sequencial,
+        "data_publicacao_pncp": "2024-01-10T09:00:00",
+    }
+
+
+def test_pending_keys_skip_fetched_records(tmp_path):
+    _write(tmp_path, "contratacoes_publicacao", [
+        _publicacao("A", 1), _publicacao("A", 1), _publicacao("B", 2), _publicacao("C", 3)
+    ])
+    _write(tmp_path, "contratacao_especifica", [{"numero_controle_pncp": "B"}])
+
+    keys = [key for chunk in iter_pending_keys(str(tmp_path)) for key in chunk]
+
+    assert [key["numero_controle_pncp"] for key in keys] == ["A", "C"]
+    assert detail_path(keys[1]) == "/v1/orgaos/00394460000141/compras/2024/3"
+
+
+def test_pending_keys_ignore_details_without_key(tmp_path):
+    _write(tmp_path, "contratacoes_publicacao", [_publicacao("A", 1), _publicacao("B", 2)])
+    _write(tmp_path, "contratacao_especifica", [{"numero_controle_pncp": "B"}, {"numero_controle_pncp": None}])
+
+    keys = [key for chunk in iter_pending_keys(str(tmp_path)) for key in chunk]
+
+    assert [key["numero_controle_pncp"] for key in keys] == ["A"]
+
+
+def test_pending_keys_within_month_range(tmp_path):
+    _write(tmp_path, "contratacoes_publicacao", [_publicacao("A", 1)], month=1)
+    _write(tmp_path, "contratacoes_publicacao", [_publicacao("B", 2)], month=2)
+    _write(tmp_path, "contratacoes_publicacao", [_publicacao("C", 3)], month=3)
+
+    keys = [key for chunk in iter_pending_keys(str(tmp_path), "2024-02", "2024-03") for key in chunk]
+
+    assert [key["numero_controle_pncp"] for key in keys] == ["B", "C"]
+
+
+def test_rate_limiter_spaces_requests():
+    limiter = RateLimiter(rate_per_second=50, burst=1)
+
+    started = time.monotonic()
+    for _ in range(6):
+        limiter.acquire()
+
+    assert time.monotonic() - started >= 0.09
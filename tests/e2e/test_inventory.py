@@ -0,0 +1,51 @@
+"""
+Tests for the footer-based archive inventory.
+"""
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from baliza.storage import inventory
+from baliza.storage.inventory import build_inventory, cache_path
+from baliza.storage.layout import partition_dir
+
+
+def _write_partition(output_dir, table, year, month, dates):
+    path = partition_dir(str(output_dir), table, year, month)
+    path.mkdir(parents=True, exist_ok=True)
+    rows = [{"numero_controle_pncp": str(i), "data_publicacao_pncp": d} for i, d in enumerate(dates)]
+    pq.write_table(pa.Table.from_pylist(rows), path / "1700000000.0.parquet")
+
+
+@pytest.fixture
+def archive_dir(tmp_path):
+    _write_partition(tmp_path, "contratos", 2024, 1, ["2024-01-03T10:00:00", "2024-01-28T09:00:00"])
+    _write_partition(tmp_path, "contratos", 2024, 4, ["2024-04-15T00:00:00"])
+    return tmp_path
+
+
+def test_rows_dates_and_holes_from_footers(archive_dir):
+    stats = build_inventory(str(archive_dir))["contratos"]
+
+    assert (stats.files, stats.rows) == (2, 3)
+    assert stats.bytes > 0
+    assert (stats.min_date, stats.max_date) == ("2024-01-03", "2024-04-15")
+    assert stats.months == ["2024-01", "2024-04"]
+    assert stats.holes == ["2024-02", "2024-03"]
+
+
+def test_unchanged_files_come_from_cache(archive_dir, monkeypatch):
+    build_inventory(str(archive_dir))
+    assert cache_path(str(archive_dir)).exists()
+
+    read = []
+    original = inventory.read_footer
+    monkeypatch.setattr(inventory, "read_footer", lambda path, *args: read.append(path) or original(path, *args))
+
+    assert build_inventory(str(archive_dir))["contratos"].rows == 3
+    assert read == []
+
+    _write_partition(archive_dir, "contratos", 2024, 2, ["2024-02-01"])
+    stats = build_inventory(str(archive_dir))["contratos"]
+    assert len(read) == 1 and stats.rows == 4 and stats.holes == ["2024-03"]
@@ -0,0 +1,58 @@
+"""
+Tests for cross-process shard leases and in-process request coalescing.
+"""
+
+import asyncio
+import subprocess
+import sys
+
+import httpx
+
+from baliza.extraction.http_client import RateLimiter, get_json
+from baliza.extraction.leases import try_lease
+
+HOLD = """
+import sys, time
+from baliza.extraction.leases import try_lease
+lease = try_lease(sys.argv[1], sys.argv[2])
+print("held" if lease.held else "busy", flush=True)
+time.sleep(float(sys.argv[3]))
+"""
+
+
+def test_lease_is_exclusive_across_processes_and_freed_on_exit(tmp_path):
+    holder = subprocess.Popen([sys.executable, "-c", HOLD, str(tmp_path), "contratos|2024-01", "30"],
+                              stdout=subprocess.PIPE, text=True)
+    try:
+        assert holder.stdout.readline().strip() == "held"
+        with try_lease(str(tmp_path), "contratos|2024-01") as lease:
+            assert lease is None
+        with try_lease(str(tmp_path), "contratos|2024-02") as lease:
+            assert lease is not None
+    finally:
+        holder.kill()
+        holder.wait()
+
+    # Killed, not released: the OS dropped the lock with the process
+    with try_lease(str(tmp_path), "contratos|2024-01") as lease:
+        assert lease is not None
+
+
+def test_identical_in_flight_requests_share_one_call():
+    calls = []
+
+    async def handler(request):
+        calls.append(str(request.url))
+        await asyncio.sleep(0.05)
+        return httpx.Response(200, json={"data": [{"id": 1}]})
+
+    async def run():
+        async with httpx.AsyncClient(base_url="http://pncp.test", transport=httpx.MockTransport(handler)) as client:
+            limiter = RateLimiter(1000)
+            return await asyncio.gather(*(
+                get_json(client, "/v1/contratos", {"pagina": 1}, limiter=limiter) for _ in range(5)
+            ), get_json(client, "/v1/contratos", {"pagina": 2}, limiter=limiter))
+
+    bodies = asyncio.run(run())
+    assert len(calls) == 2
+    assert bodies[0] == bodies[1] and bodies[0] is not bodies[1]
@@ -0,0 +1,43 @@
+"""
+Tests for the supplier/agency lookup index.
+"""
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from baliza.storage.layout import partition_dir
+from baliza.storage.lookup_index import lookup, normalize_key, read_matches, refresh_lookup_index
+
+
+def _write_partition(output_dir, table, year, month, rows, row_group_size=None):
+    path = partition_dir(str(output_dir), table, year, month)
+    path.mkdir(parents=True, exist_ok=True)
+    pq.write_table(pa.Table.from_pylist(rows), path / "1700000000.0.parquet", row_group_size=row_group_size)
+
+
+def test_normalize_key_strips_cnpj_formatting():
+    assert normalize_key("12.345.678/0001-00") == "12345678000100"
+    assert normalize_key(" abc-1 ") == "ABC-1"
+
+
+def test_lookup_reads_only_matching_row_groups(tmp_path):
+    rows = [
+        {"ni_fornecedor": "11111111000111", "orgao_entidade__cnpj": "99999999000199", "numero_controle_pncp": "C-1"},
+        {"ni_fornecedor": "22222222000122", "orgao_entidade__cnpj": "99999999000199", "numero_controle_pncp": "C-2"},
+        {"ni_fornecedor": "11111111000111", "orgao_entidade__cnpj": "88888888000188", "numero_controle_pncp": "C-3"},
+    ]
+    _write_partition(tmp_path, "contratos", 2024, 1, rows, row_group_size=1)
+    _write_partition(tmp_path, "atas", 2024, 3, [{"cnpj_orgao": "11111111000111", "numero_controle_pncp_ata": "A-1"}])
+
+    assert refresh_lookup_index(str(tmp_path)) == 2
+
+    hits = lookup(str(tmp_path), "11.111.111/0001-11")
+    assert sorted((h.table, h.row_group) for h in hits) == [("atas", 0), ("contratos", 0), ("contratos", 2)]
+
+    matches = {table: data for table, data in read_matches(str(tmp_path), "11111111000111")}
+    assert matches["contratos"].column("numero_controle_pncp").to_pylist() == ["C-1", "C-3"]
+    assert matches["atas"].column("month").to_pylist() == [3]
+
+
+def test_lookup_without_index_returns_nothing(tmp_path):
+    assert lookup(str(tmp_path), "11111111000111") == []
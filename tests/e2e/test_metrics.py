@@ -0,0 +1,70 @@
+"""
+Tests for the OpenMetrics exposition.
+"""
+
+import urllib.request
+from types import SimpleNamespace
+
+import pytest
+
+from baliza import metrics
+
+
+@pytest.fixture(autouse=True)
+def fresh_registry():
+    for metric in metrics.REGISTRY.metrics:
+        metric.clear()
+    yield
+
+
+def test_render_formats():
+    metrics.RESPONSES.inc(endpoint="contratos", status=200)
+    metrics.RESPONSES.inc(endpoint="contratos", status=200)
+    metrics.REQUEST_SECONDS.observe(0.2, endpoint="contratos")
+    metrics.REQUEST_SECONDS.observe(3.0, endpoint="contratos")
+    metrics.QUEUE_DEPTH.set(4, queue="pca_pages")
+
+    text = metrics.REGISTRY.render()
+    assert "# TYPE baliza_http_responses_total counter" in text
+    assert 'baliza_http_responses_total{endpoint="contratos",status="200"} 2.0' in text
+    assert 'baliza_http_request_duration_seconds_bucket{endpoint="contratos",le="0.25"} 1.0' in text
+    assert 'baliza_http_request_duration_seconds_bucket{endpoint="contratos",le="+Inf"} 2.0' in text
+    assert 'baliza_queue_depth{queue="pca_pages"} 4.0' in text
+    assert "baliza_process_resident_memory_bytes " in text
+
+    openmetrics = metrics.REGISTRY.render(openmetrics=True)
+    assert "# TYPE baliza_http_responses counter" in openmetrics
+    assert openmetrics.endswith("# EOF\n")
+
+
+def test_observe_load_counts_rows_per_partition():
+    normalize = SimpleNamespace(row_counts={"contratos": 10, "contratos__fontes": 4, "_dlt_loads": 1})
+    metrics.observe_load(SimpleNamespace(last_trace=SimpleNamespace(last_normalize_info=normalize)), (2024, 3))
+
+    assert metrics.ROWS_WRITTEN.values == {("contratos", "2024-03"): 10, ("contratos__fontes", "2024-03"): 4}
+    assert metrics.RECORDS.values == {("contratos",): 10}
+
+
+def test_metrics_run_textfile_and_http(tmp_path):
+    textfile = tmp_path / "baliza.prom"
+    with metrics.metrics_run("extract", str(textfile)):
+        metrics.PAGES.inc(endpoint="atas")
+
+    text = textfile.read_text()
+    assert 'baliza_run_success{command="extract"} 1' in text
+    assert 'baliza_pages_total{endpoint="atas"} 1.0' in text
+
+    with pytest.raises(RuntimeError):
+        with metrics.metrics_run("extract", str(textfile)):
+            raise RuntimeError("boom")
+    assert 'baliza_run_success{command="extract"} 0' in textfile.read_text()
+
+    server = metrics.serve(0)
+    try:
+        port = server.server_address[1]
+        request = urllib.request.Request(f"http://127.0.0.1:{port}/metrics",
+                                         headers={"Accept": "application/openmetrics-text"})
+        body = urllib.request.urlopen(request).read().decode()
+    finally:
+        server.shutdown()
+    assert body.endswith("# EOF\n")
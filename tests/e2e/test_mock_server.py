@@ -0,0 +1,58 @@
+"""
+Tests for the local PNCP mock server.
+"""
+
+import httpx
+from typer.testing import CliRunner
+
+from baliza.cli import app
+
+
+def test_pagination_is_consistent(mock_pncp):
+    params = {"dataInicial": "20240101", "dataFinal": "20240110", "tamanhoPagina": 20}
+    pages = [
+        httpx.get(f"{mock_pncp.base_url}/v1/contratos", params={**params, "pagina": page}).json()
+        for page in (1, 2, 3)
+    ]
+
+    assert pages[0]["totalRegistros"] == 50
+    assert [page["paginasRestantes"] for page in pages] == [2, 1, 0]
+    assert [len(page["data"]) for page in pages] == [20, 20, 10]
+    numbers = [record["numeroControlePNCP"] for page in pages for record in page["data"]]
+    assert len(set(numbers)) == 50
+
+    again = httpx.get(f"{mock_pncp.base_url}/v1/contratos", params={**params, "pagina": 2}).json()
+    assert again["data"] == pages[1]["data"]
+
+
+def test_faults_and_validation(mock_pncp):
+    mock_pncp.config.throttle_every = 2
+    mock_pncp.config.throttle_burst = 1
+    url = f"{mock_pncp.base_url}/v1/atas"
+    params = {"dataInicial": "20240101", "dataFinal": "20240101", "pagina": 1}
+
+    statuses = [httpx.get(url, params=params).status_code for _ in range(4)]
+    assert statuses == [200, 429, 200, 429]
+    assert httpx.get(url, params={"pagina": 1}).status_code == 400
+
+
+def test_extraction_against_mock(mock_pncp, tmp_path):
+    from baliza.extraction.pipeline import run_structured_extraction
+    from baliza.storage.layout import list_partitions
+
+    run_structured_extraction("20240101", "20240105", ["contratos"], str(tmp_path))
+
+    partitions = list_partitions(str(tmp_path), "contratos")
+    assert [partition.key for partition in partitions] == ["2024-01"]
+    assert mock_pncp.stats["status_200"] >= 1
+
+
+def test_date_options_override_backfill(mock_pncp, tmp_path):
+    result = CliRunner().invoke(app, [
+        "extract", "--date", "2024-01", "--types", "contratos", "--base-url", mock_pncp.base_url,
+        "--output", str(tmp_path), "--dry-run"
+    ])
+
+    assert result.exit_code == 0, result.output
+    assert "20240101 to 20240131" in result.output
+    assert "Backfill" not in result.output
@@ -0,0 +1,46 @@
+"""
+Tests for the negative cache of empty endpoint/month/modalidade shards.
+"""
+
+from datetime import date
+
+from baliza.extraction.pipeline import is_closed_window, is_full_month, remember_empty_shards, window_shards
+from baliza.extraction.state_manager import EMPTY_SHARDS, StateManager
+from baliza.settings import settings
+
+
+def test_only_closed_windows_are_cached(tmp_path):
+    state = StateManager(str(tmp_path))
+    today = date(2024, 6, 1)
+
+    remember_empty_shards(state, "contratacoes_publicacao", "20240501", "20240531", {"1": 0, "6": 12}, today)
+    assert state.get_section(EMPTY_SHARDS) == {}
+
+    remember_empty_shards(state, "contratacoes_publicacao", "20230101", "20230131", {"1": 0, "6": 12}, today)
+    assert state.empty_shards(settings.negative_cache_revalidate_days) == {"contratacoes_publicacao|2023-01|1"}
+
+
+def test_partial_closed_window_is_not_cached(tmp_path):
+    state = StateManager(str(tmp_path))
+
+    # Tail of a month split by the year/archive sync tiers: days 1-17 were never asked
+    remember_empty_shards(state, "contratacoes_publicacao", "20231018", "20231031", {"1": 0}, date(2024, 6, 1))
+    assert state.get_section(EMPTY_SHARDS) == {}
+    assert not is_full_month("20230101", "20230115")
+    assert is_full_month("20240201", "20240229")
+
+
+def test_revalidated_shard_with_records_is_dropped(tmp_path):
+    state = StateManager(str(tmp_path))
+    state.update(EMPTY_SHARDS, {"contratos|2023-01|": "2000-01-01T00:00:00+00:00"})
+    assert state.empty_shards(settings.negative_cache_revalidate_days) == set()  # Due for revalidation
+
+    remember_empty_shards(state, "contratos", "20230101", "20230131", {"": 3}, date(2024, 6, 1))
+    assert state.get_section(EMPTY_SHARDS) == {}
+
+
+def test_shards_fan_out_by_modalidade():
+    assert window_shards("contratos") == [""]
+    assert window_shards("contratacoes_publicacao", [6, 8]) == ["6", "8"]
+    assert is_closed_window("20230131", date(2024, 1, 1))
+    assert not is_closed_window("20231231", date(2024, 1, 1))
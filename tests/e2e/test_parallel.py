@@ -0,0 +1,62 @@
+"""
+Tests for the rate limiter and metrics shared by the processes of a multi-process extraction.
+"""
+
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from typer.testing import CliRunner
+
+from baliza import metrics
+from baliza.cli import app
+from baliza.extraction.http_client import SharedRateLimiter
+
+
+def _take(limiter, count, stamps):
+    for _ in range(count):
+        limiter.acquire()
+        stamps.put(time.monotonic())
+
+
+def test_processes_share_one_request_budget():
+    context = multiprocessing.get_context("spawn")
+    limiter = SharedRateLimiter(20, burst=1, context=context)
+    stamps = context.Queue()
+
+    workers = [context.Process(target=_take, args=(limiter, 10, stamps)) for _ in range(3)]
+    for worker in workers:
+        worker.start()
+    times = sorted(stamps.get(timeout=30) for _ in range(30))
+    for worker in workers:
+        worker.join()
+
+    # 30 tokens at 20/s from a bucket of 1: the first is free, the other 29 take >= 1.45s
+    assert times[-1] - times[0] >= 1.4
+
+
+def _count_in_worker(pages):
+    metrics.PAGES.inc(pages, endpoint="contratos")
+    metrics.REQUEST_SECONDS.observe(0.2, endpoint="contratos")
+    return metrics.take_counts()
+
+
+def test_worker_metrics_reach_the_parent():
+    metrics.PAGES.clear()
+    metrics.REQUEST_SECONDS.clear()
+
+    with ProcessPoolExecutor(max_workers=2, mp_context=multiprocessing.get_context("spawn")) as pool:
+        for counts in pool.map(_count_in_worker, [3, 4]):
+            metrics.merge_counts(counts)
+
+    assert metrics.PAGES.values[("contratos",)] == 7
+    counts, total = metrics.REQUEST_SECONDS.values[("contratos",)]
+    assert sum(counts) == 2 and total == 0.4
+
+
+def test_profile_needs_a_single_process(tmp_path):
+    result = CliRunner().invoke(app, ["extract", "--date", "2024-01", "--profile", "--processes", "2",
+                                      "--output", str(tmp_path)])
+
+    assert result.exit_code == 2
+    assert "--processes 1" in result.output
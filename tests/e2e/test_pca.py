@@ -0,0 +1,80 @@
+"""
+Tests for the PCA shard planner and fetch path.
+"""
+
+from datetime import date
+
+from baliza.extraction import pca
+from baliza.extraction.state_manager import StateManager
+from baliza.storage.query import ArchiveQuery
+
+
+def test_closed_year_shards_are_cached(tmp_path, monkeypatch):
+    monkeypatch.setattr(pca, "classification_codes", lambda output_dir: ["100", "200"])
+    state = StateManager(str(tmp_path))
+    state.set(pca.STATE_SECTION, "pca|2023|100", "2024-01-05T00:00:00+00:00")
+
+    shards, cached = pca.plan_pca_shards(["pca"], [2023, 2024], str(tmp_path), state, date(2024, 6, 1))
+
+    assert cached == 1
+    assert [shard.key for shard in shards] == ["pca|2023|200", "pca|2024|100", "pca|2024|200"]
+    assert shards[0].params(2)["codigoClassificacaoSuperior"] == "200"
+    assert pca.is_closed_year(2023, date(2024, 6, 1))
+    assert not pca.is_closed_year(2024, date(2024, 6, 1))
+
+
+def _plan(codes):
+    return {
+        "idPcaPncp": "00394460000141-0-000001/2024",
+        "anoPca": 2024,
+        "dataPublicacaoPNCP": "2024-01-10T09:00:00",
+        "dataAtualizacaoGlobalPCA": "2024-01-10T09:00:00",
+        "itens": [{"numeroItem": i, "classificacaoSuperiorCodigo": code, "valorTotal": 10.0 * i}
+                  for i, code in enumerate(codes, 1)],
+    }
+
+
+def test_plans_split_per_classification_across_shards(tmp_path, monkeypatch):
+    requests = []
+
+    async def fake_get_json(client, path, params=None, on_response=None, endpoint="", **kwargs):
+        requests.append((path, params))
+        if params["pagina"] > 1:
+            return None
+        if path == "/v1/pca/atualizacao":
+            return {"data": [_plan(["100", "200"])], "totalPaginas": 1}
+        # /v1/pca returns the plan once per classification, with only its items
+        code = params["codigoClassificacaoSuperior"]
+        return {"data": [_plan([code])], "totalPaginas": 1}
+
+    monkeypatch.setattr(pca, "get_json", fake_get_json)
+
+    result = pca.run_pca_extraction(["pca"], [2024], str(tmp_path), today=date(2024, 6, 1))
+
+    assert result.shards == 2 and result.failed == 0
+    assert sorted(params.get("codigoClassificacaoSuperior") for _, params in requests[1:]) == ["100", "200"]
+    assert sorted(StateManager(str(tmp_path)).get_section(pca.CODES_SECTION)) == ["100", "200"]
+    with ArchiveQuery(str(tmp_path)) as archive:
+        assert "pca__history" not in archive.tables
+        plans = archive.sql("SELECT codigo_classificacao_superior FROM pca ORDER BY 1").fetchall()
+        items = archive.sql(
+            "SELECT i.classificacao_superior_codigo FROM pca__itens i "
+            "JOIN pca p ON i._dlt_parent_id = p._dlt_id ORDER BY 1"
+        ).fetchall()
+    assert plans == [("100",), ("200",)]
+    assert items == [("100",), ("200",)]
+
+
+def test_full_plans_get_the_keys_of_classification_shards():
+    steps = pca.record_processing_steps(pca.ENDPOINT_CONFIG["pca_atualizacao"])
+    plan = _plan(["100", "200", "100"])
+    for step in steps:
+        plan = step(plan)
+
+    rows = list(pca.classified_plans([plan]))
+
+    assert [row["_baliza_key"] for row in rows] == [
+        "00394460000141-0-000001/2024|100", "00394460000141-0-000001/2024|200"
+    ]
+    assert [len(row["itens"]) for row in rows] == [2, 1]
+    assert len({row["_dlt_id"] for row in rows}) == 2
@@ -0,0 +1,42 @@
+"""
+Tests for the stage profiler.
+"""
+
+import json
+
+from baliza import profiling
+
+
+def test_stages_are_noops_when_inactive():
+    def step(record):
+        return record
+
+    assert profiling.active() is None
+    assert profiling.wrap(step, "hash") is step
+    assert profiling.response_hook() is None
+    with profiling.stage("extract"):
+        pass
+    profiling.record("fetch", 1.0)
+
+
+def test_profile_run_reports_stages(tmp_path):
+    with profiling.profile_run(str(tmp_path), sampler="sample") as profiler:
+        hashed = profiling.wrap(lambda record: {**record, "h": 1}, "hash")
+        with profiling.stage("extract"):
+            for i in range(100):
+                hashed({"i": i})
+            with profiling.stage("normalize"):
+                buffer = [bytearray(1024) for _ in range(1024)]
+                del buffer
+        profiling.record("fetch", 0.25, 2048)
+
+    assert profiling.active() is None
+    (run_dir,) = (tmp_path / ".baliza" / "profiles").iterdir()
+    report = json.loads((run_dir / "report.json").read_text())
+
+    assert report["stages"]["hash"]["calls"] == 100
+    assert report["stages"]["fetch"] == {**report["stages"]["fetch"], "calls": 1, "bytes": 2048, "seconds": 0.25}
+    assert report["stages"]["normalize"]["peak_mb"] >= 1.0
+    assert report["stages"]["extract"]["peak_mb"] >= report["stages"]["normalize"]["peak_mb"]
+    assert (run_dir / "stacks.collapsed").exists()
+    assert profiler.wall_seconds > 0
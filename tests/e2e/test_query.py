@@ -0,0 +1,98 @@
+"""
+Tests for the DuckDB query layer over the Parquet archive.
+"""
+
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from baliza.settings import settings
+from baliza.storage.layout import list_partitions, list_tables, partition_dir
+from baliza.storage.query import ArchiveQuery
+
+
+def _write_partition(output_dir, table, year, month, rows):
+    path = partition_dir(str(output_dir), table, year, month)
+    path.mkdir(parents=True, exist_ok=True)
+    pq.write_table(pa.Table.from_pylist(rows), path / "1700000000.0.parquet")
+
+
+@pytest.fixture
+def archive_dir(tmp_path):
+    _write_partition(tmp_path, "contratos", 2024, 1, [
+        {"numero_controle_pncp": "A", "valor_global": 10.0},
+        {"numero_controle_pncp": "B", "valor_global": 5.0},
+    ])
+    _write_partition(tmp_path, "contratos", 2024, 2, [
+        {"numero_controle_pncp": "C", "valor_global": 1.0},
+    ])
+    return tmp_path
+
+
+def test_partitions_are_discovered(archive_dir):
+    assert list_tables(str(archive_dir)) == ["contratos"]
+
+    partitions = list_partitions(str(archive_dir), "contratos", start_month="2024-02")
+    assert [p.key for p in partitions] == ["2024-02"]
+
+
+def test_views_expose_partition_columns(archive_dir):
+    with ArchiveQuery(str(archive_dir), ":memory:") as archive:
+        total = archive.sql("SELECT sum(valor_global) FROM contratos WHERE month = 1").fetchone()[0]
+
+    assert total == 15.0
+
+
+def test_default_catalog_is_in_memory(archive_dir, monkeypatch):
+    monkeypatch.chdir(archive_dir)
+
+    # Concurrent readers: a shared catalog file would be locked by the first
+    with ArchiveQuery(str(archive_dir)) as first, ArchiveQuery(str(archive_dir)) as second:
+        assert first.database == ":memory:"
+        assert first.sql("SELECT count(*) FROM contratos").fetchone() == second.sql("SELECT count(*) FROM contratos").fetchone()
+
+    assert not Path(settings.database_path).exists()
+
+
+def test_scan_prunes_months_and_columns(archive_dir):
+    with ArchiveQuery(str(archive_dir), ":memory:") as archive:
+        relation = archive.scan("contratos", columns=["numero_controle_pncp"], start_month="2024-02")
+        assert relation.columns == ["numero_controle_pncp"]
+        assert relation.fetchall() == [("C",)]
+
+
+def test_export_and_batches(archive_dir, tmp_path):
+    with ArchiveQuery(str(archive_dir), ":memory:") as archive:
+        rows = sum(batch.num_rows for batch in archive.fetch_batches("SELECT * FROM contratos", batch_size=1))
+        target = archive.export("SELECT * FROM contratos", str(tmp_path / "out" / "contratos.csv"))
+
+    assert rows == 3
+    assert target.read_text().count("\n") == 4
+
+
+def test_rollups_recompute_only_touched_months(tmp_path):
+    from baliza.storage.rollups import refresh_rollups
+
+    rows = [
+        {"_dlt_id": "1", "orgao_entidade__cnpj": "X", "unidade_orgao__uf_sigla": "SP",
+         "valor_global": 10.0, "valor_inicial": 8.0},
+        # Same record loaded twice must be counted once
+        {"_dlt_id": "1", "orgao_entidade__cnpj": "X", "unidade_orgao__uf_sigla": "SP",
+         "valor_global": 10.0, "valor_inicial": 8.0},
+        {"_dlt_id": "2", "orgao_entidade__cnpj": "X", "unidade_orgao__uf_sigla": "SP",
+         "valor_global": 5.0, "valor_inicial": 5.0},
+    ]
+    _write_partition(tmp_path, "contratos", 2024, 1, rows)
+    _write_partition(tmp_path, "contratos", 2024, 2, rows[:1])
+
+    assert refresh_rollups(str(tmp_path), [("contratos", 2024, 1)]) == 1
+
+    with ArchiveQuery(str(tmp_path), ":memory:") as archive:
+        assert "contratos_mensal" in archive.tables
+        result = archive.sql(
+            "SELECT year, month, registros, valor_global FROM contratos_mensal"
+        ).fetchall()
+
+    assert result == [(2024, 1, 2, 15.0)]
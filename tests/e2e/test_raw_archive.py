@@ -0,0 +1,45 @@
+"""
+Tests for the raw response archive.
+"""
+
+import json
+
+from baliza.storage import raw_archive
+
+
+def test_frames_round_trip_with_routes(tmp_path):
+    pages = [{"data": [{"numeroControlePNCP": f"C-{i}"}], "totalPaginas": 2} for i in range(2)]
+    for page in pages:
+        raw_archive.append_response(
+            str(tmp_path), "contratos", "2024-01", json.dumps(page).encode(),
+            url="https://pncp.gov.br/api/consulta/v1/contratos?pagina=1",
+            route={"table": "contratos", "partition": "2024-01"}
+        )
+
+    segments = raw_archive.list_segments(str(tmp_path), start_bucket="2024-01", end_bucket="2024-01")
+    assert [(s.endpoint, s.bucket) for s in segments] == [("contratos", "2024-01")]
+    assert raw_archive.list_segments(str(tmp_path), end_bucket="2023-12") == []
+
+    frames = list(raw_archive.read_segment(segments[0].path))
+    assert [json.loads(frame["body"]) for _, frame in frames] == pages
+    assert frames[1][0]["partition"] == "2024-01"
+    assert frames[1][0]["offset"] == frames[0][0]["length"]
+
+
+def test_replayed_plans_are_split_per_classification(tmp_path):
+    from baliza.extraction.replay import _records
+
+    plan = {"idPcaPncp": "P-1", "dataPublicacaoPNCP": "2024-01-10", "itens": [
+        {"numeroItem": 1, "classificacaoSuperiorCodigo": "A"},
+        {"numeroItem": 2, "classificacaoSuperiorCodigo": "B"},
+    ]}
+    raw_archive.append_response(
+        str(tmp_path), "pca", "2024", json.dumps({"data": [plan]}).encode(),
+        url="https://pncp.gov.br/api/consulta/v1/pca/?codigoClassificacaoSuperior=A&pagina=1",
+        route={"table": "pca", "partition_field": "dataPublicacaoPNCP"}
+    )
+
+    segment, = raw_archive.list_segments(str(tmp_path))
+    records = list(_records(raw_archive.read_segment(segment.path), "pca", [0]))
+    assert sorted(r["codigoClassificacaoSuperior"] for r in records) == ["A", "B"]
+    assert all(len(r["itens"]) == 1 for r in records)
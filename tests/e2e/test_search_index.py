@@ -0,0 +1,36 @@
+"""
+Tests for the full-text search index over procurement objects.
+"""
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from baliza.storage.layout import partition_dir
+from baliza.storage.search_index import normalize_terms, search, refresh_search_index
+
+
+def test_normalize_terms_folds_accents_plurals_and_stopwords():
+    assert normalize_terms("Aquisição de ambulâncias") == ["aquisicao", "ambulancia"]
+    assert normalize_terms("AQUISIÇÕES DE AMBULANCIA") == ["aquisicao", "ambulancia"]
+    assert normalize_terms("materiais hospitalares") == ["material", "hospitalar"]
+
+
+def test_search_without_index_returns_nothing(tmp_path):
+    assert search(str(tmp_path), "ambulância") == []
+
+
+def test_search_returns_partition_pointers(tmp_path):
+
+    path = partition_dir(str(tmp_path), "contratacoes_publicacao", 2024, 5)
+    path.mkdir(parents=True)
+    pq.write_table(pa.Table.from_pylist([
+        {"numero_controle_pncp": "P-1", "objeto_compra": "Aquisição de ambulâncias tipo A"},
+        {"numero_controle_pncp": "P-2", "objeto_compra": "Serviços de limpeza predial"},
+    ]), path / "1700000000.0.parquet")
+
+    assert refresh_search_index(str(tmp_path)) == 2
+    # Re-indexing a partition replaces its documents instead of duplicating them
+    assert refresh_search_index(str(tmp_path), [("contratacoes_publicacao", 2024, 5)]) == 2
+
+    hits = search(str(tmp_path), "AMBULANCIA")
+    assert [(h.record_id, h.year, h.month, h.row_group) for h in hits] == [("P-1", 2024, 5, 0)]
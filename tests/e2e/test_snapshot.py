@@ -0,0 +1,33 @@
+"""
+Tests for the snapshot-diff mode.
+"""
+
+from baliza.extraction import snapshot
+
+
+def _record(key, record_hash):
+    return {"_baliza_key": key, "_dlt_id": record_hash, "dataPublicacaoPncp": "2024-01-10"}
+
+
+def _run(con, records):
+    manifest = snapshot.SnapshotManifest("contratacoes_proposta", "run", "20240110", "now")
+    con.execute("DELETE FROM seen")
+    with con:
+        changes = list(snapshot.diff_records(con, records, manifest))
+        closed = list(snapshot.closed_keys(con, "run", "now"))
+        con.execute("DELETE FROM snapshot WHERE key NOT IN (SELECT key FROM seen)")
+    return manifest, changes, closed
+
+
+def test_only_churn_is_written(tmp_path):
+    con = snapshot._connect(str(tmp_path), "contratacoes_proposta")
+
+    manifest, changes, closed = _run(con, [_record("A", "a1"), _record("B", "b1"), _record("C", "c1")])
+    assert manifest.inserted == 3 and not closed
+
+    manifest, changes, closed = _run(con, [_record("A", "a1"), _record("B", "b2"), _record("D", "d1")])
+    assert (manifest.unchanged, manifest.changed, manifest.inserted) == (1, 1, 1)
+    assert [(r["_baliza_key"], r["_baliza_change"]) for r in changes] == [("B", "update"), ("D", "insert")]
+    assert [r["_baliza_key"] for r in closed] == ["C"]
+    assert closed[0]["dataPublicacaoPncp"] == "2024-01-10"
+    con.close()
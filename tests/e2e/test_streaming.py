@@ -0,0 +1,72 @@
+"""
+Tests for the byte-bounded spilling queue between fetchers and writers.
+"""
+
+import asyncio
+import threading
+
+import pytest
+
+from baliza.extraction.streaming import QueueClosed, SpillingQueue, stream_async
+
+
+def page(n: int):
+    return [{"numeroControlePNCP": f"{n}-{i}", "objeto": "x" * 100} for i in range(10)]
+
+
+def test_spills_past_memory_bound_and_keeps_order(tmp_path):
+    pages = SpillingQueue("test", max_bytes=10_000, spill_dir=tmp_path, pressure=lambda: False)
+    for n in range(20):
+        pages.put(page(n))
+    pages.close()
+
+    assert pages.memory_bytes <= 10_000
+    assert pages.spilled_items > 0
+    assert [p[0]["numeroControlePNCP"] for p in pages] == [f"{n}-0" for n in range(20)]
+
+
+def test_memory_pressure_spills_even_under_bound(tmp_path):
+    pages = SpillingQueue("test", max_bytes=10**9, spill_dir=tmp_path, pressure=lambda: True)
+    for n in range(3):
+        pages.put(page(n))
+
+    # The first page is always accepted so a lone oversized item cannot deadlock
+    assert len(pages) == 3 and pages.spilled_items == 2
+
+
+def test_full_queue_blocks_producer_until_consumer_drains():
+    pages = SpillingQueue("test", max_bytes=1, pressure=lambda: False)  # No spill dir: block instead
+    pages.put(page(0))
+    second = threading.Thread(target=pages.put, args=(page(1),))
+    second.start()
+    second.join(0.2)
+    assert second.is_alive()
+
+    assert pages.get()[0]["numeroControlePNCP"] == "0-0"
+    second.join(2)
+    assert not second.is_alive() and len(pages) == 1
+
+
+def test_stream_async_propagates_errors_and_unblocks_on_early_exit():
+    async def produce(queue):
+        for n in range(5):
+            await queue.put_async(page(n))
+        raise RuntimeError("boom")
+
+    seen = []
+    with pytest.raises(RuntimeError, match="boom"):
+        for item in stream_async(produce, SpillingQueue("test", max_bytes=1, pressure=lambda: False)):
+            seen.append(item)
+    assert len(seen) == 5
+
+    async def endless(queue):
+        n = 0
+        while True:
+            await queue.put_async(page(n))
+            n += 1
+
+    pages = SpillingQueue("test", max_bytes=1, pressure=lambda: False)
+    for _ in stream_async(endless, pages):
+        break
+    with pytest.raises(QueueClosed):
+        pages.put(page(0))
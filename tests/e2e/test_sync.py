@@ -0,0 +1,54 @@
+"""
+Tests for the tiered refresh schedule of baliza sync.
+"""
+
+from datetime import date, datetime, timedelta, timezone
+
+from baliza.extraction import sync
+from baliza.extraction.state_manager import StateManager
+from baliza.extraction.verify import SHARD_TOTALS
+
+TODAY = sync.TIERS[0]
+
+
+def _fake_extraction(reported):
+    def run(window_start, window_end, endpoints, output_dir, skip_completed):
+        StateManager(output_dir).update(SHARD_TOTALS, {
+            f"{endpoints[0]}|{window_start[:4]}-{window_start[4:6]}|": {
+                "reported": reported["total"], "recorded_at": datetime.now(timezone.utc).isoformat()
+            }
+        })
+    return run
+
+
+def test_interval_stretches_when_quiet_and_shrinks_on_changes(tmp_path, monkeypatch):
+    reported = {"total": 10}
+    monkeypatch.setattr(sync, "run_structured_extraction", _fake_extraction(reported))
+    scheduler = sync.SyncScheduler(str(tmp_path), ["contratos"], [TODAY])
+    now = datetime.now(timezone.utc)
+
+    def cycle(at):
+        work = scheduler.next_window(at, date.today())
+        if work:
+            scheduler.refresh(*work)
+        return work
+
+    assert cycle(now) is not None
+    assert cycle(now) is None  # Not due again yet
+
+    now += timedelta(seconds=TODAY.interval + 1)
+    cycle(now)
+    assert scheduler.schedule(TODAY)["interval"] == TODAY.interval * sync.SLOWER
+
+    reported["total"] = 12
+    now += timedelta(seconds=TODAY.interval * sync.SLOWER + 1)
+    cycle(now)
+    assert scheduler.schedule(TODAY)["interval"] == TODAY.interval * sync.SLOWER * sync.FASTER
+
+
+def test_tiers_cover_recent_days_without_overlap():
+    today = date(2026, 10, 18)
+    windows = [tier.window(today) for tier in sync.TIERS]
+    assert windows[0] == ("20261018", "20261018")
+    assert windows[1] == ("20260918", "20261017")
+    assert windows[2][1] == "20260917" and windows[3][1] == "20251017"
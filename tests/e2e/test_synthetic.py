@@ -0,0 +1,53 @@
+"""
+Tests for the synthetic PNCP payload generator.
+"""
+
+from datetime import date
+
+import pyarrow.parquet as pq
+
+from baliza.testing.synthetic import ENDPOINT_DTOS, SyntheticGenerator, cnpj  # noqa: E402
+
+
+def _valid_cnpj(value: str) -> bool:
+    return len(value) == 14 and cnpj(int(value[:8]), int(value[8:12])) == value
+
+
+def test_records_validate_and_are_deterministic():
+    generator = SyntheticGenerator(seed=7)
+    for dto in set(ENDPOINT_DTOS.values()):
+        for index in range(20):
+            record = generator.record(dto, index, date(2024, 3, 1))
+            dto.model_validate(record)
+            assert record == SyntheticGenerator(seed=7).record(dto, index, date(2024, 3, 1))
+
+    assert generator.record(ENDPOINT_DTOS["contratos"], 0, date(2024, 3, 1)) != \
+        SyntheticGenerator(seed=8).record(ENDPOINT_DTOS["contratos"], 0, date(2024, 3, 1))
+
+
+def test_pages_and_realism():
+    generator = SyntheticGenerator(seed=1, organ_cardinality=50)
+    pages = list(generator.iter_pages(ENDPOINT_DTOS["contratacoes_publicacao"], 1_201, date(2024, 1, 1), date(2024, 1, 31), 500))
+
+    assert [len(page["data"]) for page in pages] == [500, 500, 201]
+    assert [page["paginasRestantes"] for page in pages] == [2, 1, 0]
+
+    records = [record for page in pages for record in page["data"]]
+    organs = {record["orgaoEntidade"]["cnpj"] for record in records}
+    assert len(organs) <= 50 and all(_valid_cnpj(value) for value in organs)
+    assert records[0]["dataPublicacaoPncp"].startswith("2024-01-01")
+    assert records[-1]["dataPublicacaoPncp"].startswith("2024-01-31")
+    assert all(record["modalidadeNome"] for record in records)
+
+
+def test_write_parquet(tmp_path):
+    generator = SyntheticGenerator(seed=3)
+    path = tmp_path / "contratos.parquet"
+
+    written = generator.write_parquet(ENDPOINT_DTOS["contratos"], path, 250, date(2024, 1, 1), date(2024, 1, 10), batch_size=100)
+
+    assert written == 250
+    table = pq.read_table(path)
+    assert table.num_rows == 250
+    assert table.column("numeroControlePNCP")[0].as_py() == \
+        generator.record(ENDPOINT_DTOS["contratos"], 0, date(2024, 1, 1))["numeroControlePNCP"]
@@ -0,0 +1,109 @@
+"""
+Tests for latest-wins upsert by natural key.
+"""
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import dlt
+from dlt.destinations import filesystem
+
+from baliza.extraction.config import natural_key_step
+from baliza.settings import ENDPOINT_CONFIG
+from baliza.storage.layout import DATASET_NAME, PARTITION_LAYOUT, list_partitions, partition_dir, partition_placeholders
+from baliza.storage.upsert import upsert_partition
+from baliza.utils import hash_sha256
+
+
+def _write(output_dir, table, name, rows):
+    path = partition_dir(str(output_dir), table, 2024, 1)
+    path.mkdir(parents=True, exist_ok=True)
+    pq.write_table(pa.Table.from_pylist(rows), path / name)
+
+
+def test_natural_key_step_uses_endpoint_config():
+    step = natural_key_step(ENDPOINT_CONFIG["contratos"])
+    record = step({"numeroControlePNCP": "C-1", "dataAtualizacao": "2024-02-01T00:00:00"})
+
+    assert record["_baliza_key"] == "C-1"
+    assert record["_baliza_version"] == "2024-02-01T00:00:00"
+
+
+def test_upsert_keeps_latest_version_and_history(tmp_path):
+    _write(tmp_path, "contratos", "1.0.parquet", [
+        {"_dlt_id": "v1", "_baliza_key": "C-1", "_baliza_version": "2024-01-10", "valor_global": 10.0},
+        {"_dlt_id": "x1", "_baliza_key": "C-2", "_baliza_version": "2024-01-10", "valor_global": 1.0},
+    ])
+    _write(tmp_path, "contratos", "2.0.parquet", [
+        {"_dlt_id": "v2", "_baliza_key": "C-1", "_baliza_version": "2024-01-20", "valor_global": 12.0},
+        {"_dlt_id": "x1", "_baliza_key": "C-2", "_baliza_version": "2024-01-10", "valor_global": 1.0},
+    ])
+
+    assert upsert_partition(str(tmp_path), "contratos", 2024, 1) == 1
+    # A second run finds the partition already compact
+    assert upsert_partition(str(tmp_path), "contratos", 2024, 1) == 0
+
+    current = list_partitions(str(tmp_path), "contratos")[0]
+    assert [p.name for p in current.files] == ["current.parquet"]
+    rows = sorted(pq.read_table(current.files[0]).to_pylist(), key=lambda r: r["_baliza_key"])
+    assert [(r["_baliza_key"], r["valor_global"]) for r in rows] == [("C-1", 12.0), ("C-2", 1.0)]
+
+    history = list_partitions(str(tmp_path), "contratos__history")[0]
+    assert pq.read_table(history.files[0]).column("_dlt_id").to_pylist() == ["v1"]
+
+
+def test_records_without_natural_key_stay_current(tmp_path):
+    _write(tmp_path, "contratos", "1.0.parquet", [
+        {"_dlt_id": "n1", "_baliza_key": None, "_baliza_version": "2024-01-10", "valor_global": 1.0},
+        {"_dlt_id": "n2", "_baliza_key": None, "_baliza_version": "2024-01-20", "valor_global": 2.0},
+        {"_dlt_id": "v1", "_baliza_key": "C-1", "_baliza_version": "2024-01-10", "valor_global": 10.0},
+    ])
+    _write(tmp_path, "contratos", "2.0.parquet", [
+        {"_dlt_id": "v2", "_baliza_key": "C-1", "_baliza_version": "2024-01-20", "valor_global": 12.0},
+    ])
+
+    assert upsert_partition(str(tmp_path), "contratos", 2024, 1) == 1
+
+    current = list_partitions(str(tmp_path), "contratos")[0]
+    assert sorted(pq.read_table(current.files[0]).column("_dlt_id").to_pylist()) == ["n1", "n2", "v2"]
+
+
+def _load(output_dir, records):
+    """Load records the way extraction does: record hash and natural key, then a dlt filesystem load."""
+    add_key = natural_key_step(ENDPOINT_CONFIG["contratacoes_publicacao"])
+    rows = [add_key({**record, "_dlt_id": hash_sha256(record)}) for record in records]
+
+    @dlt.resource(name="contratacoes_publicacao", primary_key="_dlt_id", write_disposition="merge")
+    def resource():
+        yield from rows
+
+    pipeline = dlt.pipeline(
+        pipeline_name="upsert_test",
+        pipelines_dir=str(output_dir / ".dlt"),
+        destination=filesystem(bucket_url=str(output_dir), layout=PARTITION_LAYOUT,
+                               extra_placeholders=partition_placeholders(2024, 1)),
+        dataset_name=DATASET_NAME,
+    )
+    pipeline.run(resource(), loader_file_format="parquet")
+
+
+def _column(output_dir, table, column):
+    files = list_partitions(str(output_dir), table)[0].files
+    return sorted(value for path in files for value in pq.read_table(path).column(column).to_pylist())
+
+
+def test_nested_rows_follow_their_parent_version(tmp_path):
+    def version(updated, codigo):
+        return {"numeroControlePNCP": "P-1", "dataAtualizacao": updated,
+                "fontes": [{"codigo": codigo, "itens": [{"valor": codigo}]}]}
+
+    # A real dlt load: nested rows only carry _dlt_parent_id
+    _load(tmp_path, [version("2024-01-10", 1), {"objetoCompra": "sem chave", "fontes": [{"codigo": 0}]}])
+    _load(tmp_path, [version("2024-01-20", 2)])
+
+    assert upsert_partition(str(tmp_path), "contratacoes_publicacao", 2024, 1) == 1
+
+    assert _column(tmp_path, "contratacoes_publicacao__fontes", "codigo") == [0, 2]
+    assert _column(tmp_path, "contratacoes_publicacao__fontes__history", "codigo") == [1]
+    assert _column(tmp_path, "contratacoes_publicacao__fontes__itens", "valor") == [2]
+    assert _column(tmp_path, "contratacoes_publicacao__fontes__itens__history", "valor") == [1]
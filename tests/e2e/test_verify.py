@@ -0,0 +1,55 @@
+"""
+Tests for totalRegistros completeness checks and the re-fetch queue.
+"""
+
+from types import SimpleNamespace
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from baliza.extraction.state_manager import StateManager
+from baliza.extraction.verify import (
+    REFETCH_QUEUE, check_window, totals_hook, verify_archive
+)
+from baliza.storage.layout import NATURAL_KEY_COLUMN, partition_dir
+
+
+def _response(url, status=200, body=None):
+    return SimpleNamespace(url=url, status_code=status, json=lambda: body)
+
+
+def test_hook_captures_first_page_totals_per_modalidade():
+    totals = {}
+    hook = totals_hook(totals)
+    hook(_response("https://pncp/v1/contratacoes/publicacao?pagina=1&codigoModalidadeContratacao=6",
+                   body={"totalRegistros": 120}))
+    hook(_response("https://pncp/v1/contratacoes/publicacao?pagina=2&codigoModalidadeContratacao=6",
+                   body={"totalRegistros": 999}))
+    hook(_response("https://pncp/v1/contratacoes/publicacao?pagina=1&codigoModalidadeContratacao=8", status=204))
+
+    assert totals == {"6": 120, "8": 0}
+
+
+def test_short_window_is_queued_and_cleared_once_complete(tmp_path):
+    state = StateManager(str(tmp_path))
+
+    assert not check_window(state, "contratos", "2024-01", {"": 500}, 450)
+    assert state.get_section(REFETCH_QUEUE)["contratos|2024-01|"]["endpoint"] == "contratos"
+
+    assert check_window(state, "contratos", "2024-01", {"": 500}, 500)
+    assert state.get_section(REFETCH_QUEUE) == {}
+
+
+def test_verify_counts_distinct_keys_and_detects_changed_files(tmp_path):
+    path = partition_dir(str(tmp_path), "contratos", 2024, 1)
+    path.mkdir(parents=True)
+    keys = ["A", "B", "B"]  # B loaded twice: dedup leaves 2 records
+    pq.write_table(pa.Table.from_pylist([{NATURAL_KEY_COLUMN: k} for k in keys]), path / "1.0.parquet")
+
+    state = StateManager(str(tmp_path))
+    check_window(state, "contratos", "2024-01", {"": 3}, 3)
+
+    result = verify_archive(str(tmp_path))
+    assert [(c.reported, c.archived, c.status) for c in result.checks] == [(3, 2, "missing")]
+    assert "contratos|2024-01|" in state.get_section(REFETCH_QUEUE)
+    assert result.corrupt == []
@@ -0,0 +1,72 @@
+"""
+Tests for the filesystem work queue shared by several workers.
+"""
+
+import multiprocessing
+import time
+
+from baliza.extraction import pipeline
+from baliza.extraction.work_queue import WorkQueue, run_worker
+from baliza.utils.completion_tracking import mark_extraction_completed
+
+WINDOWS = [("contratos", f"2024{m:02d}01", f"2024{m:02d}28") for m in range(1, 13)]
+
+
+def _drain(output_dir, worker_id, claimed):
+    queue = WorkQueue(output_dir, worker_id)
+    while (task := queue.claim()) is not None:
+        claimed.put(task.id)
+        time.sleep(0.01)
+        queue.complete(task)
+
+
+def test_processes_split_the_queue_without_overlap(tmp_path):
+    assert WorkQueue(str(tmp_path)).enqueue(WINDOWS) == 12
+    assert WorkQueue(str(tmp_path)).enqueue(WINDOWS) == 0
+
+    context = multiprocessing.get_context("spawn")
+    claimed = context.Queue()
+    workers = [context.Process(target=_drain, args=(str(tmp_path), f"w{n}", claimed)) for n in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    ids = [claimed.get(timeout=5) for _ in range(12)]
+    assert sorted(ids) == sorted(set(ids))
+    assert WorkQueue(str(tmp_path)).counts()["done"] == 12
+
+
+def test_expired_lease_is_reclaimed(tmp_path):
+    crashed = WorkQueue(str(tmp_path), "crashed", lease_seconds=0.05)
+    other = WorkQueue(str(tmp_path), "other")
+    crashed.enqueue(WINDOWS[:1])
+
+    task = crashed.claim()
+    assert other.claim() is None
+
+    time.sleep(0.1)
+    retry = other.claim()
+    assert retry.id == task.id and retry.attempts == 1
+    assert not crashed.heartbeat(task)
+
+    other.complete(retry)
+    assert other.drained()
+
+
+def test_unmarked_month_is_retried_not_done(tmp_path, monkeypatch):
+    queue = WorkQueue(str(tmp_path), "w")
+    queue.enqueue(WINDOWS[:2])
+
+    # January is left unmarked (short of totalRegistros), February completes
+    def extract(window_start, window_end, endpoints, output_dir, **kwargs):
+        if window_start.startswith("202402"):
+            mark_extraction_completed(output_dir, window_start, window_end, endpoints)
+        return []
+
+    monkeypatch.setattr(pipeline, "run_structured_extraction", extract)
+    completed, failed = run_worker(str(tmp_path), "w", poll_seconds=0.01)
+
+    counts = queue.counts()
+    assert completed == 1 and failed == queue.max_attempts
+    assert counts["done"] == 1 and counts["failed"] == 1
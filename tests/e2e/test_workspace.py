@@ -0,0 +1,44 @@
+"""
+Tests for per-shard dlt workspaces and their publication into the archive.
+"""
+
+import json
+import os
+import socket
+import subprocess
+import sys
+
+from baliza.extraction.workspace import OWNER_FILE, collect_garbage, publish, staging_dir
+from baliza.storage.layout import DATASET_NAME
+
+
+def _stage(root, *files):
+    for name in files:
+        path = root / DATASET_NAME / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(name)
+
+
+def test_publish_moves_data_before_commit_entry(tmp_path):
+    staging = tmp_path / "staging"
+    _stage(staging, "_dlt_loads/1700.parquet", "contratos/year=2024/month=01/1700.0.parquet", "init")
+    (tmp_path / "out" / DATASET_NAME).mkdir(parents=True)
+    (tmp_path / "out" / DATASET_NAME / "init").write_text("existing")
+
+    assert publish(staging, str(tmp_path / "out")) == 2
+    archive = tmp_path / "out" / DATASET_NAME
+    assert (archive / "contratos/year=2024/month=01/1700.0.parquet").exists()
+    assert (archive / "_dlt_loads/1700.parquet").exists()
+    assert (archive / "init").read_text() == "existing"
+
+
+def test_garbage_of_dead_processes_is_collected(tmp_path):
+    dead = subprocess.run([sys.executable, "-c", "import os; print(os.getpid())"],
+                          capture_output=True, text=True, check=True)
+    for name, pid in [("gone", int(dead.stdout)), ("running", os.getpid())]:
+        workspace = staging_dir(str(tmp_path)) / name
+        workspace.mkdir(parents=True)
+        (workspace / OWNER_FILE).write_text(json.dumps({"host": socket.gethostname(), "pid": pid}))
+
+    assert collect_garbage(str(tmp_path)) == 1
+    assert [p.name for p in staging_dir(str(tmp_path)).iterdir()] == ["running"]